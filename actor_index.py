@@ -0,0 +1,132 @@
+# In-memory trigram index over actor names: resolves a name fragment to actor_ids
+import logging
+
+from background import BackgroundRefresher
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def trigrams(text):
+    """
+    Get the set of 3-character substrings of a text.
+
+    Args:
+        text (str): Lower-case text.
+
+    Returns:
+        set: Trigrams (empty for texts shorter than 3 characters).
+    """
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ActorIndex(BackgroundRefresher):
+    """
+    Substring index over actor first and last names.
+    A keyword matches an actor if it is a substring of the first or the last
+    name (case-insensitive), the same semantics as LOWER(name) LIKE '%keyword%'.
+    Candidates are found by intersecting trigram posting lists and verified
+    against the names. The index is rebuilt by a background thread every
+    ACTOR_INDEX_REFRESH_INTERVAL seconds; until the first load resolve()
+    returns None and callers fall back to the SQL LIKE query.
+    """
+
+    thread_name = "actor-index"
+
+    def __init__(self, loader):
+        """
+        Args:
+            loader (callable): Function returning rows (dicts or a ResultSet)
+                with actor_id, first_name and last_name.
+        """
+        super().__init__()
+        self._loader = loader
+        # (names by actor_id, trigram -> set of actor_ids), swapped as a whole
+        self._snapshot = None
+
+    @property
+    def enabled(self):
+        return settings.ACTOR_INDEX_ENABLED
+
+    @property
+    def interval(self):
+        return settings.ACTOR_INDEX_REFRESH_INTERVAL
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    def refresh(self):
+        """
+        Rebuild the index from the database; a failed or empty load keeps the previous index.
+
+        Returns:
+            bool: True if the index was rebuilt.
+        """
+        try:
+            rows = self._loader()
+        except Exception as e:
+            logger.error(f"Error loading actors for the actor index: {e}")
+            return False
+        if not rows:
+            logger.warning("Actor list is empty, keeping the previous actor index")
+            return False
+        self._snapshot = self.build(rows)
+        logger.info(f"Actor index loaded: {len(rows)} actors")
+        return True
+
+    @staticmethod
+    def build(rows):
+        """
+        Build an index snapshot.
+
+        Args:
+            rows (iterable): Rows with actor_id, first_name and last_name.
+
+        Returns:
+            tuple: (names by actor_id, trigram -> set of actor_ids)
+        """
+        names = {}
+        postings = {}
+        for row in rows:
+            first = (row["first_name"] or "").lower()
+            last = (row["last_name"] or "").lower()
+            names[row["actor_id"]] = (first, last)
+            for trigram in trigrams(first) | trigrams(last):
+                postings.setdefault(trigram, set()).add(row["actor_id"])
+        return names, postings
+
+    def resolve(self, keyword):
+        """
+        Find the actors whose first or last name contains the keyword.
+
+        Args:
+            keyword (str): Part of actor's name or surname.
+
+        Returns:
+            list or None: Sorted actor_ids, or None if the index is not loaded or
+                more than ACTOR_INDEX_MAX_IDS actors match (a join by id would not help).
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        names, postings = snapshot
+        keyword = keyword.lower()
+        keyword_trigrams = trigrams(keyword)
+        if keyword_trigrams:
+            candidate_sets = sorted(
+                (postings.get(trigram, set()) for trigram in keyword_trigrams), key=len
+            )
+            candidates = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        else:
+            # One or two characters: no trigrams, check every name
+            candidates = names.keys()
+        # Trigrams may come from different names: verify the substring
+        actor_ids = sorted(
+            actor_id
+            for actor_id in candidates
+            if keyword in names[actor_id][0] or keyword in names[actor_id][1]
+        )
+        if len(actor_ids) > settings.ACTOR_INDEX_MAX_IDS:
+            return None
+        return actor_ids
@@ -0,0 +1,302 @@
+# Asyncio HTTP service exposing the search and statistics functions
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import logging
+
+from aiohttp import web
+
+from db_connector import close_all_connections, get_mysql_pool, mongo_health
+from film_search import film_search_refresher
+from instrumentation import instrumentation
+from mongo_controler import (
+    autocomplete,
+    get_last_queries,
+    get_popular_queries,
+    get_window_popular_queries,
+    get_window_query_summary,
+    log_search_query,
+)
+from mysql_controler import (
+    actor_index,
+    decode_cursor,
+    fuzzy_index,
+    get_query_template_stats,
+    get_search_cache_stats,
+    search_page,
+)
+from reference_data import get_cached_year_range, get_genres, reference_data
+from search_log_writer import search_log_writer
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+# Application keys for shared state
+EXECUTOR = web.AppKey("executor", ThreadPoolExecutor)
+SEMAPHORE = web.AppKey("semaphore", asyncio.Semaphore)
+
+_dumps = functools.partial(json.dumps, ensure_ascii=False, default=str)
+
+
+def json_response(data, status=200):
+    """
+    Build a JSON response; datetimes and decimals are serialized as strings.
+    """
+    return web.json_response(data, status=status, dumps=_dumps)
+
+
+def bad_request(message):
+    return json_response({"error": message}, status=400)
+
+
+async def run_blocking(request, func, *args, **kwargs):
+    """
+    Run a blocking controller function on the bounded worker pool.
+    The semaphore caps requests waiting for a database connection, so hundreds
+    of concurrent requests share the pooled connections instead of piling up.
+    """
+    app = request.app
+    async with app[SEMAPHORE]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            app[EXECUTOR], functools.partial(func, *args, **kwargs)
+        )
+
+
+def _int_arg(request, name, default=None):
+    value = request.query.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise web.HTTPBadRequest(
+            text=_dumps({"error": f"'{name}' must be an integer"}),
+            content_type="application/json",
+        )
+
+
+async def _search(request, search_type, params, log_query):
+    """
+    Run one page of a search and log it when the first page is requested.
+    """
+    limit = min(max(_int_arg(request, "limit", 10), 1), MAX_PAGE_SIZE)
+    cursor = request.query.get("cursor") or None
+    total = _int_arg(request, "total")
+    if cursor is not None:
+        # The controllers treat a bad cursor as an empty page: reject it here
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            return bad_request(str(e))
+    try:
+        page = await run_blocking(request, search_page, search_type, params, limit, cursor, total)
+    except ValueError as e:
+        return bad_request(str(e))
+    if cursor is None:
+        log_search_query(log_query, search_type, page.total)
+    body = {
+        "headers": page.headers,
+        "rows": page.rows.to_dicts(),
+        "next_cursor": page.next_cursor,
+        "total": page.total,
+    }
+    if page.total == 0 and search_type in ("title", "actor"):
+        # "Did you mean": closest titles / actor names from the in-memory fuzzy index
+        body["suggestions"] = await run_blocking(
+            request, fuzzy_index.suggest, search_type, log_query
+        )
+    return json_response(body)
+
+
+async def search_title(request):
+    """
+    GET /films/title?keyword=...&limit=10&cursor=...&total=...&mode=fulltext|substring|fuzzy
+    """
+    keyword = request.query.get("keyword", "").strip()
+    if not keyword:
+        return bad_request("'keyword' is required")
+    params = {"keyword": keyword, "mode": request.query.get("mode") or None}
+    return await _search(request, "title", params, keyword)
+
+
+async def search_genre_year(request):
+    """
+    GET /films/genre?genre=...&year_from=...&year_to=...&limit=10&cursor=...&total=...
+    """
+    genre = request.query.get("genre", "").strip()
+    if not genre:
+        return bad_request("'genre' is required")
+    # May wait for the reference data load: keep it off the event loop
+    year_range = await run_blocking(request, get_cached_year_range) or {}
+    params = {
+        "genre": genre,
+        "year_from": _int_arg(request, "year_from", year_range.get("min_year")),
+        "year_to": _int_arg(request, "year_to", year_range.get("max_year")),
+    }
+    params = {key: value for key, value in params.items() if value is not None}
+    log_query = f"{genre} {params.get('year_from')}-{params.get('year_to')}"
+    return await _search(request, "genre_year", params, log_query)
+
+
+async def search_actor(request):
+    """
+    GET /films/actor?actor=...&limit=10&cursor=...&total=...&mode=fuzzy
+    """
+    actor = request.query.get("actor", "").strip()
+    if not actor:
+        return bad_request("'actor' is required")
+    params = {"actor": actor, "mode": request.query.get("mode") or None}
+    return await _search(request, "actor", params, actor)
+
+
+async def popular_queries(request):
+    """
+    GET /queries/popular?limit=5
+    """
+    limit = min(max(_int_arg(request, "limit", 5), 1), MAX_PAGE_SIZE)
+    return json_response(await run_blocking(request, get_popular_queries, limit) or [])
+
+
+async def recent_queries(request):
+    """
+    GET /queries/recent?limit=10
+    """
+    limit = min(max(_int_arg(request, "limit", 10), 1), MAX_PAGE_SIZE)
+    return json_response(await run_blocking(request, get_last_queries, limit) or [])
+
+
+def _window_report(window, limit):
+    return {
+        "window": window,
+        "summary": get_window_query_summary(window),
+        "queries": get_window_popular_queries(window, limit),
+    }
+
+
+async def window_queries(request):
+    """
+    GET /queries/window?window=hour|day|week&limit=5: popular queries, zero-result
+    rate and mean number of results of a time window, from the query rollups.
+    """
+    window = request.query.get("window", "day")
+    limit = min(max(_int_arg(request, "limit", 5), 1), MAX_PAGE_SIZE)
+    try:
+        report = await run_blocking(request, _window_report, window, limit)
+    except ValueError as e:
+        return bad_request(str(e))
+    return json_response(report)
+
+
+async def suggest(request):
+    """
+    GET /suggest?prefix=...&type=title|genre_year|actor&limit=10: query autocomplete.
+    Answered from memory on the event loop, without the worker pool.
+    """
+    prefix = request.query.get("prefix", "")
+    if not prefix.strip():
+        return json_response([])
+    limit = min(max(_int_arg(request, "limit", settings.AUTOCOMPLETE_TOP_K), 1), MAX_PAGE_SIZE)
+    search_type = request.query.get("type") or None
+    return json_response(autocomplete.suggest(prefix, search_type, limit))
+
+
+async def genres(request):
+    """
+    GET /genres: genre list and year range from the in-memory reference data.
+    """
+    genre_list = await run_blocking(request, get_genres)
+    year_range = await run_blocking(request, get_cached_year_range)
+    return json_response({"genres": genre_list, "year_range": year_range})
+
+
+async def health(request):
+    """
+    GET /health: MongoDB breaker state, MySQL pool usage, search cache and
+    query template / prepared statement counters.
+    """
+    # The first get_mysql_pool() call opens the pool connections
+    pool = await run_blocking(request, get_mysql_pool)
+    return json_response(
+        {
+            "mongo": mongo_health.status(),
+            "mysql_pool": pool.status(),
+            "search_cache": get_search_cache_stats(),
+            "query_templates": get_query_template_stats(),
+        }
+    )
+
+
+async def metrics(request):
+    """
+    GET /metrics?by=search_type|statement: database call latency percentiles.
+    """
+    by = request.query.get("by", "search_type")
+    if by not in ("search_type", "statement"):
+        return bad_request("'by' must be 'search_type' or 'statement'")
+    return json_response(instrumentation.percentiles(by))
+
+
+async def on_startup(app):
+    mongo_health.start()
+    reference_data.start()
+    actor_index.start()
+    fuzzy_index.start()
+    autocomplete.start()
+    film_search_refresher.start()
+    search_log_writer.start()
+
+
+async def on_cleanup(app):
+    app[EXECUTOR].shutdown(wait=True)
+    search_log_writer.stop()
+    close_all_connections()
+
+
+def create_app(workers=None):
+    """
+    Create the aiohttp application.
+
+    Args:
+        workers (int, optional): Worker threads for database calls; defaults to
+            settings.API_WORKERS (keep close to MYSQL_POOL_MAX).
+
+    Returns:
+        Application: Configured aiohttp application.
+    """
+    workers = workers or settings.API_WORKERS
+    app = web.Application()
+    app[EXECUTOR] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+    app[SEMAPHORE] = asyncio.Semaphore(settings.API_MAX_PENDING)
+    app.router.add_get("/films/title", search_title)
+    app.router.add_get("/films/genre", search_genre_year)
+    app.router.add_get("/films/actor", search_actor)
+    app.router.add_get("/queries/popular", popular_queries)
+    app.router.add_get("/queries/recent", recent_queries)
+    app.router.add_get("/queries/window", window_queries)
+    app.router.add_get("/suggest", suggest)
+    app.router.add_get("/genres", genres)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def run_server(host=None, port=None, workers=None):
+    """
+    Run the HTTP service until interrupted.
+
+    Args:
+        host (str, optional): Bind address; defaults to settings.API_HOST.
+        port (int, optional): Port; defaults to settings.API_PORT.
+        workers (int, optional): Worker threads for database calls.
+    """
+    web.run_app(
+        create_app(workers),
+        host=host or settings.API_HOST,
+        port=port or settings.API_PORT,
+    )
@@ -0,0 +1,238 @@
+# Query autocomplete: prefix trie over logged search queries, ranked by
+# frequency with forward exponential decay (recent searches weigh more)
+from datetime import datetime, timezone
+import logging
+import threading
+import time
+
+from background import BackgroundRefresher
+from query_stats import normalize_query
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Rebase the decay landmark before the weights grow large (2 ** 60 is still exact enough)
+_MAX_EXPONENT = 60
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        # Best (score, normalized query) pairs below this node, best first.
+        # Replaced as a whole on update, so readers need no lock.
+        self.top = []
+
+
+class Autocomplete(BackgroundRefresher):
+    """
+    Prefix suggestions from the search log, one trie per search type.
+    Every search counts with weight 2 ** ((t - landmark) / half-life) (forward
+    decay): older searches are not re-weighted on each update, yet a query's
+    score ranks like its decayed frequency. Scores only grow between rebases,
+    so every trie node can keep an exact top list of its completions and a
+    lookup is a walk down the prefix.
+
+    The trie is rebuilt from the log every AUTOCOMPLETE_REBUILD_INTERVAL
+    seconds and updated by record() as searches are logged.
+    """
+
+    thread_name = "autocomplete"
+
+    def __init__(self, loader):
+        """
+        Args:
+            loader (callable): Function (landmark datetime, half-life seconds, limit)
+                returning dicts with query, search_type and score (weights relative
+                to the landmark).
+        """
+        super().__init__()
+        self._loader = loader
+        self._roots = {}  # search_type -> _Node
+        self._entries = {}  # (search_type, normalized query) -> [score, query text]
+        self._landmark = time.time()
+        self._recording = None  # searches recorded while a rebuild is loading
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return settings.AUTOCOMPLETE_ENABLED
+
+    @property
+    def interval(self):
+        return settings.AUTOCOMPLETE_REBUILD_INTERVAL
+
+    @property
+    def half_life(self):
+        return settings.AUTOCOMPLETE_HALF_LIFE_HOURS * 3600
+
+    def _weight(self, timestamp):
+        return 2 ** ((timestamp - self._landmark) / self.half_life)
+
+    def record(self, query, search_type, timestamp=None):
+        """
+        Count one search (call for searches that found something).
+
+        Args:
+            query (str): Query text as entered.
+            search_type (str): Search type.
+            timestamp (float, optional): Unix time of the search; defaults to now.
+        """
+        if not settings.AUTOCOMPLETE_ENABLED:
+            return
+        query_norm = normalize_query(query)
+        if not query_norm:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if (timestamp - self._landmark) / self.half_life > _MAX_EXPONENT:
+                self._rebase(timestamp)
+            self._add(
+                self._roots, self._entries, search_type, query_norm, query, self._weight(timestamp)
+            )
+            if self._recording is not None:
+                self._recording.append((query, search_type, timestamp))
+
+    @staticmethod
+    def _add(roots, entries, search_type, query_norm, text, weight):
+        key = (search_type, query_norm)
+        entry = entries.get(key)
+        if entry is None:
+            if len(entries) >= settings.AUTOCOMPLETE_MAX_QUERIES:
+                # Full: new queries wait for the next rebuild, which keeps the best ones
+                return
+            entry = entries[key] = [0.0, text]
+        entry[0] += weight
+        entry[1] = text
+        root = roots.get(search_type)
+        if root is None:
+            root = roots[search_type] = _Node()
+        Autocomplete._update_path(root, query_norm, entry[0])
+
+    @staticmethod
+    def _update_path(root, query_norm, score):
+        k = settings.AUTOCOMPLETE_TOP_K
+        node = root
+        depth = 0
+        while True:
+            top = node.top
+            if len(top) < k or score > top[-1][0] or any(q == query_norm for _, q in top):
+                top = [item for item in top if item[1] != query_norm]
+                top.append((score, query_norm))
+                top.sort(reverse=True)
+                node.top = top[:k]
+            if depth == len(query_norm) or depth == settings.AUTOCOMPLETE_MAX_PREFIX:
+                return
+            char = query_norm[depth]
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            depth += 1
+
+    def _rebuild(self, scores, landmark):
+        # Filled aside and swapped in, so lookups never see a half-built trie
+        roots = {}
+        entries = {}
+        # Best first: if the cap is hit, the weakest queries are the ones left out
+        for (search_type, query_norm), (score, text) in sorted(
+            scores.items(), key=lambda item: item[1][0], reverse=True
+        ):
+            self._add(roots, entries, search_type, query_norm, text, score)
+        self._roots, self._entries, self._landmark = roots, entries, landmark
+
+    def _rebase(self, now):
+        factor = 2 ** ((self._landmark - now) / self.half_life)
+        entries = {key: [score * factor, text] for key, (score, text) in self._entries.items()}
+        self._rebuild(entries, now)
+
+    def refresh(self):
+        """
+        Rebuild the tries from the search log; a failed or empty load keeps
+        the current ones. Searches recorded during the load are applied on top.
+
+        Returns:
+            bool: True if the tries were rebuilt.
+        """
+        landmark = time.time()
+        with self._lock:
+            self._recording = []
+        try:
+            rows = self._loader(
+                datetime.fromtimestamp(landmark, timezone.utc),
+                self.half_life,
+                settings.AUTOCOMPLETE_MAX_QUERIES,
+            )
+        except Exception as e:
+            logger.error(f"Error loading queries for autocomplete: {e}")
+            rows = None
+        with self._lock:
+            recorded, self._recording = self._recording, None
+            if not rows:
+                return False
+            entries = {}
+            for row in rows:
+                key = (row["search_type"], normalize_query(row["query"]))
+                entry = entries.setdefault(key, [0.0, row["query"]])
+                entry[0] += row["score"]
+            self._rebuild(entries, landmark)
+            for query, search_type, timestamp in recorded:
+                self._add(
+                    self._roots,
+                    self._entries,
+                    search_type,
+                    normalize_query(query),
+                    query,
+                    self._weight(timestamp),
+                )
+        logger.info(f"Autocomplete loaded: {len(entries)} queries")
+        return True
+
+    def suggest(self, prefix, search_type=None, limit=None):
+        """
+        Get the best completions of a prefix.
+
+        Args:
+            prefix (str): Beginning of a query (case and spacing are normalized).
+            search_type (str, optional): Restrict to one search type.
+            limit (int, optional): Maximum number of suggestions (at most AUTOCOMPLETE_TOP_K).
+
+        Returns:
+            list: Dicts with query, search_type and score (decayed number of searches).
+        """
+        limit = min(limit or settings.AUTOCOMPLETE_TOP_K, settings.AUTOCOMPLETE_TOP_K)
+        prefix_norm = normalize_query(prefix)
+        if prefix.endswith(" ") and prefix_norm:
+            # Keep the word boundary the user has typed
+            prefix_norm += " "
+        path = prefix_norm[: settings.AUTOCOMPLETE_MAX_PREFIX]
+        roots = self._roots
+        types = [search_type] if search_type is not None else list(roots)
+        candidates = []
+        for name in types:
+            node = roots.get(name)
+            for char in path:
+                if node is None:
+                    break
+                node = node.children.get(char)
+            if node is None:
+                continue
+            for score, query_norm in node.top:
+                # Nodes stop at AUTOCOMPLETE_MAX_PREFIX characters: check the rest
+                if query_norm.startswith(prefix_norm):
+                    candidates.append((score, name, query_norm))
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        # Scores relative to now: the decayed number of searches
+        decay = 2 ** min((self._landmark - time.time()) / self.half_life, _MAX_EXPONENT)
+        suggestions = []
+        for score, name, query_norm in candidates[:limit]:
+            entry = self._entries.get((name, query_norm))
+            suggestions.append(
+                {
+                    "query": entry[1] if entry else query_norm,
+                    "search_type": name,
+                    "score": round(score * decay, 3),
+                }
+            )
+        return suggestions
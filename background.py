@@ -0,0 +1,95 @@
+# Base class of the in-memory services kept up to date by a background thread
+from abc import ABC, abstractmethod
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher(ABC):
+    """
+    Runs refresh() on a daemon thread at start and then every `interval`
+    seconds. Subclasses implement refresh() and the interval property, set
+    thread_name and may override enabled.
+
+    Each started thread gets its own stop event, so stop() followed by start()
+    starts a new thread even while the old one is still finishing a refresh.
+    """
+
+    thread_name = "background-refresh"
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        """
+        Whether start() runs the thread (e.g. the feature is switched on).
+        """
+        return True
+
+    @property
+    @abstractmethod
+    def interval(self):
+        """
+        Seconds to wait after a refresh before the next one.
+        """
+
+    @abstractmethod
+    def refresh(self):
+        """
+        Reload the state kept in memory.
+        """
+
+    def start(self):
+        """
+        Start the background refresh thread if it is not running yet.
+        """
+        if not self.enabled:
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive() and not self._stop.is_set():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop,), name=self.thread_name, daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the refresh thread (it exits after the refresh in progress, if any).
+        """
+        with self._thread_lock:
+            self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """
+        Run the next refresh now instead of after the interval.
+        """
+        self._wake.set()
+
+    def wait_ready(self, timeout=None):
+        """
+        Wait until the first refresh has finished.
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds.
+        Returns:
+            bool: True if a refresh has finished.
+        """
+        return self._ready.wait(timeout)
+
+    def _run(self, stop):
+        while not stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error in {self.thread_name}: {e}")
+            self._ready.set()
+            self._wake.wait(self.interval)
+            self._wake.clear()
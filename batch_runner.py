@@ -0,0 +1,169 @@
+# Non-interactive batch execution of search specs from a JSONL file
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+import json
+import logging
+import time
+
+from mongo_controler import log_search_query
+from instrumentation import search_type_context
+from mysql_controler import (
+    SEARCH_TYPES,
+    disable_fulltext_on_missing_index,
+    find_page_from_mysql,
+    search_spec,
+)
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def read_specs(path):
+    """
+    Read search specs from a JSON lines file.
+    Each line: {"id": ..., "type": "title|genre_year|actor", "params": {...},
+    "page_size": 10, "pages": 1}; "pages" may be "all".
+
+    Args:
+        path (str): Input file path.
+
+    Yields:
+        tuple: (line number, spec dict or None, error message or None)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if spec.get("type") not in SEARCH_TYPES:
+                yield line_number, spec, f"Unknown search type: {spec.get('type')}"
+                continue
+            yield line_number, spec, None
+
+
+def run_spec(spec, include_rows=True, log_queries=False):
+    """
+    Run one search spec page by page and time it.
+    Pages are fetched with find_page_from_mysql directly: the controllers turn
+    database errors into empty pages, here they fail the spec and are counted.
+
+    Args:
+        spec (dict): Search spec (see read_specs).
+        include_rows (bool): Put the result rows into the output record.
+        log_queries (bool): Record the search in the search log.
+
+    Returns:
+        dict: Output record with total, rows, per-page and overall timings.
+    Raises:
+        Exception: Any database error of the search.
+    """
+    search_type = spec["type"]
+    params = spec.get("params", {})
+    page_size = int(spec.get("page_size", 10))
+    max_pages = spec.get("pages", 1)
+    fetch_page = search_type_context(search_type)(find_page_from_mysql)
+    query = search_spec(search_type, params)
+    rows = []
+    page_timings = []
+    cursor = total = None
+    headers = []
+    started = time.perf_counter()
+    while True:
+        page_started = time.perf_counter()
+        try:
+            page = fetch_page(**query, limit=page_size, cursor=cursor, total=total)
+        except Exception as e:
+            if not disable_fulltext_on_missing_index(e):
+                raise
+            # Title search without the FULLTEXT index: start over in substring mode
+            query = search_spec(search_type, params)
+            rows, page_timings, cursor, total = [], [], None, None
+            continue
+        page_timings.append(round((time.perf_counter() - page_started) * 1000, 3))
+        total = page.total
+        headers = page.headers or headers
+        if include_rows:
+            rows.extend(page.rows.tuples())
+        cursor = page.next_cursor
+        if cursor is None or (max_pages != "all" and len(page_timings) >= int(max_pages)):
+            break
+    elapsed = (time.perf_counter() - started) * 1000
+    if log_queries:
+        query = params.get("keyword") or params.get("actor") or json.dumps(params)
+        log_search_query(query, search_type, total)
+    record = {
+        "id": spec.get("id"),
+        "type": search_type,
+        "params": params,
+        "total": total,
+        "pages": len(page_timings),
+        "elapsed_ms": round(elapsed, 3),
+        "page_timings_ms": page_timings,
+    }
+    if include_rows:
+        record["headers"] = headers
+        # Rows are kept as tuples while paging and written as dicts
+        record["rows"] = [dict(zip(headers, row)) for row in rows]
+    return record
+
+
+def run_batch(input_path, output_path, workers=None, include_rows=True, log_queries=False):
+    """
+    Run all specs of a JSONL file on a worker pool and write one JSON line per spec.
+    At most workers * 4 specs are in flight, so large inputs are streamed.
+
+    Args:
+        input_path (str): JSONL file with search specs.
+        output_path (str): JSONL file for results and timings (completion order).
+        workers (int, optional): Number of worker threads; defaults to settings.BATCH_WORKERS.
+        include_rows (bool): Put the result rows into the output.
+        log_queries (bool): Record the searches in the search log.
+
+    Returns:
+        dict: Summary with number of specs, errors and wall time.
+    """
+    workers = workers or settings.BATCH_WORKERS
+    max_in_flight = workers * 4
+    summary = {"specs": 0, "errors": 0}
+    started = time.perf_counter()
+
+    def write(output, record):
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def collect(output, futures, return_when):
+        done, _ = wait(futures, return_when=return_when)
+        for future in done:
+            line_number, spec = futures.pop(future)
+            try:
+                record = future.result()
+            except Exception as e:
+                logger.error(f"Batch spec on line {line_number} failed: {e}")
+                summary["errors"] += 1
+                record = {"id": spec.get("id"), "type": spec.get("type"), "error": str(e)}
+            record["line"] = line_number
+            write(output, record)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor, open(
+        output_path, "w", encoding="utf-8"
+    ) as output:
+        futures = {}
+        for line_number, spec, error in read_specs(input_path):
+            summary["specs"] += 1
+            if error:
+                summary["errors"] += 1
+                write(output, {"line": line_number, "error": error})
+                continue
+            future = executor.submit(run_spec, spec, include_rows, log_queries)
+            futures[future] = (line_number, spec)
+            if len(futures) >= max_in_flight:
+                collect(output, futures, FIRST_COMPLETED)
+        if futures:
+            collect(output, futures, ALL_COMPLETED)
+
+    summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Batch finished: {summary}")
+    return summary
@@ -0,0 +1 @@
+# Benchmark suite: synthetic catalogue generator and controller timings
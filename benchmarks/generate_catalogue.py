@@ -0,0 +1,350 @@
+# Generate a Sakila-shaped synthetic film catalogue and search log for benchmarks.
+# Usage: python -m benchmarks.generate_catalogue --scale 100k --database film_bench
+import argparse
+from datetime import datetime, timedelta, timezone
+import logging
+import random
+import time
+
+from mysql_controler import TITLE_FULLTEXT_INDEX
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+
+CATEGORIES = [
+    "Action", "Animation", "Children", "Classics", "Comedy", "Documentary",
+    "Drama", "Family", "Foreign", "Games", "Horror", "Music", "New",
+    "Sci-Fi", "Sports", "Travel",
+]
+TITLE_WORDS = [
+    "ACADEMY", "DINOSAUR", "ACE", "GOLDFINGER", "ADAPTATION", "HOLES", "AFFAIR",
+    "PREJUDICE", "AFRICAN", "EGG", "AGENT", "TRUMAN", "AIRPLANE", "SIERRA",
+    "AIRPORT", "POLLOCK", "ALABAMA", "DEVIL", "ALADDIN", "CALENDAR", "ALAMO",
+    "VIDEOTAPE", "ALASKA", "PHANTOM", "ALI", "FOREVER", "ALICE", "FANTASIA",
+    "ALIEN", "CENTER", "ALLEY", "EVOLUTION", "ALONE", "TRIP", "ALTER", "VICTORY",
+    "AMADEUS", "HOLY", "AMELIE", "HELLFIGHTERS", "AMERICAN", "CIRCUS", "AMISTAD",
+    "MIDSUMMER", "ANACONDA", "CONFESSIONS", "ANALYZE", "HOOSIERS", "ANGELS", "LIFE",
+    "ANNIE", "IDENTITY", "ANONYMOUS", "HUMAN", "ANTHEM", "LUKE", "ANTITRUST",
+    "TOMATOES", "ANYTHING", "SAVANNAH", "APACHE", "DIVINE", "APOCALYPSE", "FLAMINGOS",
+]
+DESCRIPTION_ADJECTIVES = [
+    "Epic", "Astounding", "Fateful", "Taut", "Thoughtful", "Brilliant", "Insightful",
+    "Emotional", "Action-Packed", "Boring", "Unbelieveable", "Intrepid", "Lacklusture",
+]
+DESCRIPTION_NOUNS = [
+    "Drama", "Documentary", "Story", "Saga", "Tale", "Yarn", "Reflection",
+    "Panorama", "Character Study", "Display", "Epistle", "Drama",
+]
+DESCRIPTION_SUBJECTS = [
+    "Feminist", "Mad Scientist", "Astronaut", "Monkey", "Student", "Cat", "Dog",
+    "Dentist", "Boy", "Girl", "Woman", "Man", "Robot", "Squirrel", "Pastry Chef",
+]
+DESCRIPTION_PLACES = [
+    "The Canadian Rockies", "A Shark Tank", "Ancient Japan", "The Gulf of Mexico",
+    "Soviet Georgia", "A Baloon", "A MySQL Convention", "Nigeria", "The Outback",
+]
+FIRST_NAMES = [
+    "PENELOPE", "NICK", "ED", "JENNIFER", "JOHNNY", "BETTE", "GRACE", "MATTHEW",
+    "JOE", "CHRISTIAN", "ZERO", "KARL", "UMA", "VIVIEN", "CUBA", "FRED", "HELEN",
+    "DAN", "BOB", "LUCILLE", "KIRSTEN", "ELVIS", "SANDRA", "CAMERON", "KEVIN",
+]
+LAST_NAMES = [
+    "GUINESS", "WAHLBERG", "CHASE", "DAVIS", "LOLLOBRIGIDA", "NICHOLSON", "MOSTEL",
+    "JOHANSSON", "SWANK", "GABLE", "CAGE", "BERRY", "WOOD", "BERGEN", "OLIVIER",
+    "COSTNER", "VOIGHT", "TORN", "FAWCETT", "TRACY", "PALTROW", "MARX", "KILMER",
+    "STREEP", "BLOOM", "CRAWFORD", "HOPKINS", "DEGENERES", "HOFFMAN", "TANDY",
+]
+
+SCHEMA = [
+    """
+    CREATE TABLE category (
+        category_id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        name VARCHAR(25) NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (category_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE film (
+        film_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+        title VARCHAR(128) NOT NULL,
+        description TEXT,
+        release_year YEAR DEFAULT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (film_id),
+        KEY idx_title (title)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE film_text (
+        film_id INT UNSIGNED NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        PRIMARY KEY (film_id),
+        FULLTEXT KEY idx_title_description (title, description),
+        FULLTEXT KEY %s (title)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """
+    % TITLE_FULLTEXT_INDEX,
+    """
+    CREATE TABLE film_category (
+        film_id INT UNSIGNED NOT NULL,
+        category_id TINYINT UNSIGNED NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (film_id, category_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE actor (
+        actor_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+        first_name VARCHAR(45) NOT NULL,
+        last_name VARCHAR(45) NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (actor_id),
+        KEY idx_actor_last_name (last_name)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE film_actor (
+        actor_id INT UNSIGNED NOT NULL,
+        film_id INT UNSIGNED NOT NULL,
+        last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (actor_id, film_id),
+        KEY idx_fk_film_id (film_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+TABLES = ["film_actor", "film_category", "film_text", "film", "actor", "category"]
+
+
+def parse_scale(value):
+    """
+    Parse a scale name (1k, 100k, 10m) or a plain number of films.
+    """
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+
+def random_title(rng):
+    return f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)}"
+
+
+def random_description(rng):
+    return (
+        f"A {rng.choice(DESCRIPTION_ADJECTIVES)} {rng.choice(DESCRIPTION_NOUNS)} of a "
+        f"{rng.choice(DESCRIPTION_SUBJECTS)} And a {rng.choice(DESCRIPTION_SUBJECTS)} "
+        f"who must Meet a {rng.choice(DESCRIPTION_SUBJECTS)} in {rng.choice(DESCRIPTION_PLACES)}"
+    )
+
+
+def _insert_batches(connection, sql, rows, batch_size):
+    """
+    Insert rows from an iterator with multi-row INSERTs of batch_size rows.
+    """
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            cursor.executemany(sql, batch)
+    connection.commit()
+
+
+def generate_mysql(connection, films, seed=42, batch_size=5000, actors_per_film=5):
+    """
+    Create the catalogue tables and fill them with synthetic data.
+
+    Args:
+        connection (Connection): Connection to the benchmark database.
+        films (int): Number of films.
+        seed (int): Random seed (the same seed gives the same catalogue).
+        batch_size (int): Rows per multi-row INSERT.
+        actors_per_film (int): Actors linked to each film.
+
+    Returns:
+        dict: Row counts per table.
+    """
+    rng = random.Random(seed)
+    actors = max(200, films // 50)
+    with connection.cursor() as cursor:
+        cursor.execute("SET foreign_key_checks = 0")
+        cursor.execute("SET unique_checks = 0")
+        for table in TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        for ddl in SCHEMA:
+            cursor.execute(ddl)
+
+    _insert_batches(
+        connection,
+        "INSERT INTO category (category_id, name) VALUES (%s, %s)",
+        enumerate(CATEGORIES, 1),
+        batch_size,
+    )
+    _insert_batches(
+        connection,
+        "INSERT INTO actor (actor_id, first_name, last_name) VALUES (%s, %s, %s)",
+        (
+            (actor_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+            for actor_id in range(1, actors + 1)
+        ),
+        batch_size,
+    )
+    def film_generator():
+        # Replayed from the same seed for film and film_text: films are never held in memory
+        film_rng = random.Random(seed + 1)
+        for film_id in range(1, films + 1):
+            title = random_title(film_rng)
+            description = random_description(film_rng)
+            yield film_id, title, description, film_rng.randint(1990, 2024)
+
+    _insert_batches(
+        connection,
+        "INSERT INTO film (film_id, title, description, release_year) VALUES (%s, %s, %s, %s)",
+        film_generator(),
+        batch_size,
+    )
+    _insert_batches(
+        connection,
+        "INSERT INTO film_text (film_id, title, description) VALUES (%s, %s, %s)",
+        (row[:3] for row in film_generator()),
+        batch_size,
+    )
+    _insert_batches(
+        connection,
+        "INSERT INTO film_category (film_id, category_id) VALUES (%s, %s)",
+        ((film_id, rng.randint(1, len(CATEGORIES))) for film_id in range(1, films + 1)),
+        batch_size,
+    )
+
+    def film_actor_generator():
+        for film_id in range(1, films + 1):
+            for actor_id in rng.sample(range(1, actors + 1), min(actors_per_film, actors)):
+                yield actor_id, film_id
+
+    _insert_batches(
+        connection,
+        "INSERT INTO film_actor (actor_id, film_id) VALUES (%s, %s)",
+        film_actor_generator(),
+        batch_size,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("SET unique_checks = 1")
+        cursor.execute("SET foreign_key_checks = 1")
+    return {
+        "category": len(CATEGORIES),
+        "actor": actors,
+        "film": films,
+        "film_text": films,
+        "film_category": films,
+        "film_actor": films * min(actors_per_film, actors),
+    }
+
+
+def generate_search_log(mongo_db, log_collection, events, seed=42, batch_size=5000, days=30):
+    """
+    Fill a MongoDB collection with synthetic search log events.
+    Query popularity follows a Zipf-like distribution, timestamps span the last `days` days.
+
+    Args:
+        mongo_db (Database): Benchmark MongoDB database.
+        log_collection (str): Raw search log collection name.
+        events (int): Number of log events.
+        seed (int): Random seed.
+        batch_size (int): Documents per insert_many.
+        days (int): Time span of the generated events.
+
+    Returns:
+        int: Number of inserted events.
+    """
+    rng = random.Random(seed + 2)
+    vocabulary = (
+        [("title", word.lower()) for word in TITLE_WORDS]
+        + [("actor", name.lower()) for name in LAST_NAMES]
+        + [("genre_year", f"{genre} 2000-2010") for genre in CATEGORIES]
+    )
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    collection = mongo_db[log_collection]
+    collection.drop()
+    now = datetime.now(timezone.utc)
+    span = timedelta(days=days).total_seconds()
+    inserted = 0
+    while inserted < events:
+        size = min(batch_size, events - inserted)
+        picks = rng.choices(vocabulary, weights=weights, k=size)
+        collection.insert_many(
+            [
+                {
+                    "query": query,
+                    "search_type": search_type,
+                    "timestamp": now - timedelta(seconds=rng.random() * span),
+                    "results_count": rng.choice([0, 1, 5, 10, 25, 100]),
+                }
+                for search_type, query in picks
+            ],
+            ordered=False,
+        )
+        inserted += size
+    return inserted
+
+
+def use_benchmark_databases(mysql_database, mongo_database):
+    """
+    Point the application settings at the benchmark databases.
+    Must be called before the first connection is opened.
+    """
+    settings.__class__.MYSQL_DB_NAME = mysql_database
+    settings.__class__.MONGO_DB_NAME = mongo_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic film catalogue")
+    parser.add_argument("--scale", default="1k", help="1k, 100k, 10m or a number of films")
+    parser.add_argument("--database", default="film_bench", help="MySQL benchmark database (dropped tables!)")
+    parser.add_argument("--mongo-database", default="film_logs_bench", help="MongoDB benchmark database")
+    parser.add_argument("--log-events", type=int, help="Search log events (default: number of films)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--skip-mongo", action="store_true", help="Do not generate the search log")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    films = parse_scale(args.scale)
+    use_benchmark_databases(args.database, args.mongo_database)
+    config = settings.get_mysql_config()
+    config.pop("database")
+    config["autocommit"] = False
+    import pymysql
+
+    connection = pymysql.connect(**config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+        connection.select_db(args.database)
+        started = time.perf_counter()
+        counts = generate_mysql(connection, films, args.seed, args.batch_size)
+        logger.info(f"MySQL catalogue generated in {time.perf_counter() - started:.1f} s: {counts}")
+    finally:
+        connection.close()
+
+    if not args.skip_mongo:
+        from db_connector import collection_name, initialize_mongo
+        from query_stats import rebuild_query_stats
+
+        mongo_db = initialize_mongo()
+        started = time.perf_counter()
+        events = generate_search_log(
+            mongo_db, collection_name, args.log_events or films, args.seed, args.batch_size
+        )
+        rebuild_query_stats(mongo_db)
+        logger.info(f"Search log generated in {time.perf_counter() - started:.1f} s: {events} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Track the startup cost of the CLI entry points: wall time of a fresh interpreter
+# importing them and the modules they load (python -X importtime).
+# Usage: python -m benchmarks.import_time --out import_time.json
+#        python -m benchmarks.import_time --baseline previous.json
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.run_benchmarks import compare, git_revision
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+# Modules that must not be loaded before the menu is shown
+DEFERRED_MODULES = ["pymysql", "pymongo", "dotenv", "aiohttp", "numpy", "settings", "db_connector"]
+
+# name -> code run in a fresh interpreter
+CASES = {
+    "import main": "import main",
+    "show menu": "import ui; ui.show_menu()",
+    "parse cli": "import main; main.build_parser().parse_args(['export', 'title', '-o', 'x.csv'])",
+}
+
+_REPORT_MODULES = (
+    "import sys, json; "
+    f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+)
+
+
+def run_python(code, importtime=False):
+    """
+    Run code in a fresh interpreter from the project directory.
+
+    Returns:
+        CompletedProcess: Finished process with captured output.
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(
+        command, cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def wall_time(code, repeat):
+    """
+    Measure the wall time of running code in a fresh interpreter.
+
+    Returns:
+        list: Samples in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_python(code)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def parse_importtime(stderr, top):
+    """
+    Parse the -X importtime report.
+
+    Args:
+        stderr (str): Interpreter stderr with 'import time:' lines.
+        top (int): Number of modules to keep.
+
+    Returns:
+        list: (module, cumulative microseconds) sorted by cumulative time.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(cumulative)))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return modules[:top]
+
+
+def measure_case(code, repeat, interpreter_ms, top):
+    """
+    Measure one startup case.
+
+    Returns:
+        dict: Net median/min wall time (interpreter startup subtracted), the
+            deferred modules that got loaded and the slowest imports.
+    """
+    samples = sorted(sample - interpreter_ms for sample in wall_time(code, repeat))
+    report = run_python(f"{code}\n{_REPORT_MODULES}", importtime=True)
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "loaded_deferred_modules": json.loads(report.stdout.strip().splitlines()[-1]),
+        "top_imports_us": parse_importtime(report.stderr, top),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CLI startup imports")
+    parser.add_argument("--repeat", type=int, default=10, help="Interpreter runs per case")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to record")
+    parser.add_argument("--out", default="import_time.json", help="Output JSON file")
+    parser.add_argument("--baseline", help="Previous results file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    interpreter_ms = statistics.median(wall_time("pass", args.repeat))
+    results = {}
+    for name, code in CASES.items():
+        results[name] = measure_case(code, args.repeat, interpreter_ms, args.top)
+        logger.info(
+            f"{name}: {results[name]['median_ms']} ms, "
+            f"deferred modules loaded: {results[name]['loaded_deferred_modules']}"
+        )
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "interpreter_ms": round(interpreter_ms, 3),
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Results written to {args.out}")
+
+    failed = False
+    if results["show menu"]["loaded_deferred_modules"]:
+        print(
+            f"Menu loads deferred modules: {results['show menu']['loaded_deferred_modules']}",
+            file=sys.stderr,
+        )
+        failed = True
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        for name, previous, current in compare(results, baseline, args.threshold):
+            print(f"REGRESSION {name}: {previous} ms -> {current} ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# Time the controller functions against a benchmark database and record the results.
+# Usage: python -m benchmarks.run_benchmarks --database film_bench --out bench.json
+#        python -m benchmarks.run_benchmarks --baseline previous.json
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.generate_catalogue import CATEGORIES, LAST_NAMES, TITLE_WORDS, use_benchmark_databases
+
+logger = logging.getLogger(__name__)
+
+
+def time_call(func, repeat, warmup=1):
+    """
+    Time a function call.
+
+    Args:
+        func (callable): Function without arguments.
+        repeat (int): Number of timed calls.
+        warmup (int): Untimed calls before measuring.
+
+    Returns:
+        dict: min/median/mean/p95/max latency in milliseconds.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def deep_cursor(fetch_page, pages):
+    """
+    Follow the cursor chain to get the cursor of a deep page.
+
+    Args:
+        fetch_page (callable): Function taking (cursor, total) and returning a SearchPage.
+        pages (int): Number of pages to skip.
+
+    Returns:
+        tuple: (cursor, total) of the deep page, or (None, None) if the result is shorter.
+    """
+    cursor = total = None
+    for _ in range(pages):
+        page = fetch_page(cursor, total)
+        if page.next_cursor is None:
+            return None, None
+        cursor, total = page.next_cursor, page.total
+    return cursor, total
+
+
+def benchmark_cases(deep_pages):
+    """
+    Build the benchmark cases: name -> function without arguments.
+    """
+    import mongo_controler
+    import mysql_controler as mc
+
+    title = TITLE_WORDS[0].lower()
+    actor = LAST_NAMES[0].lower()
+    genre_filter = {"genre": CATEGORIES[0], "year_from": 2000, "year_to": 2010}
+
+    def title_page(cursor, total, mode=None):
+        return mc.find_films_by_keyword(title, 10, cursor, mode, total)
+
+    def criteria_page(cursor, total):
+        return mc.find_films_by_criteria(genre_filter, 10, cursor, total)
+
+    def actor_page(cursor, total):
+        return mc.find_films_by_actor_with_genre(actor, 10, cursor, total)
+
+    cases = {
+        "find_films_by_keyword[fulltext]": lambda: title_page(None, None, "fulltext"),
+        "find_films_by_keyword[substring]": lambda: title_page(None, None, "substring"),
+        "count_films_by_keyword": lambda: mc.count_films_by_keyword(title),
+        "find_films_by_criteria": lambda: criteria_page(None, None),
+        "count_films_by_genre": lambda: mc.count_films_by_genre(genre_filter),
+        "find_films_by_actor_with_genre": lambda: actor_page(None, None),
+        "count_films_by_actor": lambda: mc.count_films_by_actor(actor),
+        "get_popular_queries": lambda: mongo_controler.get_popular_queries(5),
+        "get_last_queries": lambda: mongo_controler.get_last_queries(10),
+    }
+    # Deep pages: keyset pagination should cost about the same as the first page
+    for name, fetch_page in [
+        ("find_films_by_keyword", title_page),
+        ("find_films_by_criteria", criteria_page),
+        ("find_films_by_actor_with_genre", actor_page),
+    ]:
+        cursor, total = deep_cursor(fetch_page, deep_pages)
+        if cursor is not None:
+            cases[f"{name}[page {deep_pages + 1}]"] = (
+                lambda fetch_page=fetch_page, cursor=cursor, total=total: fetch_page(
+                    cursor, total
+                )
+            )
+    return cases
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare median latencies with a baseline run.
+
+    Args:
+        results (dict): Current results per case.
+        baseline (dict): Baseline results per case.
+        threshold (float): Allowed slowdown ratio (0.2 = 20 %).
+
+    Returns:
+        list: Regressions as (case, baseline median, current median).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["median_ms"] > previous["median_ms"] * (1 + threshold):
+            regressions.append((name, previous["median_ms"], current["median_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the search controller functions")
+    parser.add_argument("--database", default="film_bench", help="MySQL benchmark database")
+    parser.add_argument("--mongo-database", default="film_logs_bench", help="MongoDB benchmark database")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per case")
+    parser.add_argument("--deep-pages", type=int, default=50, help="Page depth for the deep-page cases")
+    parser.add_argument("--out", default="bench_results.json", help="Output JSON file")
+    parser.add_argument("--baseline", help="Previous results file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    use_benchmark_databases(args.database, args.mongo_database)
+    from db_connector import close_all_connections, mongo_health
+    from instrumentation import instrumentation
+    from mysql_controler import search_cache
+
+    # Measure the database paths, not the result cache
+    search_cache.enabled = False
+    mongo_health.start()
+    mongo_health.wait_ready(10)
+    try:
+        cases = benchmark_cases(args.deep_pages)
+        results = {}
+        for name, func in cases.items():
+            results[name] = time_call(func, args.repeat)
+            logger.info(f"{name}: {results[name]}")
+    finally:
+        close_all_connections()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": args.database,
+        "results": results,
+        # Per-statement latency seen by the access layer during the run
+        "query_metrics": instrumentation.percentiles("statement"),
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous} ms -> {current} ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,127 @@
-import pymysql
-from pymongo import MongoClient
+# Database drivers (pymysql, pymongo) are imported on first connection
+from background import BackgroundRefresher
 from settings import settings
+from collections import deque
+from contextlib import contextmanager
 from functools import lru_cache
 import logging
 import re
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 collection_name = settings.MONGO_COLLECTION
 
+
+class MongoHealth(BackgroundRefresher):
+    """
+    Shared MongoDB availability state (circuit breaker).
+    A background thread pings MongoDB every MONGO_HEALTH_TTL seconds while it is up
+    and retries with exponential backoff while it is down. Callers only read the
+    cached state, so checking availability never touches the network; only the
+    first check waits (up to the MongoDB timeout) for the first probe, so one-shot
+    callers do not mistake "not probed yet" for "down".
+    """
+
+    thread_name = "mongo-health"
+
+    def __init__(self):
+        super().__init__()
+        self._available = None  # None until the first probe finishes
+        self._waited = False
+        self._checked_at = None
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        if self._available:
+            return settings.MONGO_HEALTH_TTL
+        delay = settings.MONGO_BACKOFF_INITIAL * 2 ** max(self._failures - 1, 0)
+        return min(delay, settings.MONGO_BACKOFF_MAX)
+
+    def is_available(self):
+        """
+        Return the cached MongoDB availability.
+        The first call starts the probe thread if needed and waits for the first
+        probe (at most MONGO_TIMEOUT_MS plus a second); later calls do not block.
+        """
+        if self._thread is None:
+            self.start()
+        if self._available is None and not self._waited:
+            self._ready.wait(settings.MONGO_TIMEOUT_MS / 1000 + 1)
+            self._waited = True
+        return bool(self._available)
+
+    def record_success(self):
+        """
+        Mark MongoDB as available after a successful operation.
+        """
+        self._set_state(True)
+
+    def record_failure(self, error=None):
+        """
+        Open the breaker after a failed operation and re-probe in the background.
+        Args:
+            error (Exception, optional): Error that caused the failure.
+        """
+        if self._set_state(False, error):
+            self.wake()
+
+    def _set_state(self, available, error=None):
+        """
+        Update the cached state.
+        Returns:
+            bool: True if availability changed.
+        """
+        with self._lock:
+            changed = self._available != available
+            self._available = available
+            self._failures = 0 if available else self._failures + 1
+            self._checked_at = time.monotonic()
+        if available and changed:
+            logger.info("MongoDB is available")
+        elif not available and (changed or self._failures == 1):
+            logger.error(f"⚠ MongoDB unavailable: {error}")
+        return changed
+
+    def status(self):
+        """
+        Get the current breaker state.
+        Returns:
+            dict: available flag (None before the first probe), consecutive failures
+                and seconds since the last check.
+        """
+        checked_at = self._checked_at
+        return {
+            "available": self._available,
+            "failures": self._failures,
+            "age": None if checked_at is None else time.monotonic() - checked_at,
+        }
+
+    def refresh(self):
+        """
+        Ping MongoDB and update the cached state.
+        """
+        try:
+            get_mongo_client().admin.command("ping")
+        except Exception as e:
+            self._set_state(False, e)
+            return
+        self._set_state(True)
+
+
+mongo_health = MongoHealth()
+
+
 def check_mongo_availability():
     """
     Check if MongoDB is available and working.
-    Returns True if the connection is successful, otherwise False.
-    Caches the result for faster repeated checks.
-    Prints a warning and enables file logging if MongoDB is unavailable.
+    Returns the state cached by the background health monitor (no network call).
+    Returns:
+        bool: True if MongoDB is available, otherwise False.
     """
-    try:
-        mongo_config = settings.get_mongo_config()
-        client = MongoClient(mongo_config["uri"], serverSelectionTimeoutMS=3000)
-        client.admin.command("ping")  # Test connection
-        logger.info("MongoDB is available")
-        return True
-    except Exception as e:
-        logger.error(f"⚠ MongoDB unavailable: {e}")
-        return False
+    return mongo_health.is_available()
 
 
 @lru_cache(maxsize=1)
@@ -32,51 +130,226 @@ def get_mongo_client():
     # находим между ":" и "@" и заменяем на "***@"
     safe_uri = re.sub(r":[^:@]+@", ":***@", connection_string)  
     logger.info(f"Connecting to MongoDB at {safe_uri}")
-    return MongoClient(connection_string)
+    from pymongo import MongoClient
+
+    return MongoClient(
+        connection_string, serverSelectionTimeoutMS=settings.MONGO_TIMEOUT_MS
+    )
 
 
 def initialize_mongo():
     """
-    Initialize a MongoDB connection for logs and statistics with caching.
-    Returns a MongoDB database object.
-    Reuses the connection if it is already open and alive.
+    Get the MongoDB database for logs and statistics.
+    Reuses the shared client; liveness is tracked by mongo_health instead of
+    a ping before every operation.
+    Returns:
+        Database: MongoDB database object.
     """
     client = get_mongo_client()
-    db = client[settings.MONGO_DB_NAME]
-    try:
-        client.admin.command("ping")
-        logger.info("MongoDB connection successful")
-        return db
-    except Exception:
-        logger.warning("MongoDB connection failed, reinitializing...")
-        get_mongo_client.cache_clear()
-        client = get_mongo_client()
-        db = client[settings.MONGO_DB_NAME]
-        return db
+    return client[settings.MONGO_DB_NAME]
 
 
-@lru_cache(maxsize=1)
-def get_mysql_connection():
+class MySQLConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+    Keeps between min_size and max_size connections; idle connections are only
+    pinged when they have not been used for more than idle_check seconds.
+    """
+
+    def __init__(self, config, min_size=1, max_size=10, idle_check=30.0, timeout=10.0):
+        self._config = config
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_check = idle_check
+        self.timeout = timeout
+        self._idle = deque()  # (connection, last used time)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _connect(self):
+        import pymysql
+
+        return pymysql.connect(**self._config)
+
+    def fill(self):
+        """
+        Open connections up to min_size.
+        """
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            self.checkin(conn)
+
+    def checkout(self, timeout=None):
+        """
+        Take a connection from the pool, opening a new one if the pool is not full.
+        Args:
+            timeout (float, optional): Maximum wait for a free connection in seconds.
+        Returns:
+            Connection: PyMySQL connection.
+        Raises:
+            TimeoutError: If no connection became free in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("MySQL connection pool is closed")
+                if self._idle:
+                    # LIFO: reuse the most recently used (warm) connection
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No free MySQL connection after {timeout} s "
+                        f"(pool size {self.max_size})"
+                    )
+                self._cond.wait(remaining)
+        try:
+            if conn is None:
+                return self._connect()
+            if time.monotonic() - last_used > self.idle_check:
+                conn.ping(reconnect=True)
+            return conn
+        except Exception:
+            self._discard(conn)
+            raise
+
+    def checkin(self, conn, discard=False):
+        """
+        Return a connection to the pool.
+        Args:
+            conn (Connection): Connection taken with checkout.
+            discard (bool): Close the connection instead of reusing it.
+        """
+        if discard or self._closed or not conn.open:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager: check out a connection and return it to the pool afterwards.
+        Connections broken by an error are dropped from the pool.
+        """
+        conn = self.checkout(timeout)
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            import pymysql
+
+            broken = isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+            raise
+        finally:
+            self.checkin(conn, discard=broken)
+
+    def close(self):
+        """
+        Close all idle connections and reject further checkouts.
+        Connections in use are closed when they are checked in.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def status(self):
+        """
+        Get pool usage counters.
+        Returns:
+            dict: total, idle and in-use connection counts.
+        """
+        with self._cond:
+            idle = len(self._idle)
+            return {"size": self._size, "idle": idle, "in_use": self._size - idle}
+
+
+def open_mysql_connection(**overrides):
+    """
+    Open a dedicated (not pooled) MySQL connection, e.g. for long streaming reads
+    that would otherwise hold a pooled connection.
+    Args:
+        **overrides: Connection parameters replacing the settings values.
+    Returns:
+        Connection: PyMySQL connection.
+    """
     config = settings.get_mysql_config()
+    config.update(overrides)
+    import pymysql
+
     return pymysql.connect(**config)
 
 
-def initialize_mysql():
+@lru_cache(maxsize=1)
+def get_mysql_pool():
     """
-    Initialize a MySQL connection for films data with caching.
-    Returns a MySQL connection object.
-    Reuses the connection if it is already open and alive.
+    Get the shared MySQL connection pool, creating it on first use.
+    Pool sizing comes from settings (MYSQL_POOL_*).
     """
-    conn = get_mysql_connection()
+    pool = MySQLConnectionPool(
+        settings.get_mysql_config(),
+        min_size=settings.MYSQL_POOL_MIN,
+        max_size=settings.MYSQL_POOL_MAX,
+        idle_check=settings.MYSQL_POOL_IDLE_CHECK,
+        timeout=settings.MYSQL_POOL_TIMEOUT,
+    )
     try:
-        conn.ping(reconnect=True)
+        pool.fill()
         logger.info("MySQL connection successful")
-        return conn
-    except Exception:
-        get_mysql_connection.cache_clear()
-        conn = get_mysql_connection()
-        logger.warning("Reinitialized MySQL connection")
-        return conn
+    except Exception as e:
+        logger.error(f"Failed to open MySQL connections: {e}")
+    return pool
+
+
+def mysql_connection(timeout=None):
+    """
+    Check out a pooled MySQL connection for films data.
+    Usage:
+        with mysql_connection() as conn:
+            ...
+    Args:
+        timeout (float, optional): Maximum wait for a free connection in seconds.
+    Returns:
+        context manager yielding a PyMySQL connection.
+    """
+    return get_mysql_pool().connection(timeout)
 
 
 def close_all_connections():
@@ -85,6 +358,7 @@ def close_all_connections():
     Use this for proper application shutdown.
     """
     # Close MongoDB connection
+    mongo_health.stop()
     try:
         client = get_mongo_client()
         client.close()
@@ -94,15 +368,14 @@ def close_all_connections():
         pass
     get_mongo_client.cache_clear()
 
-    # Close MySQL connection
+    # Close MySQL connections
     try:
-        conn = get_mysql_connection()
-        conn.close()
+        get_mysql_pool().close()
         logger.info("MySQL connection closed")
     except Exception:
         logger.error("Failed to close MySQL connection")
         pass
-    get_mysql_connection.cache_clear()
+    get_mysql_pool.cache_clear()
 
 
 # Alias for backward compatibility
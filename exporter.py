@@ -0,0 +1,110 @@
+# Streaming export of complete search results to CSV / JSON lines
+import csv
+import gzip
+import json
+import logging
+
+from db_connector import open_mysql_connection
+from instrumentation import current_search_type, instrumentation
+from mysql_controler import disable_fulltext_on_missing_index, build_search_query
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+def detect_export_format(path):
+    """
+    Detect the export format and compression from a file name.
+
+    Args:
+        path (str): Output file name, e.g. 'films.csv' or 'films.jsonl.gz'.
+
+    Returns:
+        tuple: (format, compressed flag)
+    """
+    name = str(path).lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+    return fmt, compressed
+
+
+def _open_output(path, compressed):
+    if compressed:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_search(search_type, params, path, fmt=None, compressed=None, chunk_size=None):
+    """
+    Stream the complete result of a search into a file.
+    Rows are read through an unbuffered server-side cursor (SSCursor) in chunks,
+    so memory use does not depend on the result size.
+
+    Args:
+        search_type (str): 'title', 'genre_year' or 'actor'.
+        params (dict): Search parameters (see mysql_controler.search_spec).
+        path (str): Output file path.
+        fmt (str, optional): 'csv' or 'jsonl'; detected from the file name if omitted.
+        compressed (bool, optional): gzip the output; detected from the file name if omitted.
+        chunk_size (int, optional): Rows fetched per round trip; defaults to settings.EXPORT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of exported rows.
+    """
+    detected_fmt, detected_compressed = detect_export_format(path)
+    fmt = fmt or detected_fmt
+    compressed = detected_compressed if compressed is None else compressed
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    token = current_search_type.set(search_type)
+    try:
+        return _stream_to_file(search_type, params, path, fmt, compressed, chunk_size)
+    except Exception as e:
+        if search_type == "title" and disable_fulltext_on_missing_index(e):
+            params = dict(params, mode="substring")
+            return _stream_to_file(search_type, params, path, fmt, compressed, chunk_size)
+        raise
+    finally:
+        current_search_type.reset(token)
+
+
+def _stream_to_file(search_type, params, path, fmt, compressed, chunk_size):
+    query, query_params = build_search_query(search_type, params)
+    count = 0
+    # A streaming cursor keeps its connection busy until the end: use a dedicated one
+    from pymysql.cursors import SSCursor
+
+    connection = open_mysql_connection(cursorclass=SSCursor)
+    try:
+        # The measured latency covers the whole export including writing the file
+        with instrumentation.measure("mysql", query) as probe, connection.cursor() as cursor:
+            with _open_output(path, compressed) as output:
+                cursor.execute(query, query_params)
+                headers = [desc[0] for desc in cursor.description]
+                if fmt == "csv":
+                    writer = csv.writer(output)
+                    writer.writerow(headers)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if fmt == "csv":
+                        writer.writerows(rows)
+                    else:
+                        output.writelines(
+                            json.dumps(dict(zip(headers, row)), ensure_ascii=False, default=str)
+                            + "\n"
+                            for row in rows
+                        )
+                    count += len(rows)
+            probe["rows"] = count
+    finally:
+        connection.close()
+    logger.info(f"Exported {count} rows of '{search_type}' search to {path}")
+    return count
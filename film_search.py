@@ -0,0 +1,227 @@
+# Denormalized film_search table: one row per film with genres and actors,
+# maintained incrementally from the last_update timestamps of the source tables
+import logging
+
+from background import BackgroundRefresher
+from db_connector import mysql_connection
+from mysql_controler import FILM_SEARCH_TABLE, invalidate_search_cache
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+STATE_TABLE = "film_search_state"
+
+# Multi-valued indexes on the JSON arrays serve MEMBER OF / JSON_OVERLAPS (MySQL 8.0.17+);
+# genres are stored lower-cased, as MEMBER OF compares JSON strings case-sensitively
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS `{name}` (
+        film_id INT UNSIGNED NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        release_year YEAR DEFAULT NULL,
+        genres JSON NOT NULL,
+        genre_names VARCHAR(255) NOT NULL DEFAULT '',
+        actor_ids JSON NOT NULL,
+        actor_names TEXT NOT NULL,
+        refreshed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+        PRIMARY KEY (film_id),
+        KEY idx_film_search_year (release_year, film_id),
+        KEY idx_film_search_genres ((CAST(genres AS CHAR(25) ARRAY))),
+        KEY idx_film_search_actor_ids ((CAST(actor_ids AS UNSIGNED ARRAY))),
+        FULLTEXT KEY ft_film_search_title (title)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+STATE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+        id TINYINT UNSIGNED NOT NULL,
+        refreshed_from TIMESTAMP(6) NOT NULL,
+        PRIMARY KEY (id)
+    ) ENGINE=InnoDB
+"""
+
+# One projected row per film; {where} restricts the films to refresh
+PROJECTION = """
+    SELECT
+        f.film_id,
+        COALESCE(ft.title, f.title) AS title,
+        COALESCE(ft.description, f.description) AS description,
+        f.release_year,
+        COALESCE(
+            (SELECT JSON_ARRAYAGG(LOWER(c.name))
+             FROM film_category fc JOIN category c ON fc.category_id = c.category_id
+             WHERE fc.film_id = f.film_id),
+            JSON_ARRAY()
+        ) AS genres,
+        COALESCE(
+            (SELECT GROUP_CONCAT(c.name ORDER BY c.name SEPARATOR ', ')
+             FROM film_category fc JOIN category c ON fc.category_id = c.category_id
+             WHERE fc.film_id = f.film_id),
+            ''
+        ) AS genre_names,
+        COALESCE(
+            (SELECT JSON_ARRAYAGG(fa.actor_id) FROM film_actor fa WHERE fa.film_id = f.film_id),
+            JSON_ARRAY()
+        ) AS actor_ids,
+        COALESCE(
+            (SELECT GROUP_CONCAT(
+                        CONCAT(a.first_name, ' ', a.last_name)
+                        ORDER BY a.last_name, a.first_name SEPARATOR ', ')
+             FROM film_actor fa JOIN actor a ON fa.actor_id = a.actor_id
+             WHERE fa.film_id = f.film_id),
+            ''
+        ) AS actor_names
+    FROM film f
+    LEFT JOIN film_text ft ON ft.film_id = f.film_id
+    {where}
+"""
+
+COLUMNS = "film_id, title, description, release_year, genres, genre_names, actor_ids, actor_names"
+
+# Films touched since the watermark, through any of the source tables
+CHANGED_FILMS = """
+    SELECT film_id FROM film WHERE last_update >= %(since)s
+    UNION SELECT film_id FROM film_category WHERE last_update >= %(since)s
+    UNION SELECT film_id FROM film_actor WHERE last_update >= %(since)s
+    UNION SELECT fc.film_id FROM film_category fc
+        JOIN category c ON fc.category_id = c.category_id WHERE c.last_update >= %(since)s
+    UNION SELECT fa.film_id FROM film_actor fa
+        JOIN actor a ON fa.actor_id = a.actor_id WHERE a.last_update >= %(since)s
+"""
+
+
+# Start of a refresh as the next watermark: last_update columns are whole-second
+# TIMESTAMPs, so a row committed later in the same second is stored with a time
+# below NOW(6); the watermark is truncated to seconds and taken one second back
+# (rows in that second are re-projected once more, which is harmless)
+WATERMARK_NOW = "SELECT NOW() - INTERVAL 1 SECOND"
+
+
+def _prepare_session(cursor):
+    # Actor lists of a film easily exceed the default 1024 bytes
+    cursor.execute("SET SESSION group_concat_max_len = 1048576")
+
+
+def _get_watermark(cursor):
+    cursor.execute(f"SELECT refreshed_from FROM {STATE_TABLE} WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _set_watermark(cursor, value):
+    cursor.execute(
+        f"""
+        INSERT INTO {STATE_TABLE} (id, refreshed_from) VALUES (1, %s)
+        ON DUPLICATE KEY UPDATE refreshed_from = VALUES(refreshed_from)
+        """,
+        (value,),
+    )
+
+
+def rebuild_film_search():
+    """
+    Rebuild the film_search table from scratch.
+    The new table is filled under a temporary name and swapped in with an atomic
+    RENAME TABLE, so searches keep reading the old table meanwhile.
+
+    Returns:
+        int: Number of rows in the new table.
+    """
+    new_name = f"{FILM_SEARCH_TABLE}_new"
+    old_name = f"{FILM_SEARCH_TABLE}_old"
+    with mysql_connection() as connection, connection.cursor() as cursor:
+        _prepare_session(cursor)
+        cursor.execute(STATE_DDL)
+        cursor.execute(TABLE_DDL.format(name=FILM_SEARCH_TABLE))
+        cursor.execute(f"DROP TABLE IF EXISTS `{new_name}`, `{old_name}`")
+        cursor.execute(TABLE_DDL.format(name=new_name))
+        # Changes made while the copy runs are picked up by the next refresh
+        cursor.execute(WATERMARK_NOW)
+        started = cursor.fetchone()[0]
+        count = cursor.execute(
+            f"INSERT INTO `{new_name}` ({COLUMNS}) " + PROJECTION.format(where="")
+        )
+        cursor.execute(
+            f"RENAME TABLE `{FILM_SEARCH_TABLE}` TO `{old_name}`, `{new_name}` TO `{FILM_SEARCH_TABLE}`"
+        )
+        cursor.execute(f"DROP TABLE `{old_name}`")
+        _set_watermark(cursor, started)
+    invalidate_search_cache()
+    logger.info(f"Rebuilt {FILM_SEARCH_TABLE}: {count} films")
+    return count
+
+
+def refresh_film_search():
+    """
+    Re-project the films changed since the last refresh and drop deleted films.
+    Changes are detected by the last_update columns of film, film_category,
+    film_actor, actor and category. Removing a genre or an actor link leaves
+    no timestamp behind: run rebuild_film_search() after such deletions.
+
+    Returns:
+        int: Number of refreshed and deleted films; a full rebuild is run
+            if the table has never been built.
+    """
+    with mysql_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(STATE_DDL)
+        since = _get_watermark(cursor)
+    if since is None:
+        # Outside the block: the rebuild checks out its own pooled connection
+        return rebuild_film_search()
+    with mysql_connection() as connection, connection.cursor() as cursor:
+        _prepare_session(cursor)
+        cursor.execute(WATERMARK_NOW)
+        started = cursor.fetchone()[0]
+        where = f"WHERE f.film_id IN (SELECT film_id FROM ({CHANGED_FILMS}) changed)"
+        # Upserted rows count twice in the affected-rows result of ON DUPLICATE KEY UPDATE
+        changed = cursor.execute(
+            f"INSERT INTO `{FILM_SEARCH_TABLE}` ({COLUMNS}) "
+            + PROJECTION.format(where=where)
+            + """
+            ON DUPLICATE KEY UPDATE
+                title = VALUES(title), description = VALUES(description),
+                release_year = VALUES(release_year), genres = VALUES(genres),
+                genre_names = VALUES(genre_names), actor_ids = VALUES(actor_ids),
+                actor_names = VALUES(actor_names), refreshed_at = CURRENT_TIMESTAMP(6)
+            """,
+            {"since": since},
+        )
+        deleted = cursor.execute(
+            f"""
+            DELETE fs FROM `{FILM_SEARCH_TABLE}` fs
+            LEFT JOIN film f ON f.film_id = fs.film_id
+            WHERE f.film_id IS NULL
+            """
+        )
+        _set_watermark(cursor, started)
+    if changed or deleted:
+        invalidate_search_cache()
+        logger.info(f"Refreshed {FILM_SEARCH_TABLE}: {changed} rows affected, {deleted} deleted")
+    return changed + deleted
+
+
+class FilmSearchRefresher(BackgroundRefresher):
+    """
+    Background thread running refresh_film_search() every
+    FILM_SEARCH_REFRESH_INTERVAL seconds while searches read from film_search.
+    """
+
+    thread_name = "film-search-refresh"
+
+    @property
+    def enabled(self):
+        # Only needed while searches read from film_search
+        return settings.SEARCH_SOURCE == "film_search"
+
+    @property
+    def interval(self):
+        return settings.FILM_SEARCH_REFRESH_INTERVAL
+
+    def refresh(self):
+        try:
+            refresh_film_search()
+        except Exception as e:
+            logger.error(f"Error refreshing {FILM_SEARCH_TABLE}: {e}")
+
+
+film_search_refresher = FilmSearchRefresher()
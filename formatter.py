@@ -1,43 +1,161 @@
 # Output formatting functions - only formatting, no business logic
 
-import os  # for clearing the screen
-import textwrap  # for wrapping text in table cells
-from tabulate import tabulate  # for formatting tables
+from decimal import Decimal
+from functools import lru_cache
+import io
+import os
+import sys
+
+from result_set import ResultSet
+
+# Maximum width of a text column before its cells are wrapped
+CELL_WIDTH = 50
+# Move the cursor home, clear the screen and the scrollback buffer
+CLEAR_SCREEN = "\033[H\033[2J\033[3J"
+
+_NUMBER_TYPES = (int, float, Decimal)
+
+
+@lru_cache(maxsize=8192)
+def wrap_text(text, width=CELL_WIDTH):
+    """
+    Wrap text into lines of at most width characters (cached).
+    Whitespace is collapsed; words longer than the width are split.
+
+    Args:
+        text (str): Cell text.
+        width (int): Maximum line width.
+
+    Returns:
+        tuple: Wrapped lines (at least one, possibly empty).
+    """
+    lines = []
+    line = ""
+    for word in text.split():
+        while len(word) > width:
+            if line:
+                lines.append(line)
+                line = ""
+            lines.append(word[:width])
+            word = word[width:]
+        if not line:
+            line = word
+        elif len(line) + 1 + len(word) <= width:
+            line = f"{line} {word}"
+        else:
+            lines.append(line)
+            line = word
+    if line or not lines:
+        lines.append(line)
+    return tuple(lines)
+
+
+def _cell_lines(value):
+    if value is None:
+        return ("",)
+    if isinstance(value, str):
+        return wrap_text(value)
+    return tuple(str(value).split("\n"))
+
+
+def render_table(data, headers=None, stream=None):
+    """
+    Write rows as a grid table.
+    Cells are wrapped and column widths computed once for the whole result set,
+    then the table is written row by row to the stream.
+
+    Args:
+        data (ResultSet or list): Query result or list of dictionaries (rows).
+        headers (list, optional): List of column headers; defaults to the
+            columns of a ResultSet.
+        stream (TextIO, optional): Output stream; defaults to sys.stdout.
+    """
+    stream = stream or sys.stdout
+    if isinstance(data, ResultSet):
+        # Row tuples are used as they are, without per-row views
+        headers = headers if headers is not None else list(data.columns)
+        values = [list(row) for row in data.tuples()]
+    else:
+        values = [list(row.values()) for row in data]
+    columns = max([len(headers or [])] + [len(row) for row in values])
+    if not columns:
+        return
+    for row in values:
+        row.extend([None] * (columns - len(row)))
+    rows = [[_cell_lines(value) for value in row] for row in values]
+    header_cells = None
+    if headers:
+        header_cells = [(str(header),) for header in headers]
+        header_cells.extend([("",)] * (columns - len(header_cells)))
+
+    widths = [0] * columns
+    for cells in rows + ([header_cells] if header_cells else []):
+        for i, lines in enumerate(cells):
+            widths[i] = max(widths[i], max(len(line) for line in lines))
+    # Numeric columns are right-aligned
+    numeric = [
+        bool(values)
+        and all(row[i] is None or isinstance(row[i], _NUMBER_TYPES) for row in values)
+        for i in range(columns)
+    ]
+
+    separator = "+" + "+".join("-" * (width + 2) for width in widths) + "+\n"
+    header_separator = separator.replace("-", "=")
+
+    def render_row(cells):
+        height = max(len(lines) for lines in cells)
+        out = []
+        for n in range(height):
+            parts = []
+            for i, lines in enumerate(cells):
+                line = lines[n] if n < len(lines) else ""
+                parts.append(line.rjust(widths[i]) if numeric[i] else line.ljust(widths[i]))
+            out.append("| " + " | ".join(parts) + " |\n")
+        return "".join(out)
+
+    stream.write(separator)
+    if header_cells:
+        stream.write(render_row(header_cells))
+        stream.write(header_separator if rows else separator)
+    for row in rows:
+        # One write per table row: a single syscall per row on a line-buffered terminal
+        stream.write(render_row(row) + separator)
+    stream.flush()
 
 
 def format_table(data, headers=None, align="left"):
     """
-    Format a list of dictionaries as a table for console output.
+    Format rows as a table for console output.
     Wraps long text in cells for better readability.
 
     Args:
-        data (list): List of dictionaries (rows).
+        data (ResultSet or list): Query result or list of dictionaries (rows).
         headers (list, optional): List of column headers.
         align (str, optional): Alignment for table cells.
 
     Returns:
         str: Formatted table as a string.
     """
-    table_data = []
-    for row in data:
-        formatted_row = [
-            (
-                "\n".join(textwrap.wrap(" ".join(str(value).split()), width=50))
-                if isinstance(value, str)
-                else value
-            )
-            for value in row.values()
-        ]
-        table_data.append(formatted_row)
+    buffer = io.StringIO()
+    render_table(data, headers, buffer)
+    return buffer.getvalue().rstrip("\n")
+
 
-    return tabulate(table_data, headers=headers, tablefmt="grid", stralign="left")
+@lru_cache(maxsize=1)
+def _enable_ansi():
+    # Windows consoles process ANSI sequences once VT mode is on; an empty
+    # system() call switches it on (once per process)
+    if os.name == "nt":
+        os.system("")
 
 
 def clear_screen():
     """
-    Clear the terminal screen (cross-platform).
+    Clear the terminal screen with ANSI escape sequences (no subprocess).
     """
-    os.system("cls" if os.name == "nt" else "clear")
+    _enable_ansi()
+    sys.stdout.write(CLEAR_SCREEN)
+    sys.stdout.flush()
 
 
 def format_title(text, width=50):
@@ -0,0 +1,231 @@
+# Typo-tolerant search: in-memory trigram indexes over film titles and actor names
+# with NumPy scoring (numpy is imported when an index is built)
+import logging
+import re
+
+from background import BackgroundRefresher
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """
+    Lower-case a text and replace punctuation with spaces.
+
+    Args:
+        text (str): Title, name or query.
+
+    Returns:
+        str: Normalized text.
+    """
+    return _NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+def word_trigrams(text):
+    """
+    Get the trigrams of the words of a text, each word padded with two spaces
+    in front and one behind (as in PostgreSQL pg_trgm), so short words and
+    word starts carry weight.
+
+    Args:
+        text (str): Title, name or query.
+
+    Returns:
+        set: Trigrams.
+    """
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Immutable trigram index over (id, text) entries.
+    A query is scored against the entries sharing at least one trigram with it:
+    the score is the share of the query trigrams found in the entry (a misspelt
+    word still shares most of its trigrams), with the Jaccard similarity of the
+    trigram sets breaking ties in favour of shorter entries.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (iterable): (id, text) pairs; ids must be integers.
+        """
+        import numpy as np
+
+        ids = []
+        texts = []
+        sizes = []
+        postings = {}
+        for entry_id, text in entries:
+            grams = word_trigrams(text)
+            if not grams:
+                continue
+            position = len(ids)
+            ids.append(entry_id)
+            texts.append(text)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.ids = np.array(ids, dtype=np.int64)
+        self.texts = texts
+        self.sizes = np.array(sizes, dtype=np.int32)
+        self.postings = {gram: np.array(p, dtype=np.int32) for gram, p in postings.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query, top_k, min_score, max_postings):
+        """
+        Find the entries closest to a query.
+        Posting lists are merged rarest first until max_postings positions are
+        collected; the remaining (most common, least selective) trigrams are
+        skipped, so the merge and the scoring stay bounded. Scores are shares
+        of the trigrams actually used.
+
+        Args:
+            query (str): Possibly misspelt title or name.
+            top_k (int): Maximum number of matches.
+            min_score (float): Minimum share of query trigrams (0..1).
+            max_postings (int): Maximum number of postings to merge (the rarest
+                trigram is always used).
+
+        Returns:
+            list: (id, text, score) tuples, best first.
+        """
+        import numpy as np
+
+        grams = word_trigrams(query)
+        lists = sorted(
+            (self.postings[gram] for gram in grams if gram in self.postings), key=len
+        )
+        if not lists:
+            return []
+        merged = [lists[0]]
+        collected = len(lists[0])
+        for postings in lists[1:]:
+            if collected + len(postings) > max_postings:
+                logger.debug(
+                    f"Fuzzy search postings limit reached for {query!r}: "
+                    f"{len(merged)} of {len(lists)} trigrams used"
+                )
+                break
+            merged.append(postings)
+            collected += len(postings)
+        # Trigrams absent from the index still count against the score
+        used = len(merged) + len(grams) - len(lists)
+        candidates, shared = np.unique(np.concatenate(merged), return_counts=True)
+        scores = shared / used
+        keep = scores >= min_score
+        candidates, shared, scores = candidates[keep], shared[keep], scores[keep]
+        if not candidates.size:
+            return []
+        jaccard = shared / (used + self.sizes[candidates] - shared)
+        # lexsort: the last key is the primary one
+        order = np.lexsort((-jaccard, -scores))[:top_k]
+        return [
+            (int(self.ids[i]), self.texts[i], round(float(score), 3))
+            for i, score in zip(candidates[order], scores[order])
+        ]
+
+
+class FuzzySearch(BackgroundRefresher):
+    """
+    Trigram indexes for typo-tolerant title and actor search.
+    The indexes are rebuilt by a background thread every FUZZY_REFRESH_INTERVAL
+    seconds; until the first load search() returns None and callers fall
+    back to the exact search.
+    """
+
+    thread_name = "fuzzy-search"
+
+    def __init__(self, loaders):
+        """
+        Args:
+            loaders (dict): Index name ("title", "actor") -> function returning
+                (id, text) pairs.
+        """
+        super().__init__()
+        self._loaders = loaders
+        self._indexes = {}
+
+    @property
+    def enabled(self):
+        return settings.FUZZY_SEARCH_ENABLED
+
+    @property
+    def interval(self):
+        return settings.FUZZY_REFRESH_INTERVAL
+
+    def loaded(self, name):
+        return name in self._indexes
+
+    def refresh(self):
+        """
+        Rebuild all indexes; a failed or empty load keeps the previous index.
+        """
+        for name, loader in self._loaders.items():
+            try:
+                index = TrigramIndex(loader())
+            except Exception as e:
+                logger.error(f"Error building the fuzzy {name} index: {e}")
+                continue
+            if not len(index):
+                logger.warning(f"Fuzzy {name} index is empty, keeping the previous one")
+                continue
+            self._indexes[name] = index
+            logger.info(f"Fuzzy {name} index loaded: {len(index)} entries")
+
+    def search(self, name, query, top_k=None):
+        """
+        Find the entries of an index closest to a query.
+
+        Args:
+            name (str): "title" or "actor".
+            query (str): Possibly misspelt title or name.
+            top_k (int, optional): Maximum number of matches; defaults to settings.FUZZY_TOP_K.
+
+        Returns:
+            list or None: (id, text, score) tuples, best first, or None if the
+                index is not loaded.
+        """
+        index = self._indexes.get(name)
+        if index is None:
+            return None
+        return index.search(
+            query,
+            top_k or settings.FUZZY_TOP_K,
+            settings.FUZZY_MIN_SCORE,
+            settings.FUZZY_MAX_POSTINGS,
+        )
+
+    def resolve(self, name, query):
+        """
+        Get the ids of the closest entries, best first.
+
+        Returns:
+            list or None: Ids, or None if the index is not loaded.
+        """
+        matches = self.search(name, query)
+        return None if matches is None else [entry_id for entry_id, _, _ in matches]
+
+    def suggest(self, name, query, limit=5):
+        """
+        Get "did you mean" suggestions: distinct texts of the closest entries.
+
+        Returns:
+            list: Up to limit texts, best first (empty if the index is not loaded).
+        """
+        suggestions = []
+        for _, text, _ in self.search(name, query, limit * 4) or []:
+            if text not in suggestions:
+                suggestions.append(text)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
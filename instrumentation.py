@@ -0,0 +1,277 @@
+# Per-query instrumentation: latency histograms, rows returned and a slow-query log
+import atexit
+import bisect
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import json
+import logging
+import math
+import re
+import threading
+import time
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_query")
+
+# Search type of the controller call currently running in this thread/task
+current_search_type = ContextVar("current_search_type", default="other")
+
+# Histogram bucket upper bounds in milliseconds: 0.01 ms .. ~100 s, ratio 1.25
+BUCKET_BOUNDS = [0.01 * 1.25**i for i in range(73)]
+
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)", re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """
+    Normalize a statement so executions of the same query share a fingerprint:
+    whitespace collapsed, string and number literals replaced with '?',
+    IN lists of any length collapsed to IN (...).
+
+    Args:
+        statement (str): SQL text or a MongoDB operation description.
+
+    Returns:
+        str: Statement fingerprint.
+    """
+    statement = _IN_LISTS.sub("IN (...)", _LITERALS.sub("?", statement))
+    return _SPACES.sub(" ", statement).strip()
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket (log-scale) latency histogram; percentiles are accurate to about 12 %.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, p):
+        """
+        Get the latency at percentile p (0-100), estimated as the geometric
+        middle of the bucket holding it.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, round(self.count * p / 100))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if i == len(BUCKET_BOUNDS):
+                    return self.max_ms
+                lower = BUCKET_BOUNDS[i - 1] if i else BUCKET_BOUNDS[0]
+                return min(math.sqrt(lower * BUCKET_BOUNDS[i]), self.max_ms)
+        return self.max_ms
+
+
+class QueryStats:
+    """
+    Counters for one (backend, search type, fingerprint).
+    """
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.rows = 0
+        self.errors = 0
+
+
+class Instrumentation:
+    """
+    In-process registry of database call statistics.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._slow_log_ready = False
+
+    def record(self, backend, statement, latency_ms, rows=None, error=None, search_type=None):
+        """
+        Record one database call and write it to the slow-query log if it is slow.
+
+        Args:
+            backend (str): 'mysql' or 'mongo'.
+            statement (str): SQL text or MongoDB operation description.
+            latency_ms (float): Call latency in milliseconds.
+            rows (int, optional): Rows returned or written.
+            error (Exception, optional): Error raised by the call.
+            search_type (str, optional): Defaults to the current search type.
+        """
+        search_type = search_type or current_search_type.get()
+        key = (backend, search_type, fingerprint(statement))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats()
+            stats.histogram.record(latency_ms)
+            stats.rows += rows or 0
+            if error is not None:
+                stats.errors += 1
+        if latency_ms >= settings.SLOW_QUERY_MS:
+            self._log_slow(key, latency_ms, rows, error)
+
+    def _log_slow(self, key, latency_ms, rows, error):
+        if not self._slow_log_ready:
+            self._setup_slow_log()
+        backend, search_type, statement = key
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "backend": backend,
+                    "search_type": search_type,
+                    "latency_ms": round(latency_ms, 3),
+                    "rows": rows,
+                    "error": str(error) if error else None,
+                    "statement": statement,
+                },
+                ensure_ascii=False,
+            )
+        )
+
+    def _setup_slow_log(self):
+        with self._lock:
+            if self._slow_log_ready:
+                return
+            if settings.SLOW_QUERY_LOG:
+                handler = logging.FileHandler(settings.SLOW_QUERY_LOG, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                slow_query_logger.addHandler(handler)
+                # Keep slow queries out of the main application log
+                slow_query_logger.propagate = False
+            self._slow_log_ready = True
+
+    @contextmanager
+    def measure(self, backend, statement):
+        """
+        Time a database call.
+        Usage:
+            with instrumentation.measure("mysql", query) as probe:
+                ...
+                probe["rows"] = len(results)
+        """
+        probe = {"rows": None}
+        started = time.perf_counter()
+        error = None
+        try:
+            yield probe
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.record(backend, statement, latency_ms, probe["rows"], error)
+
+    def percentiles(self, by="search_type"):
+        """
+        Get latency percentiles grouped by search type or by statement fingerprint.
+
+        Args:
+            by (str): 'search_type' or 'statement'.
+
+        Returns:
+            dict: group -> count, errors, rows, mean/p50/p95/p99/max latency (ms).
+        """
+        groups = {}
+        with self._lock:
+            for (backend, search_type, statement), stats in self._stats.items():
+                name = f"{backend}:{search_type}" if by == "search_type" else f"{backend}:{statement}"
+                group = groups.setdefault(
+                    name, {"histogram": LatencyHistogram(), "rows": 0, "errors": 0}
+                )
+                group["histogram"].merge(stats.histogram)
+                group["rows"] += stats.rows
+                group["errors"] += stats.errors
+        report = {}
+        for name, group in sorted(groups.items()):
+            histogram = group["histogram"]
+            report[name] = {
+                "count": histogram.count,
+                "errors": group["errors"],
+                "rows": group["rows"],
+                "mean_ms": round(histogram.total_ms / histogram.count, 3) if histogram.count else 0.0,
+                "p50_ms": round(histogram.percentile(50), 3),
+                "p95_ms": round(histogram.percentile(95), 3),
+                "p99_ms": round(histogram.percentile(99), 3),
+                "max_ms": round(histogram.max_ms, 3),
+            }
+        return report
+
+    def dump(self, path):
+        """
+        Write percentiles by search type and by statement to a JSON file.
+
+        Args:
+            path (str): Output file path.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "by_search_type": self.percentiles("search_type"),
+                    "by_statement": self.percentiles("statement"),
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+instrumentation = Instrumentation()
+
+
+def search_type_context(search_type):
+    """
+    Decorator attributing the database calls of a controller function to a search type.
+
+    Args:
+        search_type (str): Search type, e.g. 'title', 'genre_year', 'actor'.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = current_search_type.set(search_type)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                current_search_type.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def _dump_on_exit():
+    if settings.METRICS_DUMP_FILE:
+        try:
+            instrumentation.dump(settings.METRICS_DUMP_FILE)
+        except OSError as e:
+            logger.error(f"Error writing query metrics: {e}")
+
+
+atexit.register(_dump_on_exit)
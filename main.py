@@ -1,5 +1,8 @@
 # Main application entry point
+import argparse
 import pathlib
+import sys
+import threading
 from ui import (
     show_recent_queries,
     show_menu,
@@ -9,6 +12,8 @@ from ui import (
     search_film_by_title,
     search_film_by_genre_and_year,
     search_film_by_actor,
+    export_search_results,
+    show_window_queries,
 )
 import logging
 
@@ -20,6 +25,38 @@ logging.basicConfig(
     encoding="utf-8",
 )
 
+def start_background_services():
+    """
+    Probe MongoDB and load the reference data, the actor and fuzzy search indexes
+    and the query autocomplete in the background.
+    Importing the controllers loads settings and, on first use, the database
+    drivers, so this runs on a worker thread after the menu is shown.
+    """
+    try:
+        from db_connector import mongo_health
+        from mongo_controler import autocomplete
+        from mysql_controler import actor_index, fuzzy_index
+        from reference_data import reference_data
+        from settings import settings
+
+        mongo_health.start()
+        reference_data.start()
+        actor_index.start()
+        fuzzy_index.start()
+        autocomplete.start()
+        if settings.SEARCH_SOURCE == "film_search":
+            from film_search import film_search_refresher
+
+            film_search_refresher.start()
+        if settings.SCHEMA_CHECK_ON_STARTUP:
+            # Findings go to app.log
+            from schema_check import log_schema_problems
+
+            log_schema_problems()
+    except Exception as e:
+        logger.error(f"Error starting background services: {e}")
+
+
 def main():
     """
     Main application loop.
@@ -27,8 +64,11 @@ def main():
     Calls appropriate UI functions based on user choice.
     Loops until the user selects exit.
     """
+    show_menu()
+    threading.Thread(
+        target=start_background_services, name="startup", daemon=True
+    ).start()
     while True:
-        show_menu()
         choice = get_menu_choice()
         if choice == "1":
             # Search by title
@@ -50,13 +90,316 @@ def main():
             # View recent unique queries
             show_recent_queries()
 
+        elif choice == "6":
+            # Export complete search results to a file
+            export_search_results()
+
+        elif choice == "7":
+            # View popular queries of the last hour/day/week
+            show_window_queries()
+
         elif choice == "0":
             show_exit_message()
             break
+        show_menu()
 
     # Close database connections when exiting
     # (handled in show_exit_message or db module)
 
 
+def search_params_from_args(args):
+    """
+    Build search parameters from command line arguments.
+    Args:
+        args (Namespace): Parsed arguments with search_type and filter options.
+    Returns:
+        dict: Search parameters (see mysql_controler.search_spec).
+    """
+    if args.search_type == "title":
+        return {"keyword": args.keyword}
+    if args.search_type == "actor":
+        return {"actor": args.actor}
+    params = {"genre": args.genre}
+    if args.year_from is not None:
+        params["year_from"] = args.year_from
+    if args.year_to is not None:
+        params["year_to"] = args.year_to
+    return params
+
+
+def run_export(args):
+    """
+    Non-interactive export command: stream a search result to a file.
+    Args:
+        args (Namespace): Parsed 'export' command arguments.
+    Returns:
+        int: Process exit code.
+    """
+    from db_connector import close_all_connections
+    from exporter import export_search
+
+    required = {"title": "keyword", "actor": "actor", "genre_year": "genre"}
+    option = required[args.search_type]
+    if not getattr(args, option):
+        print(f"--{option} is required for '{args.search_type}' export", file=sys.stderr)
+        return 2
+    try:
+        count = export_search(
+            args.search_type,
+            search_params_from_args(args),
+            args.out,
+            fmt=args.format,
+            compressed=True if args.gzip else None,
+            chunk_size=args.chunk_size,
+        )
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        close_all_connections()
+    print(f"Exported {count} rows to {args.out}")
+    return 0
+
+
+def run_batch_command(args):
+    """
+    Non-interactive batch command: run search specs from a JSONL file.
+    Args:
+        args (Namespace): Parsed 'batch' command arguments.
+    Returns:
+        int: Process exit code.
+    """
+    from batch_runner import run_batch
+    from db_connector import close_all_connections
+    from instrumentation import instrumentation
+    from search_log_writer import search_log_writer
+
+    try:
+        summary = run_batch(
+            args.input,
+            args.out,
+            workers=args.workers,
+            include_rows=not args.no_rows,
+            log_queries=args.log,
+        )
+    except Exception as e:
+        logger.error(f"Batch failed: {e}")
+        print(f"Batch failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        search_log_writer.stop()
+        close_all_connections()
+    if args.metrics:
+        instrumentation.dump(args.metrics)
+    print(
+        f"Ran {summary['specs']} specs in {summary['elapsed_s']} s "
+        f"({summary['errors']} errors), results in {args.out}"
+    )
+    return 1 if summary["errors"] else 0
+
+
+def run_serve(args):
+    """
+    Run the asyncio HTTP search service.
+    Args:
+        args (Namespace): Parsed 'serve' command arguments.
+    Returns:
+        int: Process exit code.
+    """
+    from api_server import run_server
+
+    run_server(args.host, args.port, args.workers)
+    return 0
+
+
+def run_verify_schema(args):
+    """
+    Check the indexes and query plans the searches depend on.
+    Args:
+        args (Namespace): Parsed 'verify-schema' command arguments.
+    Returns:
+        int: Process exit code (1 if indexes are still missing or could not be read).
+    """
+    from db_connector import close_all_connections
+    from schema_check import format_report, verify_schema
+
+    try:
+        report = verify_schema(apply=args.apply)
+    finally:
+        close_all_connections()
+    for line in format_report(report):
+        print(line)
+    return 1 if report["mysql_missing"] or report["mongo_missing"] else 0
+
+
+def run_film_search(args):
+    """
+    Rebuild or incrementally refresh the denormalized film_search table.
+    Args:
+        args (Namespace): Parsed 'film-search' command arguments.
+    Returns:
+        int: Process exit code.
+    """
+    from db_connector import close_all_connections
+    from film_search import rebuild_film_search, refresh_film_search
+
+    try:
+        if args.action == "rebuild":
+            count = rebuild_film_search()
+            print(f"film_search rebuilt: {count} films")
+        else:
+            count = refresh_film_search()
+            print(f"film_search refreshed: {count} rows affected")
+    except Exception as e:
+        logger.error(f"film_search {args.action} failed: {e}")
+        print(f"film_search {args.action} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        close_all_connections()
+    return 0
+
+
+def run_query_stats(args):
+    """
+    Rebuild the pre-aggregated query stats from the raw search log.
+    Args:
+        args (Namespace): Parsed 'stats' command arguments.
+    Returns:
+        int: Process exit code.
+    """
+    from db_connector import (
+        check_mongo_availability,
+        close_all_connections,
+        initialize_mongo,
+        mongo_health,
+    )
+    from query_stats import rebuild_query_stats
+    from settings import settings
+
+    # A fresh process: wait for the first probe before deciding MongoDB is down
+    mongo_health.start()
+    mongo_health.wait_ready(settings.MONGO_TIMEOUT_MS / 1000 + 1)
+    try:
+        if not check_mongo_availability():
+            print("MongoDB is not available", file=sys.stderr)
+            return 1
+        count = rebuild_query_stats(initialize_mongo())
+        print(f"Query stats rebuilt: {count} queries")
+    except Exception as e:
+        logger.error(f"Query stats {args.action} failed: {e}")
+        print(f"Query stats {args.action} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        close_all_connections()
+    return 0
+
+
+def run_rollups(args):
+    """
+    Rebuild the hourly/daily query rollups from the raw search log.
+    Args:
+        args (Namespace): Parsed 'rollups' command arguments.
+    Returns:
+        int: Process exit code.
+    """
+    from db_connector import (
+        check_mongo_availability,
+        close_all_connections,
+        initialize_mongo,
+        mongo_health,
+    )
+    from query_rollups import backfill_query_rollups
+    from settings import settings
+
+    # A fresh process: wait for the first probe before deciding MongoDB is down
+    mongo_health.start()
+    mongo_health.wait_ready(settings.MONGO_TIMEOUT_MS / 1000 + 1)
+    try:
+        if not check_mongo_availability():
+            print("MongoDB is not available", file=sys.stderr)
+            return 1
+        count = backfill_query_rollups(initialize_mongo())
+        print(f"Query rollups rebuilt: {count} buckets")
+    except Exception as e:
+        logger.error(f"Query rollups {args.action} failed: {e}")
+        print(f"Query rollups {args.action} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        close_all_connections()
+    return 0
+
+
+def build_parser():
+    """
+    Build the command line parser. Without a command the interactive menu starts.
+    Returns:
+        ArgumentParser: Configured parser.
+    """
+    parser = argparse.ArgumentParser(description="Film search application")
+    commands = parser.add_subparsers(dest="command")
+
+    export = commands.add_parser("export", help="Stream a complete search result to a file")
+    export.add_argument("search_type", choices=["title", "genre_year", "actor"])
+    export.add_argument("--keyword", help="Title keyword (title search)")
+    export.add_argument("--actor", help="Part of actor's name (actor search)")
+    export.add_argument("--genre", help="Genre name (genre_year search)")
+    export.add_argument("--year-from", type=int, help="First release year (genre_year search)")
+    export.add_argument("--year-to", type=int, help="Last release year (genre_year search)")
+    export.add_argument("--out", "-o", required=True, help="Output file: .csv or .jsonl, optionally .gz")
+    export.add_argument("--format", choices=["csv", "jsonl"], help="Override the format detected from --out")
+    export.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+    export.add_argument("--chunk-size", type=int, help="Rows fetched per round trip")
+    export.set_defaults(handler=run_export)
+
+    batch = commands.add_parser("batch", help="Run search specs from a JSONL file concurrently")
+    batch.add_argument("input", help="JSONL file with search specs")
+    batch.add_argument("--out", "-o", required=True, help="JSONL file for results and timings")
+    batch.add_argument("--workers", type=int, help="Worker threads (default BATCH_WORKERS)")
+    batch.add_argument("--no-rows", action="store_true", help="Write only totals and timings")
+    batch.add_argument("--log", action="store_true", help="Record the searches in the search log")
+    batch.add_argument("--metrics", help="JSON file for query latency percentiles")
+    batch.set_defaults(handler=run_batch_command)
+
+    serve = commands.add_parser("serve", help="Run the HTTP search service")
+    serve.add_argument("--host", help="Bind address (default API_HOST)")
+    serve.add_argument("--port", type=int, help="Port (default API_PORT)")
+    serve.add_argument("--workers", type=int, help="Worker threads for database calls (default API_WORKERS)")
+    serve.set_defaults(handler=run_serve)
+
+    verify = commands.add_parser(
+        "verify-schema", help="Check indexes and query plans, print migration DDL"
+    )
+    verify.add_argument("--apply", action="store_true", help="Create the missing indexes")
+    verify.set_defaults(handler=run_verify_schema)
+
+    film_search = commands.add_parser(
+        "film-search", help="Maintain the denormalized film_search table"
+    )
+    film_search.add_argument(
+        "action", choices=["rebuild", "refresh"], help="Full rebuild or incremental refresh"
+    )
+    film_search.set_defaults(handler=run_film_search)
+
+    stats = commands.add_parser("stats", help="Maintain the pre-aggregated query stats")
+    stats.add_argument(
+        "action", choices=["rebuild"], help="Rebuild the stats from the raw search log"
+    )
+    stats.set_defaults(handler=run_query_stats)
+
+    rollups = commands.add_parser(
+        "rollups", help="Maintain the hourly/daily query rollups"
+    )
+    rollups.add_argument(
+        "action", choices=["backfill"], help="Rebuild the rollups from the raw search log"
+    )
+    rollups.set_defaults(handler=run_rollups)
+    return parser
+
+
 if __name__ == "__main__":
-    main()
+    args = build_parser().parse_args()
+    if args.command is None:
+        main()
+    else:
+        sys.exit(args.handler(args))
@@ -1,17 +1,34 @@
-from datetime import datetime, timezone
-import json
-import os
+from datetime import datetime, timedelta, timezone
 
-from db_connector import check_mongo_availability, initialize_mongo, collection_name
+from autocomplete import Autocomplete
+from db_connector import check_mongo_availability, initialize_mongo, mongo_health
+from instrumentation import search_type_context
+from query_rollups import (
+    get_window_summary,
+    get_window_top_queries,
+    group_rollups,
+    summarize_counts,
+    summarize_groups,
+    window_start,
+)
+from query_stats import (
+    DECAY_WINDOW,
+    get_decayed_query_scores,
+    get_top_query_stats,
+    normalize_query,
+)
+from search_log_writer import read_local_search_log, search_log_writer
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-
 def log_search_query(query, search_type, results_count):
     """
-    Log a search query to MongoDB or a local file for statistics.
+    Log a search query for statistics.
+    The entry is queued for the background writer, which stores it in MongoDB
+    or in the local spill file, so logging never delays the search.
+    Searches that found something are added to the autocomplete right away.
 
     Args:
         query (str): Search query text.
@@ -21,28 +38,48 @@ def log_search_query(query, search_type, results_count):
     Returns:
         None
     """
-    # Try MongoDB first if available
-    if check_mongo_availability():
-        try:
-            mongo_db = initialize_mongo()
-            logs_collection = mongo_db[collection_name]
-            log_entry = {
-                "query": query,
-                "search_type": search_type,
-                "timestamp": datetime.now(timezone.utc),
-                "results_count": results_count,
-            }
-
-            logs_collection.insert_one(log_entry)
-            return
+    timestamp = datetime.now(timezone.utc)
+    search_log_writer.submit(
+        {
+            "query": query,
+            "search_type": search_type,
+            "timestamp": timestamp,
+            "results_count": results_count,
+        }
+    )
+    if results_count:
+        autocomplete.record(query, search_type, timestamp.timestamp())
 
-        except Exception as e:
-            logger.error(f"Error logging to MongoDB: {e}")
 
+def _aggregate_local_log():
+    """
+    Group the locally spilled log entries like the stats collection.
 
+    Returns:
+        list: List of queries with count, search_type and last_searched.
+    """
+    entries = read_local_search_log()
+    grouped = {}
+    for entry in entries:
+        item = grouped.setdefault(
+            (normalize_query(entry["query"]), entry.get("search_type")),
+            {
+                "_id": entry["query"],
+                "count": 0,
+                "search_type": entry.get("search_type"),
+                "last_searched": entry["timestamp"],
+            },
+        )
+        item["count"] += 1
+        item["last_searched"] = max(item["last_searched"], entry["timestamp"])
+    return list(grouped.values())
+
+
+@search_type_context("popular_queries")
 def get_popular_queries(limit=5):
     """
     Get the most popular search queries from MongoDB or a local file.
+    Reads the pre-aggregated stats collection sorted by the count index.
 
     Args:
         limit (int): Maximum number of queries to return.
@@ -53,33 +90,25 @@ def get_popular_queries(limit=5):
     # Try MongoDB first if available
     if check_mongo_availability():
         try:
-            mongo_db = initialize_mongo()
-            logs_collection = mongo_db[collection_name]
-
-            # Aggregate pipeline to count queries by text
-            pipeline = [
-                {
-                    "$group": {
-                        "_id": "$query",
-                        "count": {"$sum": 1},
-                        "search_type": {"$first": "$search_type"},
-                        "last_searched": {"$max": "$timestamp"},
-                    }
-                },
-                {"$sort": {"count": -1}},
-                {"$limit": limit},
-            ]
-
-            results = list(logs_collection.aggregate(pipeline))
+            results = get_top_query_stats(initialize_mongo(), "count", limit)
+            mongo_health.record_success()
             return results
 
         except Exception as e:
+            mongo_health.record_failure(e)
             logger.error(f"Error getting popular queries from MongoDB: {e}")
 
+    # Fallback to the local spill file if MongoDB is not available
+    logs = _aggregate_local_log()
+    logs.sort(key=lambda x: x["count"], reverse=True)
+    return logs[:limit]
 
+
+@search_type_context("recent_queries")
 def get_last_queries(limit=10):
     """
     Get recent unique queries from MongoDB or a local file.
+    Reads the pre-aggregated stats collection sorted by the last_searched index.
 
     Args:
         limit (int): Maximum number of queries to return.
@@ -90,37 +119,164 @@ def get_last_queries(limit=10):
     # Try MongoDB first if available
     if check_mongo_availability():
         try:
-            mongo_db = initialize_mongo()
-            logs_collection = mongo_db[collection_name]
-
-            # Aggregate pipeline to get recent unique queries
-            pipeline = [
-                {
-                    "$group": {
-                        "_id": "$query",
-                        "count": {"$sum": 1},
-                        "search_type": {"$first": "$search_type"},
-                        "last_searched": {"$max": "$timestamp"},
-                    }
-                },
-                {"$sort": {"last_searched": -1}},
-                {"$limit": limit},
-            ]
-
-            results = list(logs_collection.aggregate(pipeline))
+            results = get_top_query_stats(initialize_mongo(), "last_searched", limit)
+            mongo_health.record_success()
             return results
 
         except Exception as e:
+            mongo_health.record_failure(e)
             logger.error(f"Error getting recent queries from MongoDB: {e}")
 
-    # Fallback to local file logging if MongoDB is not available
-    log_file_path = "local_search_log.json"
-    if os.path.exists(log_file_path):
-        with open(log_file_path, "r", encoding="utf-8") as f:
-            logs = json.load(f)
+    # Fallback to the local spill file if MongoDB is not available
+    logs = _aggregate_local_log()
+    logs.sort(key=lambda x: x["last_searched"], reverse=True)
+    return logs[:limit]
+
+
+def _window_local_rollups(window):
+    """
+    Group the locally spilled log entries of a time window like the rollup collection.
+
+    Args:
+        window (str): 'hour', 'day' or 'week'.
+
+    Returns:
+        dict: (search_type, query_norm) -> {"query", "count", "zero_results", "results_sum"}
+    """
+    granularity, since = window_start(window)
+    entries = read_local_search_log()
+    grouped = {}
+    for (bucket_granularity, bucket, query_norm, search_type), item in group_rollups(
+        entries
+    ).items():
+        if bucket_granularity != granularity or bucket < since:
+            continue
+        total = grouped.setdefault(
+            (search_type, query_norm),
+            {"query": item["query"], "count": 0, "zero_results": 0, "results_sum": 0},
+        )
+        for field in ("count", "zero_results", "results_sum"):
+            total[field] += item[field]
+    return grouped
+
+
+@search_type_context("window_queries")
+def get_window_popular_queries(window="day", limit=5):
+    """
+    Get the most popular search queries of a time window from the hourly/daily
+    rollups in MongoDB or from a local file.
+
+    Args:
+        window (str): 'hour', 'day' or 'week'.
+        limit (int): Maximum number of queries to return.
+
+    Returns:
+        list: Dicts with query, search_type, count, zero_results,
+            zero_result_rate and mean_results.
+    Raises:
+        ValueError: If the window is unknown.
+    """
+    window_start(window)
+    if check_mongo_availability():
+        try:
+            results = get_window_top_queries(initialize_mongo(), window, limit)
+            mongo_health.record_success()
+            return results
+        except Exception as e:
+            mongo_health.record_failure(e)
+            logger.error(f"Error getting window queries from MongoDB: {e}")
+
+    # Fallback to the local spill file if MongoDB is not available
+    results = []
+    for (search_type, _), item in _window_local_rollups(window).items():
+        results.append(
+            dict(
+                {"query": item["query"], "search_type": search_type},
+                **summarize_counts(item["count"], item["zero_results"], item["results_sum"]),
+            )
+        )
+    results.sort(key=lambda x: x["count"], reverse=True)
+    return results[:limit]
+
+
+@search_type_context("window_summary")
+def get_window_query_summary(window="day"):
+    """
+    Get the number of searches, zero-result rate and mean number of results of
+    a time window from the rollups in MongoDB or from a local file.
+
+    Args:
+        window (str): 'hour', 'day' or 'week'.
+
+    Returns:
+        dict: count, zero_results, zero_result_rate, mean_results and by_type.
+    Raises:
+        ValueError: If the window is unknown.
+    """
+    window_start(window)
+    if check_mongo_availability():
+        try:
+            summary = get_window_summary(initialize_mongo(), window)
+            mongo_health.record_success()
+            return summary
+        except Exception as e:
+            mongo_health.record_failure(e)
+            logger.error(f"Error getting window summary from MongoDB: {e}")
+
+    # Fallback to the local spill file if MongoDB is not available
+    by_type = {}
+    for (search_type, _), item in _window_local_rollups(window).items():
+        totals = by_type.setdefault(search_type, [0, 0, 0])
+        totals[0] += item["count"]
+        totals[1] += item["zero_results"]
+        totals[2] += item["results_sum"]
+    return summarize_groups(
+        (search_type, *totals) for search_type, totals in by_type.items()
+    )
+
+
+@search_type_context("autocomplete")
+def load_autocomplete_scores(landmark, half_life, limit):
+    """
+    Get the forward-decayed query scores for the autocomplete from MongoDB
+    or from the local spill file.
+
+    Args:
+        landmark (datetime): Reference time of the weights (UTC).
+        half_life (float): Half-life of a search in seconds.
+        limit (int): Maximum number of queries.
+
+    Returns:
+        list: Dicts with query, search_type and score.
+    """
+    if check_mongo_availability():
+        try:
+            results = get_decayed_query_scores(initialize_mongo(), landmark, half_life, limit)
+            mongo_health.record_success()
+            return results
+        except Exception as e:
+            mongo_health.record_failure(e)
+            logger.error(f"Error loading autocomplete scores from MongoDB: {e}")
+
+    # Fallback to the local spill file if MongoDB is not available
+    since = landmark - timedelta(seconds=half_life * DECAY_WINDOW)
+    entries = read_local_search_log()
+    grouped = {}
+    for entry in entries:
+        timestamp = entry["timestamp"]
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        if not entry.get("results_count") or timestamp < since:
+            continue
+        item = grouped.setdefault(
+            (normalize_query(entry["query"]), entry.get("search_type")),
+            {"query": entry["query"], "search_type": entry.get("search_type"), "score": 0.0},
+        )
+        item["score"] += 2 ** ((timestamp - landmark).total_seconds() / half_life)
+        item["query"] = entry["query"]
+    results = sorted(grouped.values(), key=lambda x: x["score"], reverse=True)
+    return results[:limit]
 
-        # Sort by timestamp and get the last `limit` entries
-        logs.sort(key=lambda x: x["timestamp"], reverse=True)
-        return logs[:limit]
 
-    return []
+# Prefix suggestions from the search log (see autocomplete.Autocomplete)
+autocomplete = Autocomplete(load_autocomplete_scores)
@@ -1,117 +1,731 @@
-import pymysql
-from db_connector import close_all_connections, initialize_mysql
+import base64
+from collections import namedtuple
+from functools import lru_cache
+import json
+from actor_index import ActorIndex
+from db_connector import close_all_connections, mysql_connection
+from fuzzy_search import FuzzySearch
+from instrumentation import instrumentation, search_type_context
+from prepared_statements import prepared_statements
+from result_cache import ResultCache
+from result_set import ResultSet
+from settings import settings
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
-def get_head_row_from_mysql(query, params=None):
+# MySQL error "Can't find FULLTEXT index matching the column list"
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+TITLE_FULLTEXT_INDEX = "ft_film_text_title"
+# InnoDB default full-text stopwords: they are never indexed, so requiring them never matches
+FULLTEXT_STOPWORDS = {
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for",
+    "from", "how", "i", "in", "is", "it", "la", "of", "on", "or", "that", "the",
+    "this", "to", "was", "what", "when", "where", "who", "will", "with", "und", "www",
+}
+# Cleared when the FULLTEXT index turns out to be missing
+_fulltext_available = True
+
+# Search results cache, keyed by (search type, function, normalized parameters)
+search_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_rows=settings.RESULT_CACHE_MAX_ROWS,
+    ttl=settings.RESULT_CACHE_TTL,
+    enabled=settings.RESULT_CACHE_ENABLED,
+)
+
+# One page of search results. total is computed together with the first page
+# (COUNT(*) OVER ()) and passed back in for the following pages.
+SearchPage = namedtuple("SearchPage", ["rows", "headers", "next_cursor", "total"])
+
+# Search types as recorded in the search log
+SEARCH_TYPES = ("title", "genre_year", "actor")
+
+# Sort keys for keyset pagination: (sql expression, descending).
+# Each key must identify a result row uniquely.
+FILM_SORT_KEYS = [
+    ("f.release_year", False),
+    ("f.film_id", False),
+    ("c.category_id", False),
+]
+ACTOR_FILM_SORT_KEYS = [
+    ("f.release_year", False),
+    ("f.film_id", False),
+    ("a.actor_id", False),
+    ("c.category_id", False),
+]
+
+# Denormalized projection with one row per film (see film_search.py)
+FILM_SEARCH_TABLE = "film_search"
+FILM_SEARCH_SORT_KEYS = [
+    ("fs.release_year", False),
+    ("fs.film_id", False),
+]
+
+
+def _use_film_search():
+    """
+    Check whether searches read from the film_search table instead of joining.
+    """
+    return settings.SEARCH_SOURCE == "film_search"
+
+
+def get_head_row_from_mysql(query, params=None, prepare=False):
     """
     Execute a SQL query and return all rows and column headers.
     Args:
         query (str): SQL query to execute.
         params (tuple, optional): Parameters for the SQL query.
+        prepare (bool): Run the query as a server-side prepared statement when
+            MYSQL_PREPARED_STATEMENTS is on (for the search query templates).
     Returns:
-        tuple: (list of result dictionaries, list of column headers)
+        tuple: (ResultSet of the rows, list of column headers)
     """
-
-    connection = initialize_mysql()
-    cursor = connection.cursor(pymysql.cursors.DictCursor)
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    headers = [desc[0] for desc in cursor.description]
-    return results, headers
+    with instrumentation.measure("mysql", query) as probe:
+        with mysql_connection() as connection:
+            with connection.cursor() as cursor:
+                if prepare:
+                    prepared_statements.execute(connection, cursor, query, params)
+                else:
+                    cursor.execute(query, params)
+                results = ResultSet.from_cursor(cursor)
+        probe["rows"] = len(results)
+    return results, list(results.columns)
 
 
-def get_from_mysql(query, params=None) -> list:
+def get_from_mysql(query, params=None, prepare=False) -> ResultSet:
     """
-    Execute a SQL query and return results as a list of dictionaries.
+    Execute a SQL query and return its rows.
     Args:
         query (str): SQL query to execute.
         params (tuple, optional): Parameters for the SQL query.
+        prepare (bool): Run the query as a server-side prepared statement when
+            MYSQL_PREPARED_STATEMENTS is on.
     Returns:
-        list: List of result dictionaries.
+        ResultSet: Rows of the result (empty on error).
     """
     try:
-        connection = initialize_mysql()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        return results
+        with instrumentation.measure("mysql", query) as probe:
+            with mysql_connection() as connection:
+                with connection.cursor() as cursor:
+                    if prepare:
+                        prepared_statements.execute(connection, cursor, query, params)
+                    else:
+                        cursor.execute(query, params)
+                    results = ResultSet.from_cursor(cursor)
+            probe["rows"] = len(results)
+            return results
     except Exception as e:
         logger.error(f"Error executing query: {e}")
-        return []
+        return ResultSet()
 
 
-def find_films_by_keyword(keyword, limit=10, skip=0):
+def encode_cursor(values):
     """
-    Find films by keyword search in the MySQL database.
+    Encode the sort key of the last row of a page into an opaque cursor token.
+    Args:
+        values (list): Sort key values of the last row.
+    Returns:
+        str: URL-safe cursor token.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token produced by encode_cursor.
+    Args:
+        token (str): Cursor token.
+    Returns:
+        list: Sort key values of the last row of the previous page.
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return values
+
+
+def _sort_key_parts(sort_key):
+    """
+    Split a sort key into its expression, direction and expression parameters.
+    Args:
+        sort_key (tuple): (sql expression, descending[, expression parameters]).
+    Returns:
+        tuple: (sql expression, descending, list of expression parameters)
+    """
+    expr, descending, *rest = sort_key
+    return expr, descending, list(rest[0]) if rest else []
+
+
+def _keyset_sql(keys, nulls):
+    """
+    Build the SQL text of a keyset condition; it only depends on which
+    cursor values are NULL, not on the values themselves.
+    Args:
+        keys (tuple): (sql expression, descending) per sort key.
+        nulls (tuple): True for every cursor value that is NULL.
+    Returns:
+        str: Condition string with %s placeholders.
+    """
+    branches = []
+    for i, (expr, descending) in enumerate(keys):
+        parts = [f"{prev_expr} <=> %s" for prev_expr, _ in keys[:i]]
+        if nulls[i]:
+            if descending:
+                # Nothing sorts after NULL in descending order
+                continue
+            parts.append(f"{expr} IS NOT NULL")
+        else:
+            parts.append(f"{expr} {'<' if descending else '>'} %s")
+        branches.append("(" + " AND ".join(parts) + ")")
+    if not branches:
+        return "FALSE"
+    return "(" + " OR ".join(branches) + ")"
+
+
+def _keyset_params(keys, values):
+    """
+    Collect the parameters of a keyset condition in the order of _keyset_sql.
+    Args:
+        keys (list): (sql expression, descending, expression parameters) per sort key.
+        values (list): Sort key values of the last row of the previous page.
+    Returns:
+        list: Condition parameters.
+    """
+    params = []
+    for i, (_, descending, expr_params) in enumerate(keys):
+        if values[i] is None and descending:
+            continue
+        for (_, _, prev_params), value in zip(keys[:i], values[:i]):
+            params.extend(prev_params)
+            params.append(value)
+        params.extend(expr_params)
+        if values[i] is not None:
+            params.append(values[i])
+    return params
+
+
+def _keyset_condition(sort_keys, values):
+    """
+    Build a WHERE condition selecting rows strictly after the given sort key.
+    NULL values are compared null-safely (MySQL sorts NULL first in ASC order).
+    Args:
+        sort_keys (list): List of (sql expression, descending[, expression parameters]).
+        values (list): Sort key values of the last row of the previous page.
+    Returns:
+        tuple: (condition string, list of parameters)
+    """
+    if len(values) != len(sort_keys):
+        raise ValueError("Cursor does not match the search sort key")
+    keys = [_sort_key_parts(sort_key) for sort_key in sort_keys]
+    condition = _keyset_sql(
+        tuple((expr, descending) for expr, descending, _ in keys),
+        tuple(value is None for value in values),
+    )
+    return condition, _keyset_params(keys, values)
+
+
+@lru_cache(maxsize=1024)
+def _page_query_template(columns, source, conditions, keys, cursor_nulls, count_total):
+    """
+    Build the SQL text of a page query, once per query shape.
+    The text only depends on the search spec, on which cursor values are NULL
+    and on whether the total is counted, so repeated searches (and every
+    combination of criteria filters) reuse the same string, and with
+    MYSQL_PREPARED_STATEMENTS the same server-side statement.
+    Args:
+        columns (str): Visible SELECT columns.
+        source (str): FROM clause with joins.
+        conditions (tuple): WHERE conditions joined with AND.
+        keys (tuple): (sql expression, descending) per sort key.
+        cursor_nulls (tuple or None): NULL flags of the cursor values; None without cursor.
+        count_total (bool): Add the COUNT(*) OVER () column.
+    Returns:
+        str: SQL query with %s placeholders.
+    """
+    key_columns = ", ".join(f"{expr} AS _k{i}" for i, (expr, _) in enumerate(keys))
+    if count_total:
+        key_columns += ", COUNT(*) OVER () AS _total"
+    conditions = [f"({condition})" for condition in conditions]
+    if cursor_nulls is not None:
+        conditions.append(_keyset_sql(keys, cursor_nulls))
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    order = ", ".join(
+        f"_k{i} {'DESC' if descending else 'ASC'}" for i, (_, descending) in enumerate(keys)
+    )
+    return f"""
+        SELECT {columns}, {key_columns}
+        FROM {source}
+        {where}
+        ORDER BY {order}
+        LIMIT %s
+    """
+
+
+def find_page_from_mysql(
+    columns, source, conditions, params, sort_keys, limit, cursor=None, total=None
+):
+    """
+    Execute a keyset-paginated search query.
+    Rows are ordered by the sort key and the page starts right after the cursor,
+    so every page costs the same as the first one (no OFFSET scanning).
+    The total number of matches is computed in the same query with a window
+    COUNT(*) OVER () unless it is already known from a previous page.
+    Args:
+        columns (str): Visible SELECT columns.
+        source (str): FROM clause with joins.
+        conditions (list): WHERE conditions joined with AND.
+        params (list): Parameters for the conditions.
+        sort_keys (list): List of (sql expression, descending[, expression parameters]),
+            must be unique per row.
+        limit (int): Number of rows per page.
+        cursor (str, optional): Token returned with the previous page.
+        total (int, optional): Total returned with the previous page.
+    Returns:
+        SearchPage: (rows, headers, next cursor or None, total)
+    """
+    keys = [_sort_key_parts(sort_key) for sort_key in sort_keys]
+    key_names = [f"_k{i}" for i in range(len(keys))]
+    # The window count is only correct without the keyset condition
+    count_total = total is None and not cursor
+    if count_total:
+        key_names.append("_total")
+    values = decode_cursor(cursor) if cursor else None
+    if values is not None and len(values) != len(keys):
+        raise ValueError("Cursor does not match the search sort key")
+    query = _page_query_template(
+        columns,
+        source,
+        tuple(conditions),
+        tuple((expr, descending) for expr, descending, _ in keys),
+        None if values is None else tuple(value is None for value in values),
+        count_total,
+    )
+    query_params = [p for _, _, expr_params in keys for p in expr_params]
+    query_params.extend(params)
+    if values is not None:
+        query_params.extend(_keyset_params(keys, values))
+    query_params.append(limit + 1)
+    rows, _ = get_head_row_from_mysql(query, tuple(query_params), prepare=True)
+    if count_total:
+        total = rows[0]["_total"] if rows else 0
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last[name] for name in key_names[: len(keys)]])
+    # The sort key and total columns come last: drop them from every row at once
+    rows = rows.without(key_names)
+    return SearchPage(rows, list(rows.columns), next_cursor, total)
+
+
+def _fulltext_boolean_query(keyword):
+    """
+    Build a MySQL boolean-mode FULLTEXT query requiring every word as a prefix.
+    Args:
+        keyword (str): Keyword entered by the user.
+    Returns:
+        str or None: Boolean query, or None if the keyword cannot be served
+            by the FULLTEXT index (too short words, only stopwords).
+    """
+    words = [
+        word
+        for word in re.findall(r"\w+", keyword.lower())
+        if word not in FULLTEXT_STOPWORDS
+    ]
+    if not words or any(len(word) < settings.FULLTEXT_MIN_TOKEN_SIZE for word in words):
+        return None
+    return " ".join(f"+{word}*" for word in words)
+
+
+def _resolve_keyword_mode(keyword, mode=None):
+    """
+    Choose the title search mode for a keyword.
     Args:
         keyword (str): Keyword to search for.
-        limit (int): Maximum number of results to return.
-        skip (int): Number of results to skip (for pagination).
+        mode (str, optional): 'fulltext', 'substring' or 'fuzzy'; defaults to
+            settings.TITLE_SEARCH_MODE.
+    Returns:
+        tuple: (mode, search argument) where the argument is a boolean FULLTEXT
+            query, a LIKE pattern or the film_ids of the closest titles, best first.
+    """
+    mode = mode or settings.TITLE_SEARCH_MODE
+    if mode == "fuzzy":
+        film_ids = fuzzy_index.resolve("title", keyword) if settings.FUZZY_SEARCH_ENABLED else None
+        if film_ids is not None:
+            return "fuzzy", film_ids
+        # Index not loaded yet: the exact search is the closest we have
+        mode = "substring"
+    if mode == "fulltext" and _fulltext_available:
+        boolean_query = _fulltext_boolean_query(keyword)
+        if boolean_query:
+            return "fulltext", boolean_query
+    return "substring", f"%{keyword.lower()}%"
+
+
+def disable_fulltext_on_missing_index(error):
+    """
+    Switch title search to substring mode if the FULLTEXT index is missing.
+    Args:
+        error (Exception): Error raised by a FULLTEXT query.
     Returns:
-        tuple: (list of film dictionaries, list of column headers)
+        bool: True if the error was caused by the missing index.
     """
+    global _fulltext_available
+    if getattr(error, "args", None) and error.args[0] == ER_FT_MATCHING_KEY_NOT_FOUND:
+        _fulltext_available = False
+        logger.warning(
+            "FULLTEXT index on film_text.title not found, falling back to substring search. "
+            "Run create_title_fulltext_index() to enable full-text search."
+        )
+        return True
+    return False
+
+
+def create_title_fulltext_index():
+    """
+    Create the FULLTEXT index on film_text.title used by the full-text title search.
+    Returns:
+        bool: True if the index was created, otherwise False.
+    """
+    global _fulltext_available
     try:
-        query = """
-            SELECT ft.title, ft.description, f.release_year, c.name AS genre
-            FROM film_text ft
+        with mysql_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE film_text ADD FULLTEXT INDEX {TITLE_FULLTEXT_INDEX} (title)"
+            )
+        _fulltext_available = True
+        logger.info(f"Created FULLTEXT index {TITLE_FULLTEXT_INDEX} on film_text.title")
+        return True
+    except Exception as e:
+        logger.error(f"Error creating FULLTEXT index on film_text.title: {e}")
+        return False
+
+
+def _film_ids_condition(column, film_ids):
+    """
+    Build a filter on a best-first list of film_ids.
+    Args:
+        column (str): film_id column.
+        film_ids (list): Film ids, best first.
+    Returns:
+        tuple: (condition string, list of parameters)
+    """
+    if not film_ids:
+        return "FALSE", []
+    placeholders = ", ".join(["%s"] * len(film_ids))
+    return f"{column} IN ({placeholders})", list(film_ids)
+
+
+def _title_condition(alias, search_mode, argument, sort_keys):
+    """
+    Build the title filter and its sort keys for a resolved search mode.
+    Args:
+        alias (str): Alias of the table with the title ('ft' or 'fs').
+        search_mode (str): 'fulltext', 'substring' or 'fuzzy'.
+        argument: Search argument returned by _resolve_keyword_mode.
+        sort_keys (list): Default sort keys; the first one is replaced by the rank.
+    Returns:
+        tuple: (condition string, list of parameters, sort keys)
+    """
+    if search_mode == "fulltext":
+        condition = f"MATCH({alias}.title) AGAINST(%s IN BOOLEAN MODE)"
+        return condition, [argument], [(condition, True, [argument])] + sort_keys[1:]
+    if search_mode == "fuzzy":
+        condition, params = _film_ids_condition(f"{alias}.film_id", argument)
+        if not params:
+            return condition, params, sort_keys
+        # FIELD() keeps the similarity order of the index
+        rank = f"FIELD({alias}.film_id, {', '.join(['%s'] * len(params))})"
+        return condition, params, [(rank, False, params)] + sort_keys[1:]
+    return f"LOWER({alias}.title) LIKE %s", [argument], sort_keys
+
+
+def keyword_search_spec(keyword, mode=None):
+    """
+    Describe the title search query (see find_page_from_mysql for the keys).
+    Args:
+        keyword (str): Keyword to search for.
+        mode (str, optional): 'fulltext', 'substring' or 'fuzzy'; defaults to
+            settings.TITLE_SEARCH_MODE.
+    Returns:
+        dict: columns, source, conditions, params and sort_keys.
+    """
+    search_mode, argument = _resolve_keyword_mode(keyword, mode)
+    if _use_film_search():
+        condition, params, sort_keys = _title_condition(
+            "fs", search_mode, argument, FILM_SEARCH_SORT_KEYS
+        )
+        return {
+            "columns": "fs.title, fs.description, fs.release_year, fs.genre_names AS genre",
+            "source": f"{FILM_SEARCH_TABLE} fs",
+            "conditions": [condition],
+            "params": params,
+            "sort_keys": sort_keys,
+        }
+    condition, params, sort_keys = _title_condition("ft", search_mode, argument, FILM_SORT_KEYS)
+    return {
+        "columns": "ft.title, ft.description, f.release_year, c.name AS genre",
+        "source": """film_text ft
             JOIN film f ON ft.film_id = f.film_id
             JOIN film_category fc ON f.film_id = fc.film_id
-            JOIN category c ON fc.category_id = c.category_id
-            WHERE LOWER(ft.title) LIKE %s
-            LIMIT %s OFFSET %s;
-        """
-        search_pattern = f"%{keyword.lower()}%"
-        params = (search_pattern, limit, skip)
-        row, header = get_head_row_from_mysql(query, params)
-        return row, header
+            JOIN category c ON fc.category_id = c.category_id""",
+        "conditions": [condition],
+        "params": params,
+        "sort_keys": sort_keys,
+    }
+
+
+def criteria_search_spec(filter: dict):
+    """
+    Describe the genre/year search query (see find_page_from_mysql for the keys).
+    Args:
+        filter (dict): Dictionary with filter keys (genre, year_from, year_to).
+    Returns:
+        dict: columns, source, conditions, params and sort_keys.
+    """
+    film_search = _use_film_search()
+    alias = "fs" if film_search else "f"
+    text_filter = []
+    param = []
+    for item, value in filter.items():
+        if item == "genre":
+            text_filter.append("%s MEMBER OF (fs.genres)" if film_search else "c.name = %s")
+        elif item == "year_from":
+            text_filter.append(f"{alias}.release_year >= %s")
+        elif item == "year_to":
+            text_filter.append(f"{alias}.release_year <= %s")
+        else:
+            continue
+        # film_search.genres holds lower-cased names (see film_search.PROJECTION)
+        param.append(value.lower() if item == "genre" and film_search else value)
+    if film_search:
+        return {
+            "columns": "fs.title, fs.release_year, fs.genre_names AS genre",
+            "source": f"{FILM_SEARCH_TABLE} fs",
+            "conditions": text_filter,
+            "params": param,
+            "sort_keys": FILM_SEARCH_SORT_KEYS,
+        }
+    return {
+        "columns": "f.title, f.release_year, c.name AS genre",
+        "source": """film f
+            JOIN film_category fc ON f.film_id = fc.film_id
+            JOIN category c ON fc.category_id = c.category_id""",
+        "conditions": text_filter,
+        "params": param,
+        "sort_keys": FILM_SORT_KEYS,
+    }
+
+
+def _actor_condition(actor_keyword, mode=None):
+    """
+    Build the actor filter: an indexed fa.actor_id IN (...) when the in-memory
+    actor index can resolve the keyword, otherwise LIKE on the actor names.
+    Args:
+        actor_keyword (str): Part of actor's name or surname (case-insensitive).
+        mode (str, optional): 'fuzzy' to match the closest actor names instead.
+    Returns:
+        tuple: (condition string, list of parameters)
+    """
+    actor_ids = None
+    if mode == "fuzzy" and settings.FUZZY_SEARCH_ENABLED:
+        actor_ids = fuzzy_index.resolve("actor", actor_keyword)
+    if actor_ids is None and settings.ACTOR_INDEX_ENABLED:
+        actor_ids = actor_index.resolve(actor_keyword)
+    like_keyword = f"%{actor_keyword.lower()}%"
+    if _use_film_search():
+        # film_search keeps the cast as a JSON array of ids and a "First Last, ..." string
+        if actor_ids is None:
+            # Match each cast member's first or last name like the join path does;
+            # LIKE on actor_names would also match across two concatenated names
+            return (
+                """EXISTS (
+                    SELECT 1 FROM actor a
+                    WHERE a.actor_id MEMBER OF (fs.actor_ids)
+                        AND (LOWER(a.first_name) LIKE %s OR LOWER(a.last_name) LIKE %s)
+                )""",
+                [like_keyword, like_keyword],
+            )
+        if not actor_ids:
+            return "FALSE", []
+        return "JSON_OVERLAPS(fs.actor_ids, CAST(%s AS JSON))", [json.dumps(actor_ids)]
+    if actor_ids is None:
+        return "LOWER(a.first_name) LIKE %s OR LOWER(a.last_name) LIKE %s", [
+            like_keyword,
+            like_keyword,
+        ]
+    if not actor_ids:
+        return "FALSE", []
+    placeholders = ", ".join(["%s"] * len(actor_ids))
+    return f"fa.actor_id IN ({placeholders})", actor_ids
+
+
+def actor_search_spec(actor_keyword, mode=None):
+    """
+    Describe the actor search query (see find_page_from_mysql for the keys).
+    Args:
+        actor_keyword (str): Part of actor's name or surname (case-insensitive).
+        mode (str, optional): 'fuzzy' for typo-tolerant name matching.
+    Returns:
+        dict: columns, source, conditions, params and sort_keys.
+    """
+    condition, params = _actor_condition(actor_keyword, mode)
+    if _use_film_search():
+        # One row per film with its whole cast
+        return {
+            "columns": """fs.actor_names AS actors,
+                fs.title AS film_title,
+                fs.release_year,
+                fs.genre_names AS genre""",
+            "source": f"{FILM_SEARCH_TABLE} fs",
+            "conditions": [condition],
+            "params": params,
+            "sort_keys": FILM_SEARCH_SORT_KEYS,
+        }
+    return {
+        "columns": """CONCAT(a.first_name, ' ', a.last_name) AS actor_name,
+                f.title AS film_title,
+                f.release_year,
+                c.name AS genre""",
+        "source": """film f
+            JOIN film_actor fa ON f.film_id = fa.film_id
+            JOIN actor a ON fa.actor_id = a.actor_id
+            JOIN film_category fc ON f.film_id = fc.film_id
+            JOIN category c ON fc.category_id = c.category_id""",
+        "conditions": [condition],
+        "params": params,
+        "sort_keys": ACTOR_FILM_SORT_KEYS,
+    }
+
+
+def search_spec(search_type, params):
+    """
+    Describe a search query by search type.
+    Args:
+        search_type (str): 'title' (keyword[, mode]), 'genre_year' (genre, year_from,
+            year_to) or 'actor' (actor[, mode]).
+        params (dict): Search parameters.
+    Returns:
+        dict: columns, source, conditions, params and sort_keys.
+    Raises:
+        ValueError: If the search type is unknown.
+    """
+    if search_type == "title":
+        return keyword_search_spec(params["keyword"], params.get("mode"))
+    if search_type == "genre_year":
+        return criteria_search_spec(params)
+    if search_type == "actor":
+        return actor_search_spec(params["actor"], params.get("mode"))
+    raise ValueError(f"Unknown search type: {search_type}")
+
+
+def build_search_query(search_type, params):
+    """
+    Build the complete (unpaginated) SQL of a search, ordered like its pages.
+    Args:
+        search_type (str): 'title', 'genre_year' or 'actor'.
+        params (dict): Search parameters (see search_spec).
+    Returns:
+        tuple: (SQL query, tuple of parameters)
+    """
+    spec = search_spec(search_type, params)
+    keys = [_sort_key_parts(sort_key) for sort_key in spec["sort_keys"]]
+    where = ""
+    if spec["conditions"]:
+        where = "WHERE " + " AND ".join(f"({c})" for c in spec["conditions"])
+    order = ", ".join(
+        f"{expr} {'DESC' if descending else 'ASC'}" for expr, descending, _ in keys
+    )
+    query = f"""
+        SELECT {spec["columns"]}
+        FROM {spec["source"]}
+        {where}
+        ORDER BY {order}
+    """
+    query_params = list(spec["params"])
+    for _, _, expr_params in keys:
+        query_params.extend(expr_params)
+    return query, tuple(query_params)
+
+
+@search_cache.cached("title", lowercase_args=("keyword",))
+@search_type_context("title")
+def find_films_by_keyword(keyword, limit=10, cursor=None, mode=None, total=None):
+    """
+    Find films by keyword search in the MySQL database.
+    In 'fulltext' mode matches are ranked by relevance using the FULLTEXT index
+    on film_text.title; 'substring' mode keeps the LIKE '%keyword%' semantics.
+    Args:
+        keyword (str): Keyword to search for.
+        limit (int): Maximum number of results to return.
+        cursor (str, optional): Token returned with the previous page.
+        mode (str, optional): 'fulltext', 'substring' or 'fuzzy'; defaults to
+            settings.TITLE_SEARCH_MODE.
+        total (int, optional): Total returned with the previous page.
+    Returns:
+        SearchPage: (ResultSet of films, list of column headers, next cursor or None, total)
+    Raises:
+        ValueError: If the cursor does not belong to this search.
+    """
+    try:
+        return find_page_from_mysql(
+            **keyword_search_spec(keyword, mode),
+            limit=limit,
+            cursor=cursor,
+            total=total,
+        )
+    except ValueError:
+        # Invalid cursor or mode: the caller's error, not a database failure
+        raise
     except Exception as e:
+        if disable_fulltext_on_missing_index(e):
+            # A cursor of the relevance-ranked search does not fit the substring
+            # sort key: the substring search starts over from its first page
+            return find_films_by_keyword(keyword, limit, None, "substring", None)
         logger.error(f"Error searching films by keyword '{keyword}': {e}")
-        return []
+        return SearchPage(ResultSet(), [], None, 0)
 
 
-def find_films_by_criteria(filter: dict, limit=10, skip=0):
+@search_cache.cached("genre_year")
+@search_type_context("genre_year")
+def find_films_by_criteria(filter: dict, limit=10, cursor=None, total=None):
     """
     Find films by genre and year criteria in the MySQL database.
     Args:
         filter (dict): Dictionary with filter keys (genre, year_from, year_to).
         limit (int): Maximum number of results to return.
-        skip (int): Number of results to skip (for pagination).
+        cursor (str, optional): Token returned with the previous page.
+        total (int, optional): Total returned with the previous page.
     Returns:
-        tuple: (list of film dictionaries, list of column headers)
+        SearchPage: (ResultSet of films, list of column headers, next cursor or None, total)
+    Raises:
+        ValueError: If the cursor does not belong to this search.
     """
     try:
-        text_filter = []
-        param = []
-        filter_res = ""
-        for item, value in filter.items():
-            if item == "genre":
-                text_filter.append("c.name = %s")
-            elif item == "year_from":
-                text_filter.append("f.release_year >= %s")
-            elif item == "year_to":
-                text_filter.append("f.release_year <= %s")
-            param.append(value)
-        if text_filter:
-            filter_res = "WHERE " + " and ".join(text_filter)
-        param.append(limit)
-        param.append(skip)
-        query = f"""
-            SELECT f.title, f.release_year, c.name AS genre
-            FROM film f
-            JOIN film_category fc ON f.film_id = fc.film_id
-            JOIN category c ON fc.category_id = c.category_id
-            {filter_res}
-            LIMIT %s OFFSET %s
-        """
-        results, headers = get_head_row_from_mysql(query, tuple(param))
-        return results, headers
+        return find_page_from_mysql(
+            **criteria_search_spec(filter),
+            limit=limit,
+            cursor=cursor,
+            total=total,
+        )
+    except ValueError:
+        # Invalid cursor: the caller's error, not a database failure
+        raise
     except Exception as e:
         logger.error(f"Error searching films by criteria: {e}")
-        return []
+        return SearchPage(ResultSet(), [], None, 0)
 
 
+@search_type_context("reference")
 def get_all_genres():
     """
     Get all unique genres from the MySQL films table.
@@ -130,6 +744,8 @@ def get_all_genres():
         return []
 
 
+@search_cache.cached("genre_year")
+@search_type_context("genre_year")
 def count_films_by_genre(filtr):
     """
     Count total films by genre in the MySQL database.
@@ -139,103 +755,196 @@ def count_films_by_genre(filtr):
         int: Total number of films matching the criteria.
     """
     try:
-        query = """
-        SELECT COUNT(*) count_film
-        FROM film f
-        JOIN film_category fc ON f.film_id = fc.film_id
-        JOIN category c ON fc.category_id = c.category_id
-        WHERE c.name = %s and f.release_year BETWEEN %s AND %s
-        """
-        params = (filtr["genre"], filtr["year_from"], filtr["year_to"])
-        results = get_from_mysql(query, params)
+        genre = filtr["genre"]
+        if _use_film_search():
+            genre = genre.lower()
+            query = f"""
+            SELECT COUNT(*) count_film
+            FROM {FILM_SEARCH_TABLE} fs
+            WHERE %s MEMBER OF (fs.genres) AND fs.release_year BETWEEN %s AND %s
+            """
+        else:
+            query = """
+            SELECT COUNT(*) count_film
+            FROM film f
+            JOIN film_category fc ON f.film_id = fc.film_id
+            JOIN category c ON fc.category_id = c.category_id
+            WHERE c.name = %s and f.release_year BETWEEN %s AND %s
+            """
+        params = (genre, filtr["year_from"], filtr["year_to"])
+        results = get_from_mysql(query, params, prepare=True)
         return results[0]["count_film"] if results else 0
     except Exception as e:
         logger.error(f"Error counting films by genre: {e}")
         return 0
 
 
-def count_films_by_keyword(keyword):
+@search_cache.cached("title", lowercase_args=("keyword",))
+@search_type_context("title")
+def count_films_by_keyword(keyword, mode=None):
     """
     Count total number of films matching a keyword in the MySQL database.
     Args:
         keyword (str): Keyword to search for.
+        mode (str, optional): 'fulltext', 'substring' or 'fuzzy'; defaults to
+            settings.TITLE_SEARCH_MODE.
     Returns:
         int: Total number of matching films.
     """
     try:
-        sql = """
+        search_mode, argument = _resolve_keyword_mode(keyword, mode)
+        params = (argument,)
+        if search_mode == "fulltext":
+            condition = "MATCH(title) AGAINST(%s IN BOOLEAN MODE)"
+        elif search_mode == "fuzzy":
+            condition, params = _film_ids_condition("film_id", argument)
+        else:
+            condition = "LOWER(title) LIKE %s"
+        table = FILM_SEARCH_TABLE if _use_film_search() else "film_text"
+        sql = f"""
         SELECT COUNT(*) as total
-        FROM film_text
-        WHERE title LIKE %s
+        FROM {table}
+        WHERE {condition}
         """
-        search_pattern = f"%{keyword}%"
-        result = get_from_mysql(sql, (search_pattern,))
+        result, _ = get_head_row_from_mysql(sql, tuple(params), prepare=True)
         return result[0]["total"] if result else 0
     except Exception as e:
+        if disable_fulltext_on_missing_index(e):
+            return count_films_by_keyword(keyword, mode="substring")
         logger.error(f"Error counting films by keyword '{keyword}': {e}")
         return 0
 
 
-def count_films_by_actor(actor_keyword):
+@search_cache.cached("actor", lowercase_args=("actor_keyword",))
+@search_type_context("actor")
+def count_films_by_actor(actor_keyword, mode=None):
     """
     Count total number of films matching an actor keyword in the MySQL database.
     Args:
         actor_keyword (str): Part of actor's name or surname.
+        mode (str, optional): 'fuzzy' for typo-tolerant name matching.
     Returns:
         int: Total number of matching films.
     """
     try:
-        like_keyword = f"%{actor_keyword.lower()}%"
-        query = """
-            SELECT COUNT(*) ct
-            FROM film f
+        condition, params = _actor_condition(actor_keyword, mode)
+        if _use_film_search():
+            source = f"{FILM_SEARCH_TABLE} fs"
+        else:
+            source = """film f
             JOIN film_actor fa ON f.film_id = fa.film_id
-            JOIN actor a ON fa.actor_id = a.actor_id
-            WHERE LOWER(a.first_name) LIKE %s OR LOWER(a.last_name) LIKE %s
+            JOIN actor a ON fa.actor_id = a.actor_id"""
+        query = f"""
+            SELECT COUNT(*) ct
+            FROM {source}
+            WHERE {condition}
         """
-        result = get_from_mysql(query, (like_keyword, like_keyword))
+        result = get_from_mysql(query, tuple(params), prepare=True)
         return result[0]["ct"] if result else 0
     except Exception as e:
         logger.error(f"Error counting films by actor '{actor_keyword}': {e}")
         return 0
 
 
-def find_films_by_actor_with_genre(actor_keyword, limit=10, skip=0):
+@search_cache.cached("actor", lowercase_args=("actor_keyword",))
+@search_type_context("actor")
+def find_films_by_actor_with_genre(actor_keyword, limit=10, cursor=None, total=None, mode=None):
     """
     Find films by part of actor's name or surname, with genre and year, with pagination.
     Args:
         actor_keyword (str): Part of actor's name or surname (case-insensitive).
         limit (int): Number of results per page.
-        skip (int): Offset for pagination.
+        cursor (str, optional): Token returned with the previous page.
+        total (int, optional): Total returned with the previous page.
+        mode (str, optional): 'fuzzy' to search the films of the closest actor names.
     Returns:
-        tuple: (list of film dictionaries with actor, title, year, genre, list of column headers)
+        SearchPage: (ResultSet of films with actor, title, year, genre,
+            list of column headers, next cursor or None, total)
+    Raises:
+        ValueError: If the cursor does not belong to this search.
     """
     try:
-        like_keyword = f"%{actor_keyword.lower()}%"
-        query = """
-            SELECT
-                CONCAT(a.first_name, ' ', a.last_name) AS actor_name,
-                f.title AS film_title,
-                f.release_year,
-                c.name AS genre
-            FROM film f
-            JOIN film_actor fa ON f.film_id = fa.film_id
-            JOIN actor a ON fa.actor_id = a.actor_id
-            JOIN film_category fc ON f.film_id = fc.film_id
-            JOIN category c ON fc.category_id = c.category_id
-            WHERE LOWER(a.first_name) LIKE %s OR LOWER(a.last_name) LIKE %s
-            ORDER BY f.release_year
-            LIMIT %s OFFSET %s
-        """
-        results, headers = get_head_row_from_mysql(
-            query, (like_keyword, like_keyword, limit, skip)
+        return find_page_from_mysql(
+            **actor_search_spec(actor_keyword, mode),
+            limit=limit,
+            cursor=cursor,
+            total=total,
         )
-        return results, headers
+    except ValueError:
+        # Invalid cursor: the caller's error, not a database failure
+        raise
     except Exception as e:
         logger.error(f"Error searching films by actor '{actor_keyword}': {e}")
-        return []
+        return SearchPage(ResultSet(), [], None, 0)
+
+
+def search_page(search_type, params, limit=10, cursor=None, total=None):
+    """
+    Fetch one page of a search by search type.
+    Args:
+        search_type (str): 'title', 'genre_year' or 'actor'.
+        params (dict): Search parameters (see search_spec).
+        limit (int): Number of results per page.
+        cursor (str, optional): Token returned with the previous page.
+        total (int, optional): Total returned with the previous page.
+    Returns:
+        SearchPage: (rows, headers, next cursor or None, total)
+    Raises:
+        ValueError: If the search type is unknown.
+    """
+    if search_type == "title":
+        return find_films_by_keyword(
+            params["keyword"], limit, cursor, params.get("mode"), total
+        )
+    if search_type == "genre_year":
+        return find_films_by_criteria(params, limit, cursor, total)
+    if search_type == "actor":
+        return find_films_by_actor_with_genre(
+            params["actor"], limit, cursor, total, params.get("mode")
+        )
+    raise ValueError(f"Unknown search type: {search_type}")
+
+
+@search_type_context("reference")
+def load_actors():
+    """
+    Load actor names for the in-memory actor index.
+    Returns:
+        ResultSet: Rows with actor_id, first_name and last_name.
+    """
+    return get_from_mysql("SELECT actor_id, first_name, last_name FROM actor")
+
 
+# Resolves actor name fragments to actor_ids (see actor_index.ActorIndex)
+actor_index = ActorIndex(load_actors)
 
+
+@search_type_context("reference")
+def load_titles():
+    """
+    Load film titles for the fuzzy title index.
+    Returns:
+        list: (film_id, title) tuples.
+    """
+    return get_from_mysql("SELECT film_id, title FROM film_text").tuples()
+
+
+def load_actor_names():
+    """
+    Load actor full names for the fuzzy actor index.
+    Returns:
+        list: (actor_id, "first last") tuples.
+    """
+    return [
+        (row["actor_id"], f"{row['first_name']} {row['last_name']}") for row in load_actors()
+    ]
+
+
+# Typo-tolerant title and actor matching (see fuzzy_search.FuzzySearch)
+fuzzy_index = FuzzySearch({"title": load_titles, "actor": load_actor_names})
+
+
+@search_type_context("reference")
 def get_year_range():
     """
     Get the minimum and maximum year from the MySQL films table.
@@ -249,7 +958,7 @@ def get_year_range():
         """
         result = get_from_mysql(sql)
         if result:
-            return result[0]
+            return result[0].to_dict()
         else:
             return None
     except Exception as e:
@@ -257,6 +966,39 @@ def get_year_range():
         return None
 
 
+def invalidate_search_cache(search_type=None):
+    """
+    Drop cached search results, e.g. after the films data has changed.
+    Args:
+        search_type (str, optional): 'title', 'genre_year' or 'actor'; all if omitted.
+    Returns:
+        int: Number of dropped cache entries.
+    """
+    return search_cache.invalidate(search_type)
+
+
+def get_query_template_stats():
+    """
+    Get query template and prepared statement counters.
+    Returns:
+        dict: templates (lru_cache counters) and prepared (see PreparedStatementCache.stats).
+    """
+    info = _page_query_template.cache_info()
+    return {
+        "templates": {"hits": info.hits, "misses": info.misses, "size": info.currsize},
+        "prepared": prepared_statements.stats(),
+    }
+
+
+def get_search_cache_stats():
+    """
+    Get search cache hit/miss counters for sizing the cache.
+    Returns:
+        dict: hits, misses, hit_rate, evictions, entries and rows.
+    """
+    return search_cache.stats()
+
+
 def close_mysql_connection():
     """
     Close all MySQL connections and clear the cache.
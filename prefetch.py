@@ -0,0 +1,70 @@
+# Background prefetch of the next result page during interactive paging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import logging
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_prefetch_executor():
+    """
+    Get the shared worker pool used for prefetching pages.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.PREFETCH_WORKERS, thread_name_prefix="page-prefetch"
+    )
+
+
+class PagePrefetcher:
+    """
+    Fetches page N+1 on a worker thread while the user reads page N.
+    If prefetching is disabled (PREFETCH_ENABLED) pages are fetched on demand.
+    """
+
+    def __init__(self, fetch_page, enabled=None):
+        """
+        Args:
+            fetch_page (callable): Function taking (cursor, total) and returning a SearchPage.
+            enabled (bool, optional): Override settings.PREFETCH_ENABLED.
+        """
+        self._fetch_page = fetch_page
+        self._enabled = settings.PREFETCH_ENABLED if enabled is None else enabled
+        self._future = None
+        self._key = None
+
+    def prefetch(self, cursor, total):
+        """
+        Start fetching the page after the given cursor in the background.
+        """
+        if not self._enabled:
+            return
+        self.cancel()
+        self._key = (cursor, total)
+        self._future = get_prefetch_executor().submit(self._fetch_page, cursor, total)
+
+    def get(self, cursor, total):
+        """
+        Get a page, using the prefetched result when it matches.
+        Returns:
+            SearchPage: Requested page.
+        """
+        future, key = self._future, self._key
+        self._future = self._key = None
+        if future is not None and key == (cursor, total) and not future.cancelled():
+            try:
+                return future.result()
+            except Exception as e:
+                logger.error(f"Error prefetching page: {e}")
+        return self._fetch_page(cursor, total)
+
+    def cancel(self):
+        """
+        Cancel a pending prefetch (a query that already started is left to finish
+        and its result is discarded).
+        """
+        if self._future is not None:
+            self._future.cancel()
+        self._future = self._key = None
@@ -0,0 +1,134 @@
+# Server-side prepared statements per pooled MySQL connection (SQL-level PREPARE/EXECUTE)
+from collections import OrderedDict
+import itertools
+import logging
+import threading
+import weakref
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# "Unknown prepared statement handler": the connection was re-opened and lost its statements
+ER_UNKNOWN_STMT_HANDLER = 1243
+# "This command is not supported in the prepared statement protocol yet"
+ER_UNSUPPORTED_PS = 1295
+
+
+def _error_code(error):
+    args = getattr(error, "args", None)
+    return args[0] if args else None
+
+
+class PreparedStatementCache:
+    """
+    Runs queries as server-side prepared statements, preparing each SQL text
+    once per connection. Statements live on the MySQL session, so they are
+    tracked per pooled connection (weakly: a discarded connection takes its
+    statements with it) with an LRU bound of MYSQL_PREPARED_CACHE_SIZE per
+    connection; evicted statements are deallocated on the server.
+
+    PyMySQL only speaks the text protocol, so parameters are passed through
+    session variables: SET @s_0 = %s, ... followed by EXECUTE s USING @s_0, ...
+    That is one extra round trip per query, which pays off for queries whose
+    parsing and planning cost more than the round trip (many joins, long IN
+    lists); MYSQL_PREPARED_STATEMENTS switches it on.
+    """
+
+    def __init__(self):
+        self._statements = weakref.WeakKeyDictionary()  # connection -> OrderedDict(sql -> name)
+        self._unsupported = set()
+        self._names = itertools.count(1)
+        self._lock = threading.Lock()
+        self._prepares = 0
+        self._executions = 0
+
+    def execute(self, connection, cursor, query, params=None):
+        """
+        Execute a query on a cursor, as a prepared statement if enabled.
+
+        Args:
+            connection (Connection): Connection the cursor belongs to (checked out
+                by the caller, so it is not used by other threads meanwhile).
+            cursor (Cursor): Cursor to execute on; results are fetched from it as usual.
+            query (str): SQL with %s placeholders.
+            params (tuple, optional): Query parameters.
+
+        Returns:
+            int: Affected rows as returned by cursor.execute.
+        """
+        if not settings.MYSQL_PREPARED_STATEMENTS or query in self._unsupported:
+            return cursor.execute(query, params)
+        try:
+            return self._execute_prepared(connection, cursor, query, params or ())
+        except Exception as e:
+            code = _error_code(e)
+            if code == ER_UNKNOWN_STMT_HANDLER:
+                # Reconnected after a failed ping: prepare again on the new session
+                self._forget(connection)
+                return self._execute_prepared(connection, cursor, query, params or ())
+            if code == ER_UNSUPPORTED_PS:
+                logger.warning(f"Query cannot be prepared, running it as text: {e}")
+                with self._lock:
+                    self._unsupported.add(query)
+                return cursor.execute(query, params)
+            raise
+
+    def _connection_statements(self, connection):
+        with self._lock:
+            statements = self._statements.get(connection)
+            if statements is None:
+                statements = self._statements[connection] = OrderedDict()
+            return statements
+
+    def _forget(self, connection):
+        with self._lock:
+            self._statements.pop(connection, None)
+
+    def _execute_prepared(self, connection, cursor, query, params):
+        statements = self._connection_statements(connection)
+        name = statements.get(query)
+        if name is None:
+            name = f"s{next(self._names)}"
+            # The server expects ? placeholders; the SQL text itself is sent as a literal
+            server_query = query.replace("%s", "?").replace("%%", "%")
+            cursor.execute(f"PREPARE {name} FROM %s", (server_query,))
+            statements[query] = name
+            with self._lock:
+                self._prepares += 1
+            if len(statements) > settings.MYSQL_PREPARED_CACHE_SIZE:
+                _, evicted = statements.popitem(last=False)
+                cursor.execute(f"DEALLOCATE PREPARE {evicted}")
+        else:
+            statements.move_to_end(query)
+        if params:
+            variables = [f"@{name}_{i}" for i in range(len(params))]
+            cursor.execute(
+                "SET " + ", ".join(f"{variable} = %s" for variable in variables), tuple(params)
+            )
+            result = cursor.execute(f"EXECUTE {name} USING " + ", ".join(variables))
+        else:
+            result = cursor.execute(f"EXECUTE {name}")
+        with self._lock:
+            self._executions += 1
+        return result
+
+    def stats(self):
+        """
+        Get prepared statement counters.
+
+        Returns:
+            dict: enabled flag, connections, statements, prepares and executions.
+        """
+        with self._lock:
+            statements = list(self._statements.values())
+            return {
+                "enabled": settings.MYSQL_PREPARED_STATEMENTS,
+                "connections": len(statements),
+                "statements": sum(len(names) for names in statements),
+                "prepares": self._prepares,
+                "executions": self._executions,
+            }
+
+
+prepared_statements = PreparedStatementCache()
@@ -0,0 +1,381 @@
+# Time-bucketed search statistics: one document per (hour or day, normalized query,
+# search_type), updated incrementally when the search log is written
+from datetime import datetime, timedelta, timezone
+import logging
+
+from db_connector import collection_name
+from instrumentation import instrumentation
+from query_stats import normalize_query
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+rollup_collection_name = settings.MONGO_ROLLUP_COLLECTION
+_indexes_ready = False
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Window name -> (length, bucket granularity answering it)
+WINDOWS = {
+    "hour": (timedelta(hours=1), "hour"),
+    "day": (timedelta(days=1), "hour"),
+    "week": (timedelta(days=7), "day"),
+}
+
+
+def bucket_start(timestamp, granularity):
+    """
+    Get the start of the bucket containing a timestamp.
+
+    Args:
+        timestamp (datetime): Event time; naive values are taken as UTC.
+        granularity (str): 'hour' or 'day'.
+
+    Returns:
+        datetime: Naive UTC bucket start (as MongoDB returns dates).
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        start = start.replace(hour=0)
+    return start
+
+
+def window_start(window, now=None):
+    """
+    Get the first bucket of a window. Windows are answered with whole buckets,
+    so they start up to one bucket earlier than now - length.
+
+    Args:
+        window (str): 'hour', 'day' or 'week'.
+        now (datetime, optional): End of the window; defaults to the current time.
+
+    Returns:
+        tuple: (granularity, naive UTC start of the first bucket)
+    Raises:
+        ValueError: If the window is unknown.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window: {window} (expected one of {', '.join(WINDOWS)})")
+    length, granularity = WINDOWS[window]
+    now = now or datetime.now(timezone.utc)
+    return granularity, bucket_start(now - length, granularity)
+
+
+def ensure_rollup_indexes(mongo_db):
+    """
+    Create the indexes used by the rollup collection (once per process).
+    Hourly buckets expire after ROLLUP_HOURLY_RETENTION_DAYS, daily buckets are kept.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    from pymongo import ASCENDING
+
+    rollups = mongo_db[rollup_collection_name]
+    rollups.create_index(
+        [
+            ("granularity", ASCENDING),
+            ("bucket", ASCENDING),
+            ("query_norm", ASCENDING),
+            ("search_type", ASCENDING),
+        ],
+        unique=True,
+    )
+    rollups.create_index(
+        [("bucket", ASCENDING)],
+        expireAfterSeconds=int(settings.ROLLUP_HOURLY_RETENTION_DAYS * 86400),
+        partialFilterExpression={"granularity": "hour"},
+    )
+    _indexes_ready = True
+
+
+def group_rollups(entries):
+    """
+    Aggregate log entries into hourly and daily buckets.
+
+    Args:
+        entries (iterable): Log entries with query, search_type, timestamp, results_count.
+
+    Returns:
+        dict: (granularity, bucket, query_norm, search_type) ->
+            {"query", "count", "zero_results", "results_sum"}
+    """
+    grouped = {}
+    for entry in entries:
+        results = entry.get("results_count") or 0
+        query_norm = normalize_query(entry["query"])
+        for granularity in GRANULARITIES:
+            key = (
+                granularity,
+                bucket_start(entry["timestamp"], granularity),
+                query_norm,
+                entry.get("search_type"),
+            )
+            item = grouped.get(key)
+            if item is None:
+                grouped[key] = item = {
+                    "query": entry["query"],
+                    "count": 0,
+                    "zero_results": 0,
+                    "results_sum": 0,
+                }
+            item["count"] += 1
+            item["zero_results"] += 0 if results else 1
+            item["results_sum"] += results
+            item["query"] = entry["query"]
+    return grouped
+
+
+def update_query_rollups(mongo_db, entries):
+    """
+    Apply a batch of log entries to the hourly and daily buckets with upserts.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+        entries (list): Log entries with query, search_type, timestamp, results_count.
+    """
+    if not entries:
+        return
+    from pymongo import UpdateOne
+
+    ensure_rollup_indexes(mongo_db)
+    operations = [
+        UpdateOne(
+            {
+                "granularity": granularity,
+                "bucket": bucket,
+                "query_norm": query_norm,
+                "search_type": search_type,
+            },
+            {
+                "$inc": {
+                    "count": item["count"],
+                    "zero_results": item["zero_results"],
+                    "results_sum": item["results_sum"],
+                },
+                "$set": {"query": item["query"]},
+            },
+            upsert=True,
+        )
+        for (granularity, bucket, query_norm, search_type), item in group_rollups(
+            entries
+        ).items()
+    ]
+    with instrumentation.measure(
+        "mongo", f"{rollup_collection_name}.bulk_write(upsert)"
+    ) as probe:
+        mongo_db[rollup_collection_name].bulk_write(operations, ordered=False)
+        probe["rows"] = len(operations)
+
+
+def summarize_counts(count, zero_results, results_sum):
+    """
+    Derive the zero-result rate and the mean number of results from bucket sums.
+
+    Returns:
+        dict: count, zero_results, zero_result_rate and mean_results.
+    """
+    return {
+        "count": count,
+        "zero_results": zero_results,
+        "zero_result_rate": round(zero_results / count, 4) if count else 0.0,
+        "mean_results": round(results_sum / count, 2) if count else 0.0,
+    }
+
+
+def get_window_top_queries(mongo_db, window, limit):
+    """
+    Rank the queries of a time window by number of searches.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+        window (str): 'hour', 'day' or 'week'.
+        limit (int): Maximum number of queries.
+
+    Returns:
+        list: Dicts with query, search_type, count, zero_results,
+            zero_result_rate and mean_results, most searched first.
+    """
+    granularity, since = window_start(window)
+    pipeline = [
+        {"$match": {"granularity": granularity, "bucket": {"$gte": since}}},
+        {
+            "$group": {
+                "_id": {"query_norm": "$query_norm", "search_type": "$search_type"},
+                "count": {"$sum": "$count"},
+                "zero_results": {"$sum": "$zero_results"},
+                "results_sum": {"$sum": "$results_sum"},
+                # Spelling of the latest bucket
+                "last": {"$max": {"bucket": "$bucket", "query": "$query"}},
+            }
+        },
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ]
+    with instrumentation.measure(
+        "mongo", f"{rollup_collection_name}.aggregate(top {granularity})"
+    ) as probe:
+        groups = list(mongo_db[rollup_collection_name].aggregate(pipeline))
+        probe["rows"] = len(groups)
+    return [
+        dict(
+            {"query": doc["last"]["query"], "search_type": doc["_id"]["search_type"]},
+            **summarize_counts(doc["count"], doc["zero_results"], doc["results_sum"]),
+        )
+        for doc in groups
+    ]
+
+
+def get_window_summary(mongo_db, window):
+    """
+    Get the number of searches, zero-result rate and mean results_count of a
+    time window, overall and per search type.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+        window (str): 'hour', 'day' or 'week'.
+
+    Returns:
+        dict: count, zero_results, zero_result_rate, mean_results and by_type
+            (search_type -> the same counters).
+    """
+    granularity, since = window_start(window)
+    pipeline = [
+        {"$match": {"granularity": granularity, "bucket": {"$gte": since}}},
+        {
+            "$group": {
+                "_id": "$search_type",
+                "count": {"$sum": "$count"},
+                "zero_results": {"$sum": "$zero_results"},
+                "results_sum": {"$sum": "$results_sum"},
+            }
+        },
+    ]
+    with instrumentation.measure(
+        "mongo", f"{rollup_collection_name}.aggregate(summary {granularity})"
+    ) as probe:
+        groups = list(mongo_db[rollup_collection_name].aggregate(pipeline))
+        probe["rows"] = len(groups)
+    return summarize_groups(
+        (doc["_id"], doc["count"], doc["zero_results"], doc["results_sum"]) for doc in groups
+    )
+
+
+def summarize_groups(groups):
+    """
+    Build a window summary from per-search-type totals.
+
+    Args:
+        groups (iterable): (search_type, count, zero_results, results_sum) tuples.
+
+    Returns:
+        dict: count, zero_results, zero_result_rate, mean_results and by_type.
+    """
+    by_type = {}
+    totals = [0, 0, 0]
+    for search_type, count, zero_results, results_sum in groups:
+        by_type[search_type] = summarize_counts(count, zero_results, results_sum)
+        totals[0] += count
+        totals[1] += zero_results
+        totals[2] += results_sum
+    return dict(summarize_counts(*totals), by_type=by_type)
+
+
+def backfill_query_rollups(mongo_db):
+    """
+    Rebuild the rollup collection from the raw search log.
+    Hourly buckets are aggregated by MongoDB, daily buckets summed from them;
+    the result is written to a temporary collection and swapped in atomically.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+
+    Returns:
+        int: Number of bucket documents written.
+    """
+    pipeline = [
+        {
+            "$group": {
+                "_id": {
+                    "query": {"$toLower": "$query"},
+                    "search_type": "$search_type",
+                    "bucket": {
+                        "$dateFromParts": {
+                            "year": {"$year": "$timestamp"},
+                            "month": {"$month": "$timestamp"},
+                            "day": {"$dayOfMonth": "$timestamp"},
+                            "hour": {"$hour": "$timestamp"},
+                        }
+                    },
+                },
+                "count": {"$sum": 1},
+                "zero_results": {
+                    "$sum": {"$cond": [{"$gt": [{"$ifNull": ["$results_count", 0]}, 0]}, 0, 1]}
+                },
+                "results_sum": {"$sum": {"$ifNull": ["$results_count", 0]}},
+                "last": {"$max": {"timestamp": "$timestamp", "query": "$query"}},
+            }
+        }
+    ]
+    with instrumentation.measure("mongo", f"{collection_name}.aggregate($group hour)") as probe:
+        groups = list(mongo_db[collection_name].aggregate(pipeline, allowDiskUse=True))
+        probe["rows"] = len(groups)
+
+    cutoff = bucket_start(
+        datetime.now(timezone.utc) - timedelta(days=settings.ROLLUP_HOURLY_RETENTION_DAYS),
+        "hour",
+    )
+    grouped = {}
+    for doc in groups:
+        query_norm = normalize_query(doc["_id"]["query"])
+        hour = doc["_id"]["bucket"]
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(hour, granularity)
+            if granularity == "hour" and bucket < cutoff:
+                continue
+            key = (granularity, bucket, query_norm, doc["_id"]["search_type"])
+            item = grouped.get(key)
+            if item is None:
+                grouped[key] = item = {
+                    "count": 0,
+                    "zero_results": 0,
+                    "results_sum": 0,
+                    "last": doc["last"],
+                }
+            item["count"] += doc["count"]
+            item["zero_results"] += doc["zero_results"]
+            item["results_sum"] += doc["results_sum"]
+            if doc["last"]["timestamp"] > item["last"]["timestamp"]:
+                item["last"] = doc["last"]
+
+    temp_name = f"{rollup_collection_name}_rebuild"
+    temp = mongo_db[temp_name]
+    temp.drop()
+    documents = [
+        {
+            "granularity": granularity,
+            "bucket": bucket,
+            "query_norm": query_norm,
+            "search_type": search_type,
+            "query": item["last"]["query"],
+            "count": item["count"],
+            "zero_results": item["zero_results"],
+            "results_sum": item["results_sum"],
+        }
+        for (granularity, bucket, query_norm, search_type), item in grouped.items()
+    ]
+    if documents:
+        temp.insert_many(documents)
+    else:
+        mongo_db.create_collection(temp_name)
+    temp.rename(rollup_collection_name, dropTarget=True)
+
+    global _indexes_ready
+    _indexes_ready = False
+    ensure_rollup_indexes(mongo_db)
+    logger.info(f"Backfilled query rollups: {len(documents)} buckets")
+    return len(documents)
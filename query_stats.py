@@ -0,0 +1,274 @@
+# Pre-aggregated search statistics: one document per (normalized query, search_type),
+# updated incrementally when the search log is written
+from datetime import timedelta
+import logging
+
+from db_connector import collection_name
+from instrumentation import instrumentation
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+stats_collection_name = settings.MONGO_STATS_COLLECTION
+_indexes_ready = False
+# Autocomplete scores only look this many half-lives back
+DECAY_WINDOW = 10
+
+
+def normalize_query(query):
+    """
+    Normalize a query text for grouping: lower case, collapsed whitespace.
+
+    Args:
+        query (str): Query text.
+
+    Returns:
+        str: Normalized query.
+    """
+    return " ".join(str(query).lower().split())
+
+
+def ensure_stats_indexes(mongo_db):
+    """
+    Create the indexes used by the stats collection (once per process).
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+    """
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    from pymongo import ASCENDING, DESCENDING
+
+    stats = mongo_db[stats_collection_name]
+    stats.create_index(
+        [("query_norm", ASCENDING), ("search_type", ASCENDING)], unique=True
+    )
+    stats.create_index([("count", DESCENDING)])
+    stats.create_index([("last_searched", DESCENDING)])
+    _indexes_ready = True
+
+
+def update_query_stats(mongo_db, entries):
+    """
+    Apply a batch of log entries to the stats collection with upserts.
+    Entries are pre-aggregated per key so each key costs one update. The update
+    is a pipeline: query and results_count are only replaced by entries at
+    least as recent as last_searched, so replaying an older spilled batch
+    after a newer one does not leave stale values next to a newer timestamp.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+        entries (list): Log entries with query, search_type, timestamp, results_count.
+    """
+    if not entries:
+        return
+    from pymongo import UpdateOne
+
+    ensure_stats_indexes(mongo_db)
+    grouped = {}
+    for entry in entries:
+        key = (normalize_query(entry["query"]), entry.get("search_type"))
+        item = grouped.get(key)
+        if item is None:
+            grouped[key] = item = {"count": 0, "last": entry}
+        item["count"] += 1
+        if entry["timestamp"] >= item["last"]["timestamp"]:
+            item["last"] = entry
+    operations = []
+    for (query_norm, search_type), item in grouped.items():
+        timestamp = item["last"]["timestamp"]
+        # All expressions of one $set stage see the document before the update
+        is_latest = {"$gte": [timestamp, "$last_searched"]}
+        operations.append(
+            UpdateOne(
+                {"query_norm": query_norm, "search_type": search_type},
+                [
+                    {
+                        "$set": {
+                            "count": {"$add": [{"$ifNull": ["$count", 0]}, item["count"]]},
+                            "last_searched": {"$max": ["$last_searched", timestamp]},
+                            # $literal: a query text starting with $ is not a field path
+                            "query": {
+                                "$cond": [
+                                    is_latest,
+                                    {"$literal": item["last"]["query"]},
+                                    "$query",
+                                ]
+                            },
+                            "results_count": {
+                                "$cond": [
+                                    is_latest,
+                                    {"$literal": item["last"].get("results_count")},
+                                    "$results_count",
+                                ]
+                            },
+                        }
+                    }
+                ],
+                upsert=True,
+            )
+        )
+    with instrumentation.measure(
+        "mongo", f"{stats_collection_name}.bulk_write(upsert)"
+    ) as probe:
+        mongo_db[stats_collection_name].bulk_write(operations, ordered=False)
+        probe["rows"] = len(operations)
+
+
+def get_top_query_stats(mongo_db, sort_field, limit):
+    """
+    Read the top queries from the stats collection using its indexes.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+        sort_field (str): 'count' or 'last_searched'.
+        limit (int): Maximum number of queries to return.
+
+    Returns:
+        list: Queries in the search log report format (_id, count, search_type, last_searched).
+    """
+    from pymongo import DESCENDING
+
+    with instrumentation.measure(
+        "mongo", f"{stats_collection_name}.find().sort({sort_field})"
+    ) as probe:
+        cursor = (
+            mongo_db[stats_collection_name]
+            .find({}, {"_id": 0, "query": 1, "count": 1, "search_type": 1, "last_searched": 1})
+            .sort(sort_field, DESCENDING)
+            .limit(limit)
+        )
+        results = [
+            {
+                "_id": doc["query"],
+                "count": doc["count"],
+                "search_type": doc.get("search_type"),
+                "last_searched": doc.get("last_searched"),
+            }
+            for doc in cursor
+        ]
+        probe["rows"] = len(results)
+    return results
+
+
+def get_decayed_query_scores(mongo_db, landmark, half_life, limit):
+    """
+    Score the logged queries with forward exponential decay (for autocomplete).
+    A search at time t weighs 2 ** ((t - landmark) / half_life). Searches without
+    results and searches older than DECAY_WINDOW half-lives (weight below 0.1 %)
+    are skipped.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+        landmark (datetime): Reference time of the weights (UTC).
+        half_life (float): Half-life of a search in seconds.
+        limit (int): Maximum number of queries to return (best first).
+
+    Returns:
+        list: Dicts with query (latest spelling), search_type and score.
+    """
+    since = landmark - timedelta(seconds=half_life * DECAY_WINDOW)
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": since}, "results_count": {"$gt": 0}}},
+        {
+            "$group": {
+                "_id": {"query": {"$toLower": "$query"}, "search_type": "$search_type"},
+                "score": {
+                    "$sum": {
+                        "$pow": [
+                            2,
+                            {
+                                "$divide": [
+                                    {"$subtract": ["$timestamp", landmark]},
+                                    half_life * 1000,
+                                ]
+                            },
+                        ]
+                    }
+                },
+                "last": {"$max": {"timestamp": "$timestamp", "query": "$query"}},
+            }
+        },
+        {"$sort": {"score": -1}},
+        {"$limit": limit},
+    ]
+    with instrumentation.measure("mongo", f"{collection_name}.aggregate(decay)") as probe:
+        groups = list(mongo_db[collection_name].aggregate(pipeline, allowDiskUse=True))
+        probe["rows"] = len(groups)
+    return [
+        {
+            "query": doc["last"]["query"],
+            "search_type": doc["_id"]["search_type"],
+            "score": doc["score"],
+        }
+        for doc in groups
+    ]
+
+
+def rebuild_query_stats(mongo_db):
+    """
+    Rebuild the stats collection from the raw search log (backfill).
+    The new stats are written to a temporary collection and swapped in atomically.
+
+    Args:
+        mongo_db (Database): MongoDB database object.
+
+    Returns:
+        int: Number of stats documents written.
+    """
+    pipeline = [
+        {
+            "$group": {
+                "_id": {"query": {"$toLower": "$query"}, "search_type": "$search_type"},
+                "count": {"$sum": 1},
+                # Documents compare field by field: latest timestamp wins
+                "last": {
+                    "$max": {
+                        "timestamp": "$timestamp",
+                        "query": "$query",
+                        "results_count": "$results_count",
+                    }
+                },
+            }
+        }
+    ]
+    with instrumentation.measure("mongo", f"{collection_name}.aggregate($group)") as probe:
+        groups = list(mongo_db[collection_name].aggregate(pipeline, allowDiskUse=True))
+        probe["rows"] = len(groups)
+    grouped = {}
+    for doc in groups:
+        key = (normalize_query(doc["_id"]["query"]), doc["_id"]["search_type"])
+        item = grouped.get(key)
+        if item is None:
+            grouped[key] = {"count": doc["count"], "last": doc["last"]}
+            continue
+        item["count"] += doc["count"]
+        if doc["last"]["timestamp"] > item["last"]["timestamp"]:
+            item["last"] = doc["last"]
+
+    temp_name = f"{stats_collection_name}_rebuild"
+    temp = mongo_db[temp_name]
+    temp.drop()
+    documents = [
+        {
+            "query_norm": query_norm,
+            "search_type": search_type,
+            "query": item["last"]["query"],
+            "count": item["count"],
+            "last_searched": item["last"]["timestamp"],
+            "results_count": item["last"].get("results_count"),
+        }
+        for (query_norm, search_type), item in grouped.items()
+    ]
+    if documents:
+        temp.insert_many(documents)
+    else:
+        mongo_db.create_collection(temp_name)
+    temp.rename(stats_collection_name, dropTarget=True)
+
+    global _indexes_ready
+    _indexes_ready = False
+    ensure_stats_indexes(mongo_db)
+    logger.info(f"Rebuilt query stats: {len(documents)} documents")
+    return len(documents)
@@ -0,0 +1,85 @@
+# Reference data (genres, year range) loaded once in the background and served from memory
+import logging
+
+from background import BackgroundRefresher
+from mysql_controler import get_all_genres, get_year_range
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceData(BackgroundRefresher):
+    """
+    In-memory store for rarely changing lookups.
+    Values are loaded by a background thread at startup and refreshed every
+    REFERENCE_REFRESH_INTERVAL seconds; a failed refresh keeps the previous value.
+    """
+
+    thread_name = "reference-data"
+
+    def __init__(self, loaders):
+        super().__init__()
+        self._loaders = loaders
+        self._values = {}
+
+    @property
+    def interval(self):
+        return settings.REFERENCE_REFRESH_INTERVAL
+
+    def refresh(self):
+        """
+        Reload all reference values from the database.
+        """
+        for name, loader in self._loaders.items():
+            try:
+                value = loader()
+            except Exception as e:
+                logger.error(f"Error loading reference data '{name}': {e}")
+                continue
+            if value:
+                self._values[name] = value
+            else:
+                logger.warning(f"Reference data '{name}' is empty, keeping previous value")
+        self._ready.set()
+
+    def get(self, name):
+        """
+        Get a reference value from memory.
+        Waits for the startup load (up to REFERENCE_LOAD_TIMEOUT seconds) and loads
+        synchronously only if the background load has not produced the value.
+
+        Args:
+            name (str): Reference value name.
+
+        Returns:
+            Loaded value or None.
+        """
+        if name not in self._values:
+            self.start()
+            self.wait_ready(settings.REFERENCE_LOAD_TIMEOUT)
+            if name not in self._values:
+                self.refresh()
+        return self._values.get(name)
+
+
+reference_data = ReferenceData({"genres": get_all_genres, "year_range": get_year_range})
+
+
+def get_genres():
+    """
+    Get the list of genre names from memory.
+
+    Returns:
+        list: Genre names (str).
+    """
+    return reference_data.get("genres") or []
+
+
+def get_cached_year_range():
+    """
+    Get the minimum and maximum film year from memory.
+
+    Returns:
+        dict or None: Dictionary with 'min_year' and 'max_year'.
+    """
+    return reference_data.get("year_range")
@@ -0,0 +1,192 @@
+# In-memory cache for search results with LRU eviction and per-entry TTL
+from collections import OrderedDict
+import functools
+import inspect
+import threading
+import time
+
+
+def key_value(value, lowercase=False):
+    """
+    Convert a search parameter to a hashable cache key part.
+    Values are kept exact: the SQL may compare them case- or space-sensitively
+    (LIKE patterns, JSON MEMBER OF). Only arguments the controller lower-cases
+    itself before binding may be folded.
+
+    Args:
+        value: Parameter value.
+        lowercase (bool): Lower-case strings (the controller ignores their case).
+
+    Returns:
+        Hashable value.
+    """
+    if isinstance(value, str):
+        return value.lower() if lowercase else value
+    if isinstance(value, dict):
+        return tuple(sorted((key, key_value(item, lowercase)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(key_value(item, lowercase) for item in value)
+    return value
+
+
+def _result_weight(value):
+    """
+    Approximate memory weight of a cached value: number of rows.
+    """
+    rows = getattr(value, "rows", value)
+    try:
+        return max(len(rows), 1)
+    except TypeError:
+        return 1
+
+
+def _is_empty(value):
+    """
+    Empty results are not cached: controllers also return them on errors.
+    """
+    rows = getattr(value, "rows", value)
+    return not rows
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+    Size is bounded both by the number of entries and by the total number of
+    cached rows. Keys are (search type, function name, parameters).
+    """
+
+    def __init__(self, max_entries=1000, max_rows=50000, ttl=300.0, enabled=True):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (expires at, weight, value)
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Args:
+            key (tuple): Cache key.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[2]
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """
+        Store a value, evicting least recently used entries over the bounds.
+
+        Args:
+            key (tuple): Cache key.
+            value: Result to cache (treated as read-only afterwards).
+        """
+        weight = _result_weight(value)
+        if weight > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, weight, value)
+            self._rows += weight
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, weight, _ = self._entries.pop(key)
+        self._rows -= weight
+
+    def invalidate(self, search_type=None):
+        """
+        Drop cached entries.
+
+        Args:
+            search_type (str, optional): Only drop entries of this search type;
+                all entries if omitted.
+
+        Returns:
+            int: Number of dropped entries.
+        """
+        with self._lock:
+            if search_type is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._rows = 0
+                return count
+            keys = [key for key in self._entries if key[0] == search_type]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, entries and rows.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "rows": self._rows,
+            }
+
+    def cached(self, search_type, lowercase_args=()):
+        """
+        Decorator caching a search function by its arguments.
+
+        Args:
+            search_type (str): Search type used for the key and for invalidation.
+            lowercase_args (tuple): Arguments whose case the function ignores
+                (it lower-cases them before binding); all others are keyed exactly.
+        """
+
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (
+                    search_type,
+                    func.__name__,
+                    tuple(
+                        (name, key_value(value, name in lowercase_args))
+                        for name, value in bound.arguments.items()
+                    ),
+                )
+                hit, value = self.get(key)
+                if hit:
+                    return value
+                value = func(*args, **kwargs)
+                if not _is_empty(value):
+                    self.put(key, value)
+                return value
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,149 @@
+# Compact query results: column names stored once, rows kept as plain tuples
+from array import array
+from collections.abc import Mapping
+
+
+class Row(Mapping):
+    """
+    Read-only dict-like view of one result row.
+    Shares the column index of its ResultSet, so a row costs one small object
+    on top of its tuple. Views are created on access and not stored.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def values(self):
+        return self._values
+
+    def to_dict(self):
+        """
+        Copy the row into a plain dict (e.g. for JSON serialization).
+        """
+        return dict(zip(self._index, self._values))
+
+    def __repr__(self):
+        return f"Row({self.to_dict()!r})"
+
+
+class ResultSet:
+    """
+    Rows of a query result as tuples with the column names stored once.
+    Iterating or indexing yields Row views, so callers written for dict rows
+    (row["title"], row.get(...), row.values()) keep working; tuples() gives
+    the raw rows for hot paths.
+    """
+
+    __slots__ = ("columns", "rows", "_index")
+
+    def __init__(self, columns=(), rows=None):
+        """
+        Args:
+            columns (iterable): Column names in row order.
+            rows (list, optional): Row tuples.
+        """
+        self.columns = tuple(columns)
+        self.rows = rows if rows is not None else []
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        """
+        Fetch all rows of an executed tuple cursor.
+
+        Args:
+            cursor: DB-API cursor after execute().
+
+        Returns:
+            ResultSet: All remaining rows of the cursor.
+        """
+        columns = [desc[0] for desc in cursor.description or ()]
+        return cls(columns, list(cursor.fetchall()))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def __iter__(self):
+        index = self._index
+        return (Row(index, values) for values in self.rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            result = ResultSet.__new__(ResultSet)
+            result.columns, result.rows, result._index = self.columns, self.rows[item], self._index
+            return result
+        return Row(self._index, self.rows[item])
+
+    def __repr__(self):
+        return f"ResultSet(columns={self.columns!r}, rows={len(self.rows)})"
+
+    def tuples(self):
+        """
+        Get the raw rows.
+
+        Returns:
+            list: Row tuples in column order.
+        """
+        return self.rows
+
+    def to_dicts(self):
+        """
+        Copy the rows into dicts (e.g. for JSON serialization).
+
+        Returns:
+            list: One dict per row.
+        """
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in self.rows]
+
+    def column(self, name, typecode=None):
+        """
+        Get the values of one column.
+
+        Args:
+            name (str): Column name.
+            typecode (str, optional): array typecode (e.g. "l", "d") to pack a
+                numeric column into an array.array instead of a list.
+
+        Returns:
+            list or array.array: Column values in row order.
+        """
+        i = self._index[name]
+        values = [row[i] for row in self.rows]
+        return array(typecode, values) if typecode else values
+
+    def without(self, names):
+        """
+        Drop columns (e.g. helper columns used for pagination).
+
+        Args:
+            names (iterable): Column names to drop; unknown names are ignored.
+
+        Returns:
+            ResultSet: New result set with the remaining columns.
+        """
+        drop = set(names)
+        keep = [i for i, name in enumerate(self.columns) if name not in drop]
+        if len(keep) == len(self.columns):
+            return self
+        columns = [self.columns[i] for i in keep]
+        if keep == list(range(len(keep))):
+            # Dropped columns are at the end: slice instead of picking items
+            width = len(keep)
+            return ResultSet(columns, [values[:width] for values in self.rows])
+        return ResultSet(columns, [tuple(values[i] for i in keep) for values in self.rows])
@@ -0,0 +1,329 @@
+# Schema and index verifier: EXPLAIN of the search queries, index inspection and migration DDL
+import logging
+
+from pymongo import ASCENDING, DESCENDING
+
+from db_connector import (
+    check_mongo_availability,
+    collection_name,
+    initialize_mongo,
+    mongo_health,
+    mysql_connection,
+)
+from mysql_controler import TITLE_FULLTEXT_INDEX, build_search_query, get_head_row_from_mysql
+from query_rollups import rollup_collection_name
+from query_stats import stats_collection_name
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# MySQL indexes the search queries rely on: (table, columns, index name, kind).
+# An existing index satisfies a requirement if its leading columns match.
+MYSQL_INDEXES = [
+    ("film_category", ("category_id",), "idx_film_category_category_id", "BTREE"),
+    ("film", ("release_year",), "idx_film_release_year", "BTREE"),
+    ("category", ("name",), "idx_category_name", "BTREE"),
+    ("actor", ("last_name",), "idx_actor_last_name", "BTREE"),
+    ("actor", ("first_name",), "idx_actor_first_name", "BTREE"),
+    ("film_actor", ("film_id",), "idx_film_actor_film_id", "BTREE"),
+    ("film_text", ("title",), TITLE_FULLTEXT_INDEX, "FULLTEXT"),
+]
+
+# MongoDB indexes: (collection, keys); the stats and rollup indexes are also created
+# by query_stats and query_rollups
+MONGO_INDEXES = [
+    (collection_name, [("query", ASCENDING)]),
+    (collection_name, [("timestamp", DESCENDING)]),
+    (stats_collection_name, [("query_norm", ASCENDING), ("search_type", ASCENDING)]),
+    (stats_collection_name, [("count", DESCENDING)]),
+    (stats_collection_name, [("last_searched", DESCENDING)]),
+    (
+        rollup_collection_name,
+        [
+            ("granularity", ASCENDING),
+            ("bucket", ASCENDING),
+            ("query_norm", ASCENDING),
+            ("search_type", ASCENDING),
+        ],
+    ),
+]
+
+# Representative parameters for EXPLAIN of each search query
+CANNED_SEARCHES = [
+    ("title", {"keyword": "academy", "mode": "fulltext"}),
+    ("title", {"keyword": "academy", "mode": "substring"}),
+    ("genre_year", {"genre": "Action", "year_from": 2000, "year_to": 2010}),
+    ("actor", {"actor": "john"}),
+]
+
+
+def get_mysql_indexes(table):
+    """
+    Read the indexes of a MySQL table.
+
+    Args:
+        table (str): Table name.
+
+    Returns:
+        dict: index name -> {"columns": tuple of columns in index order, "kind": index type}
+    """
+    rows, _ = get_head_row_from_mysql(f"SHOW INDEX FROM `{table}`")
+    indexes = {}
+    for row in sorted(rows, key=lambda r: (r["Key_name"], r["Seq_in_index"])):
+        index = indexes.setdefault(row["Key_name"], {"columns": (), "kind": row["Index_type"]})
+        index["columns"] += (row["Column_name"],)
+    return indexes
+
+
+def _has_index(indexes, columns, kind):
+    for index in indexes.values():
+        if kind == "FULLTEXT":
+            if index["kind"] == "FULLTEXT" and index["columns"] == columns:
+                return True
+        elif index["kind"] != "FULLTEXT" and index["columns"][: len(columns)] == columns:
+            return True
+    return False
+
+
+def mysql_index_ddl(table, columns, name, kind):
+    """
+    Build the DDL creating a missing MySQL index.
+
+    Returns:
+        str: ALTER TABLE statement.
+    """
+    fulltext = "FULLTEXT " if kind == "FULLTEXT" else ""
+    column_list = ", ".join(f"`{column}`" for column in columns)
+    return f"ALTER TABLE `{table}` ADD {fulltext}INDEX `{name}` ({column_list})"
+
+
+def check_mysql_indexes():
+    """
+    Compare the MySQL indexes with MYSQL_INDEXES.
+    If the indexes of a table cannot be read, all its expected indexes are
+    reported as missing with the error, so the check does not pass silently.
+
+    Returns:
+        list: Missing indexes as dicts with table, columns, name, kind, ddl
+            and error (None, or why the table's indexes could not be read).
+    """
+    missing = []
+    indexes_by_table = {}
+    errors = {}
+    for table, columns, name, kind in MYSQL_INDEXES:
+        if table not in indexes_by_table:
+            try:
+                indexes_by_table[table] = get_mysql_indexes(table)
+            except Exception as e:
+                logger.error(f"Error reading indexes of table {table}: {e}")
+                indexes_by_table[table] = None
+                errors[table] = str(e)
+        indexes = indexes_by_table[table]
+        if indexes is not None and _has_index(indexes, columns, kind):
+            continue
+        missing.append(
+            {
+                "table": table,
+                "columns": list(columns),
+                "name": name,
+                "kind": kind,
+                "ddl": mysql_index_ddl(table, columns, name, kind),
+                "error": errors.get(table),
+            }
+        )
+    return missing
+
+
+def explain_search_queries():
+    """
+    Run EXPLAIN on the canned search queries and flag full scans and filesorts.
+
+    Returns:
+        list: One dict per search with search_type, params, plan rows and problems.
+    """
+    reports = []
+    for search_type, params in CANNED_SEARCHES:
+        report = {"search_type": search_type, "params": params, "plan": [], "problems": []}
+        try:
+            query, query_params = build_search_query(search_type, params)
+            plan, _ = get_head_row_from_mysql("EXPLAIN " + query, query_params)
+        except Exception as e:
+            report["problems"].append(f"EXPLAIN failed: {e}")
+            reports.append(report)
+            continue
+        for row in plan:
+            extra = row.get("Extra") or ""
+            step = {
+                "table": row.get("table"),
+                "type": row.get("type"),
+                "key": row.get("key"),
+                "rows": row.get("rows"),
+                "extra": extra,
+            }
+            report["plan"].append(step)
+            if step["type"] == "ALL":
+                report["problems"].append(
+                    f"full scan of {step['table']} (~{step['rows']} rows)"
+                )
+            if "Using filesort" in extra:
+                report["problems"].append(f"filesort on {step['table']}")
+        reports.append(report)
+    return reports
+
+
+def check_mongo_indexes():
+    """
+    Compare the MongoDB indexes with MONGO_INDEXES.
+    Runs once at startup or from the CLI, so it waits for the first health
+    probe instead of reading a state that is not known yet.
+
+    Returns:
+        list: Missing indexes as dicts with collection, keys and ddl (mongo shell command),
+            or None if MongoDB is not available.
+    """
+    mongo_health.start()
+    mongo_health.wait_ready(settings.MONGO_TIMEOUT_MS / 1000 + 1)
+    if not check_mongo_availability():
+        return None
+    mongo_db = initialize_mongo()
+    missing = []
+    existing_by_collection = {}
+    for collection, keys in MONGO_INDEXES:
+        if not collection:
+            continue
+        if collection not in existing_by_collection:
+            existing_by_collection[collection] = [
+                [
+                    (field, int(direction) if isinstance(direction, (int, float)) else direction)
+                    for field, direction in info["key"]
+                ]
+                for info in mongo_db[collection].index_information().values()
+            ]
+        if any(index[: len(keys)] == keys for index in existing_by_collection[collection]):
+            continue
+        spec = ", ".join(f'"{field}": {direction}' for field, direction in keys)
+        missing.append(
+            {
+                "collection": collection,
+                "keys": keys,
+                "ddl": f"db.{collection}.createIndex({{{spec}}})",
+            }
+        )
+    return missing
+
+
+def verify_schema(apply=False):
+    """
+    Verify the MySQL and MongoDB indexes and the plans of the search queries.
+
+    Args:
+        apply (bool): Create the missing indexes.
+
+    Returns:
+        dict: mysql_missing, mongo_missing (None if MongoDB is unavailable),
+            explain and applied (DDL statements executed).
+    """
+    report = {
+        "mysql_missing": check_mysql_indexes(),
+        "mongo_missing": check_mongo_indexes(),
+        "explain": [],
+        "applied": [],
+    }
+    if apply:
+        report["applied"] = apply_missing_indexes(report)
+        report["mysql_missing"] = check_mysql_indexes()
+        report["mongo_missing"] = check_mongo_indexes()
+    # Explain after applying so the plans reflect the new indexes
+    report["explain"] = explain_search_queries()
+    return report
+
+
+def apply_missing_indexes(report):
+    """
+    Create the missing indexes listed in a verify_schema report.
+
+    Args:
+        report (dict): Report returned by verify_schema.
+
+    Returns:
+        list: DDL statements executed successfully.
+    """
+    applied = []
+    for index in report["mysql_missing"]:
+        if index["error"]:
+            # Not known to be missing: the table's indexes could not be read
+            continue
+        try:
+            with mysql_connection() as connection, connection.cursor() as cursor:
+                cursor.execute(index["ddl"])
+            applied.append(index["ddl"])
+            logger.info(f"Applied: {index['ddl']}")
+        except Exception as e:
+            logger.error(f"Error applying '{index['ddl']}': {e}")
+    if report["mongo_missing"]:
+        mongo_db = initialize_mongo()
+        for index in report["mongo_missing"]:
+            try:
+                mongo_db[index["collection"]].create_index(index["keys"])
+                applied.append(index["ddl"])
+                logger.info(f"Applied: {index['ddl']}")
+            except Exception as e:
+                logger.error(f"Error applying '{index['ddl']}': {e}")
+    return applied
+
+
+def format_report(report):
+    """
+    Format a verify_schema report as text lines.
+
+    Args:
+        report (dict): Report returned by verify_schema.
+
+    Returns:
+        list: Report lines.
+    """
+    lines = []
+    for ddl in report["applied"]:
+        lines.append(f"APPLIED  {ddl}")
+    for index in report["mysql_missing"]:
+        line = f"MISSING  MySQL {index['table']}({', '.join(index['columns'])}) -> {index['ddl']};"
+        if index["error"]:
+            line += f" (indexes could not be read: {index['error']})"
+        lines.append(line)
+    if report["mongo_missing"] is None:
+        lines.append("SKIPPED  MongoDB is not available")
+    else:
+        for index in report["mongo_missing"]:
+            lines.append(f"MISSING  MongoDB {index['collection']} -> {index['ddl']}")
+    for explain in report["explain"]:
+        name = explain["search_type"]
+        if explain["params"].get("mode"):
+            name += f" ({explain['params']['mode']})"
+        status = "; ".join(explain["problems"]) if explain["problems"] else "ok"
+        lines.append(f"EXPLAIN  {name}: {status}")
+    return lines
+
+
+def has_problems(report):
+    """
+    Check whether a report lists missing indexes or problematic plans.
+    """
+    return bool(
+        report["mysql_missing"]
+        or report["mongo_missing"]
+        or any(explain["problems"] for explain in report["explain"])
+    )
+
+
+def log_schema_problems():
+    """
+    Verify the schema and log the findings (used at startup, never raises).
+    """
+    try:
+        report = verify_schema()
+    except Exception as e:
+        logger.error(f"Schema verification failed: {e}")
+        return
+    for line in format_report(report):
+        if not line.endswith(": ok"):
+            logger.warning(line)
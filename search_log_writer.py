@@ -0,0 +1,275 @@
+# Background writer for the search log: batches events into MongoDB and
+# spills them to a local JSONL file while MongoDB is unavailable
+import atexit
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from db_connector import collection_name, initialize_mongo, mongo_health
+from instrumentation import current_search_type, instrumentation
+from query_rollups import update_query_rollups
+from query_stats import update_query_stats
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue marker asking the writer thread to flush and exit
+_STOP = object()
+
+
+class SearchLogWriter:
+    """
+    Asynchronous search-log writer.
+    Events are taken from a bounded queue and written with insert_many once
+    SEARCH_LOG_BATCH_SIZE events are collected or SEARCH_LOG_FLUSH_INTERVAL
+    seconds have passed. While MongoDB is down batches are appended to the
+    spill file, which is replayed into MongoDB when it is back.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._atexit_registered = False
+
+    @property
+    def spill_path(self):
+        """
+        Path of the append-only local spill file (JSON lines).
+        """
+        return settings.SEARCH_LOG_SPILL_FILE
+
+    def start(self):
+        """
+        Start the writer thread if it is not running yet.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=settings.SEARCH_LOG_QUEUE_SIZE)
+            self._thread = threading.Thread(
+                target=self._run, name="search-log-writer", daemon=True
+            )
+            self._thread.start()
+            if not self._atexit_registered:
+                # Once per writer, not on every restart
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def submit(self, entry):
+        """
+        Queue a log entry without blocking the caller.
+        If the queue is full the entry goes straight to the spill file.
+        Args:
+            entry (dict): Log entry with query, search_type, timestamp, results_count.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Search log queue is full, spilling entry to file")
+            self._spill([entry])
+
+    def stop(self, timeout=5):
+        """
+        Flush queued entries and stop the writer thread.
+        Args:
+            timeout (float): Maximum time to wait for the flush in seconds.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.error("Search log queue is full, could not stop writer cleanly")
+                return
+        thread.join(timeout)
+
+    def _run(self):
+        current_search_type.set("search_log")
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + settings.SEARCH_LOG_FLUSH_INTERVAL
+            while len(batch) < settings.SEARCH_LOG_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Older spilled entries go first, then the new batch
+            if mongo_health.is_available():
+                self._replay_spill()
+            if batch:
+                self._write(batch)
+
+    def _insert(self, entries):
+        """
+        Insert entries into the MongoDB log collection and update the query stats
+        and the hourly/daily rollups.
+        Replayed entries carry the _id given when they were spilled; those already
+        stored by an earlier, interrupted replay are skipped, so they are not
+        counted twice.
+        Raises:
+            Exception: Any MongoDB error while inserting the raw entries.
+        """
+        mongo_db = initialize_mongo()
+        ids = [entry["_id"] for entry in entries if "_id" in entry]
+        if ids:
+            stored = {
+                doc["_id"]
+                for doc in mongo_db[collection_name].find({"_id": {"$in": ids}}, {"_id": 1})
+            }
+            entries = [entry for entry in entries if entry.get("_id") not in stored]
+            if not entries:
+                return
+        from pymongo.errors import BulkWriteError
+
+        # insert_many adds _id to the documents, keep the queued entries intact
+        with instrumentation.measure("mongo", f"{collection_name}.insert_many") as probe:
+            try:
+                mongo_db[collection_name].insert_many(
+                    [dict(entry) for entry in entries], ordered=True
+                )
+            except BulkWriteError as e:
+                # Ordered insert: the entries before the failing one are stored and
+                # will be skipped by the replay, so they are counted now
+                self._update_aggregates(mongo_db, entries[: e.details.get("nInserted", 0)])
+                raise
+            probe["rows"] = len(entries)
+        self._update_aggregates(mongo_db, entries)
+
+    @staticmethod
+    def _update_aggregates(mongo_db, entries):
+        # The raw entries are stored at this point: a stats failure must not spill them again
+        if not entries:
+            return
+        try:
+            update_query_stats(mongo_db, entries)
+        except Exception as e:
+            logger.error(f"Error updating query stats: {e}")
+        try:
+            update_query_rollups(mongo_db, entries)
+        except Exception as e:
+            logger.error(f"Error updating query rollups: {e}")
+
+    def _write(self, batch):
+        if mongo_health.is_available():
+            try:
+                self._insert(batch)
+                mongo_health.record_success()
+                return
+            except Exception as e:
+                mongo_health.record_failure(e)
+                logger.error(f"Error logging to MongoDB: {e}")
+        self._spill(batch)
+
+    def _spill(self, entries):
+        """
+        Append entries to the local spill file.
+        """
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(_to_json(entry), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Error writing search log spill file: {e}")
+
+    def _replay_spill(self):
+        """
+        Move spilled entries into MongoDB.
+        The spill file is renamed first so new spills do not mix with the replay;
+        an interrupted replay is resumed on the next call (at-least-once delivery).
+        """
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, replay_path)
+        try:
+            from bson import ObjectId
+
+            entries = read_spilled_entries(replay_path)
+            for entry in entries:
+                if "_id" in entry:
+                    entry["_id"] = ObjectId(entry["_id"])
+            batch_size = settings.SEARCH_LOG_BATCH_SIZE
+            for i in range(0, len(entries), batch_size):
+                self._insert(entries[i : i + batch_size])
+            os.remove(replay_path)
+            mongo_health.record_success()
+            logger.info(f"Replayed {len(entries)} spilled search log entries")
+        except Exception as e:
+            mongo_health.record_failure(e)
+            logger.error(f"Error replaying search log spill file: {e}")
+
+
+def _to_json(entry):
+    """
+    Convert a log entry to a JSON-serializable dictionary.
+    The entry gets a stable _id, so a replay that is interrupted and repeated
+    stores it only once.
+    """
+    from bson import ObjectId
+
+    result = dict(entry)
+    result["_id"] = str(result.get("_id") or ObjectId())
+    if isinstance(result.get("timestamp"), datetime):
+        result["timestamp"] = result["timestamp"].isoformat()
+    return result
+
+
+def read_spilled_entries(path):
+    """
+    Read log entries from a spill file.
+    Args:
+        path (str): Path to the JSON lines file.
+    Returns:
+        list: Log entries with timestamps converted back to datetime.
+    """
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Skipping malformed line in search log spill file")
+                continue
+            if isinstance(entry.get("timestamp"), str):
+                entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+            entries.append(entry)
+    return entries
+
+
+def read_local_search_log():
+    """
+    Read the search log entries kept locally while MongoDB is unavailable:
+    the spill file and a replay in progress.
+    Returns:
+        list: Log entries with timestamps converted back to datetime.
+    """
+    spill_path = search_log_writer.spill_path
+    return read_spilled_entries(spill_path + ".replay") + read_spilled_entries(spill_path)
+
+
+search_log_writer = SearchLogWriter()
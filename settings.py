@@ -1,32 +1,189 @@
 import os
-from dotenv import load_dotenv
+import pathlib
+import threading
 from urllib.parse import quote_plus
 
-# Load environment variables from .env file
-load_dotenv()
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env():
+    """
+    Load environment variables from the .env file (once, on first settings access).
+    python-dotenv is imported here so that importing settings stays cheap.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _env_loaded = True
+
+
+def to_bool(value):
+    """
+    Parse a boolean environment value ("1", "true", "yes" are true).
+    """
+    return value.lower() in ("1", "true", "yes")
+
+
+class env:
+    """
+    Settings attribute read from the environment variable of the same name
+    on first access and cached afterwards.
+    Assigning the attribute on the class (e.g. in benchmarks) replaces it.
+    """
+
+    _unset = object()
+
+    def __init__(self, default, cast=str):
+        """
+        Args:
+            default (str): Value used when the variable is not set.
+            cast (callable): Conversion applied to the string value.
+        """
+        self.default = default
+        self.cast = cast
+        self.name = None
+        self.value = self._unset
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if self.value is self._unset:
+            load_env()
+            self.value = self.cast(os.getenv(self.name, self.default))
+        return self.value
 
 
 class Settings:
     """
     Application settings loaded from environment variables.
     Provides access to MongoDB and MySQL configuration for the project.
+    Values are read lazily (see env), so importing this module does not touch
+    the environment or the .env file.
     """
 
     # MongoDB settings (for logs and statistics)
-    MONGO_HOST = os.getenv("MONGO_HOST", "localhost")
-    MONGO_PORT = os.getenv("MONGO_PORT", "27017")
-    MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "film_logs")
-    MONGO_USERNAME = os.getenv("MONGO_USERNAME", "")
-    MONGO_PASSWORD = os.getenv("MONGO_PASSWORD", "")
-    MONGO_COLLECTION=os.getenv("MONGO_COLLECTION", "")
-    MONGO_TYPE=os.getenv("MONGO_TYPE", "")
+    MONGO_HOST = env("localhost")
+    MONGO_PORT = env("27017")
+    MONGO_DB_NAME = env("film_logs")
+    MONGO_USERNAME = env("")
+    MONGO_PASSWORD = env("")
+    MONGO_COLLECTION = env("")
+    MONGO_TYPE = env("")
+    # Pre-aggregated query statistics (count / last_searched per query and search type)
+    MONGO_STATS_COLLECTION = env("search_query_stats")
+    # Hourly and daily search rollups (count / zero results / results sum per bucket);
+    # hourly buckets expire after ROLLUP_HOURLY_RETENTION_DAYS, daily ones are kept
+    MONGO_ROLLUP_COLLECTION = env("search_query_rollups")
+    ROLLUP_HOURLY_RETENTION_DAYS = env("14", float)
+    # Server selection timeout for MongoDB operations, milliseconds
+    MONGO_TIMEOUT_MS = env("3000", int)
+    # Health monitor: re-probe interval while up, backoff bounds while down (seconds)
+    MONGO_HEALTH_TTL = env("30", float)
+    MONGO_BACKOFF_INITIAL = env("1", float)
+    MONGO_BACKOFF_MAX = env("60", float)
+
+    # Search log writer: queue bound, batch size, flush interval (seconds) and
+    # the local JSONL file used while MongoDB is unavailable
+    SEARCH_LOG_QUEUE_SIZE = env("10000", int)
+    SEARCH_LOG_BATCH_SIZE = env("100", int)
+    SEARCH_LOG_FLUSH_INTERVAL = env("1", float)
+    SEARCH_LOG_SPILL_FILE = env(str(pathlib.Path(__file__).with_name("local_search_log.jsonl")))
 
     # MySQL settings (for films data)
-    MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
-    MYSQL_PORT = int(os.getenv("MYSQL_PORT", "3306"))
-    MYSQL_DB_NAME = os.getenv("MYSQL_DB_NAME", "films_database")
-    MYSQL_USERNAME = os.getenv("MYSQL_USERNAME", "root")
-    MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "")
+    MYSQL_HOST = env("localhost")
+    MYSQL_PORT = env("3306", int)
+    MYSQL_DB_NAME = env("films_database")
+    MYSQL_USERNAME = env("root")
+    MYSQL_PASSWORD = env("")
+    # Connection pool: size bounds, idle time before a liveness ping and
+    # checkout wait (seconds)
+    MYSQL_POOL_MIN = env("1", int)
+    MYSQL_POOL_MAX = env("10", int)
+    MYSQL_POOL_IDLE_CHECK = env("30", float)
+    MYSQL_POOL_TIMEOUT = env("10", float)
+    # Run search queries as server-side prepared statements (PREPARE/EXECUTE),
+    # at most MYSQL_PREPARED_CACHE_SIZE statements per pooled connection
+    MYSQL_PREPARED_STATEMENTS = env("false", to_bool)
+    MYSQL_PREPARED_CACHE_SIZE = env("64", int)
+
+    # Search results cache: bounds (entries, total rows) and entry lifetime (seconds)
+    RESULT_CACHE_ENABLED = env("true", to_bool)
+    RESULT_CACHE_MAX_ENTRIES = env("1000", int)
+    RESULT_CACHE_MAX_ROWS = env("50000", int)
+    RESULT_CACHE_TTL = env("300", float)
+
+    # Reference data (genres, year range): refresh interval and startup wait (seconds)
+    REFERENCE_REFRESH_INTERVAL = env("3600", float)
+    REFERENCE_LOAD_TIMEOUT = env("5", float)
+
+    # Prefetch of the next result page during interactive paging
+    PREFETCH_ENABLED = env("true", to_bool)
+    PREFETCH_WORKERS = env("2", int)
+
+    # Streaming export: rows fetched from the server-side cursor per round trip
+    EXPORT_CHUNK_SIZE = env("1000", int)
+
+    # Batch runner worker threads (keep at or below MYSQL_POOL_MAX)
+    BATCH_WORKERS = env("8", int)
+
+    # HTTP service: bind address, worker threads for database calls and the
+    # maximum number of requests handed to the workers at once
+    API_HOST = env("127.0.0.1")
+    API_PORT = env("8080", int)
+    API_WORKERS = env("10", int)
+    API_MAX_PENDING = env("200", int)
+
+    # Query instrumentation: calls at or above SLOW_QUERY_MS go to SLOW_QUERY_LOG;
+    # latency percentiles are written to METRICS_DUMP_FILE on exit if it is set
+    SLOW_QUERY_MS = env("200", float)
+    SLOW_QUERY_LOG = env(str(pathlib.Path(__file__).with_name("slow_queries.log")))
+    METRICS_DUMP_FILE = env("")
+
+    # In-memory actor name index: refresh interval (seconds) and the largest
+    # number of matching actors still searched by actor_id
+    ACTOR_INDEX_ENABLED = env("true", to_bool)
+    ACTOR_INDEX_REFRESH_INTERVAL = env("600", float)
+    ACTOR_INDEX_MAX_IDS = env("1000", int)
+
+    # Fuzzy (typo-tolerant) title and actor search: index refresh interval (seconds),
+    # matches per search, minimum share of matching trigrams and the number of
+    # postings merged per search (bounds the latency on very common trigrams)
+    FUZZY_SEARCH_ENABLED = env("true", to_bool)
+    FUZZY_REFRESH_INTERVAL = env("600", float)
+    FUZZY_TOP_K = env("20", int)
+    FUZZY_MIN_SCORE = env("0.5", float)
+    FUZZY_MAX_POSTINGS = env("200000", int)
+
+    # Query autocomplete from the search log: half-life of a search (hours),
+    # rebuild interval (seconds), distinct queries kept, suggestions per prefix
+    # and the longest indexed prefix
+    AUTOCOMPLETE_ENABLED = env("true", to_bool)
+    AUTOCOMPLETE_HALF_LIFE_HOURS = env("168", float)
+    AUTOCOMPLETE_REBUILD_INTERVAL = env("3600", float)
+    AUTOCOMPLETE_MAX_QUERIES = env("50000", int)
+    AUTOCOMPLETE_TOP_K = env("10", int)
+    AUTOCOMPLETE_MAX_PREFIX = env("32", int)
+
+    # Search source: "joins" (film/category/actor joins per query) or "film_search"
+    # (denormalized table, one row per film, refreshed every FILM_SEARCH_REFRESH_INTERVAL s)
+    SEARCH_SOURCE = env("joins")
+    FILM_SEARCH_REFRESH_INTERVAL = env("60", float)
+
+    # Log missing indexes and problematic query plans when the menu starts
+    SCHEMA_CHECK_ON_STARTUP = env("false", to_bool)
+
+    # Title search: "fulltext" (ranked, FULLTEXT index), "substring" (LIKE '%kw%')
+    # or "fuzzy" (closest titles from the in-memory trigram index)
+    TITLE_SEARCH_MODE = env("fulltext")
+    # Must match innodb_ft_min_token_size on the server
+    FULLTEXT_MIN_TOKEN_SIZE = env("3", int)
 
 
     @classmethod
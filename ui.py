@@ -1,11 +1,13 @@
+from contextlib import contextmanager
 import logging
+import sys
 
 logger = logging.getLogger(__name__)
 
 # UI module for user interaction - only user interface logic
 from formatter import (
     clear_screen,
-    format_table,
+    render_table,
     format_title,
     format_menu_option,
     format_section_header,
@@ -18,26 +20,22 @@ from formatter import (
     format_pagination_info,
     format_pagination_prompt,
 )
-from mongo_controler import get_last_queries, log_search_query, get_popular_queries
-from mysql_controler import (
-    close_mysql_connection,
-    count_films_by_actor,
-    count_films_by_genre,
-    count_films_by_keyword,
-    find_films_by_actor_with_genre,
-    find_films_by_criteria,
-    find_films_by_keyword,
-    get_all_genres,
-    get_year_range,
-)
+
+# Controllers (and through them settings and the database drivers) are imported
+# inside the functions, so the menu is shown before any of them is loaded
 
 
+PAGE_SIZE = 10
+YES_ANSWERS = ["y", "yes", "да", "д"]
+
 menu = {
     "1": "Поиск фильма по названию",
     "2": "Поиск фильма по жанру и диапазону годов выпуска",
     "3": "Поиск фильма по актеру",
     "4": "Просмотр популярных запросов",
     "5": "Просмотр последних (уникальных) запросов",
+    "6": "Экспорт результатов поиска в файл (CSV/JSONL)",
+    "7": "Популярные запросы за период (час/день/неделя)",
     "0": "Выход",
 }
 
@@ -54,6 +52,43 @@ def show_menu():
     print(format_border())
 
 
+@contextmanager
+def autocomplete_input(search_type):
+    """
+    Complete the input line with Tab from the queries of the search log.
+    Needs the readline module (not available in the Windows console, where
+    input works without completion).
+    Args:
+        search_type (str): Search type of the suggestions.
+    """
+    try:
+        import readline
+    except ImportError:
+        yield
+        return
+    from mongo_controler import autocomplete
+
+    matches = []
+
+    def complete(text, state):
+        if state == 0:
+            matches[:] = [
+                suggestion["query"] for suggestion in autocomplete.suggest(text, search_type)
+            ]
+        return matches[state] if state < len(matches) else None
+
+    previous = readline.get_completer(), readline.get_completer_delims()
+    # Complete the whole line, not the last word
+    readline.set_completer_delims("")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    try:
+        yield
+    finally:
+        readline.set_completer(previous[0])
+        readline.set_completer_delims(previous[1])
+
+
 def get_menu_choice():
     """
     Prompt the user to select a menu option and validate the input.
@@ -71,29 +106,144 @@ def get_menu_choice():
 def get_year_range_choice():
     """
     Prompt the user to select a year range for film search.
+    The available range is served from the in-memory reference data.
     Returns:
         dict: Dictionary with 'year_from' and 'year_to'.
     """
+    from reference_data import get_cached_year_range
+
     print(format_section_header("Поиск по диапазону годов"))
-    year_info = get_year_range()
+    year_info = get_cached_year_range() or {"min_year": None, "max_year": None}
     min_year, max_year = year_info["min_year"], year_info["max_year"]
-    if year_info:
+    if min_year is not None and max_year is not None:
         print(format_info(f"Доступный диапазон годов: {min_year} - {max_year}"))
-    year_from = input(
-        format_prompt(f"Введите начальный год (мин: {min_year}):")
-    ).strip()
-    year_to = input(format_prompt(f"Введите конечный год (макс: {max_year}):")).strip()
-    try:
-        year_from = int(year_from) if year_from else min_year
-        year_to = int(year_to) if year_to else max_year
+    while True:
+        year_from = input(
+            format_prompt(f"Введите начальный год (мин: {min_year}):")
+        ).strip()
+        year_to = input(
+            format_prompt(f"Введите конечный год (макс: {max_year}):")
+        ).strip()
+        try:
+            year_from = int(year_from) if year_from else min_year
+            year_to = int(year_to) if year_to else max_year
+        except ValueError as e:
+            logger.error(f"Ошибка преобразования года: {e}")
+            print(format_error("Неверный формат года. Введите числовое значение."))
+            continue
         if year_from and year_to and year_from > year_to:
             print(format_error("Начальный год не может быть больше конечного года!"))
-            return get_year_range_choice()
+            continue
         return {"year_from": year_from, "year_to": year_to}
-    except ValueError as e:
-        logger.error("Ошибка преобразования года:", e)
-        print(format_error("Неверный формат года. Введите числовое значение."))
-        return get_year_range_choice()
+
+
+def get_genre_choice():
+    """
+    Show the available genres and prompt the user to pick one by number.
+    Returns:
+        str or None: Selected genre, or None if the input was invalid.
+    """
+    from reference_data import get_genres
+
+    genres = get_genres()
+    if not genres:
+        print(format_error("Не удалось получить список жанров."))
+        input(format_wait_prompt())
+        return None
+    print(format_info("Доступные жанры:"))
+    for i, genre in enumerate(genres, 1):
+        print(f"  {i}. {genre}")
+    genre_input = input(format_prompt("Введите номер выбранного жанра:")).strip()
+    if not genre_input.isdigit():
+        print(format_error("Введите номер, а не строку."))
+        input(format_wait_prompt())
+        return None
+    if not 1 <= int(genre_input) <= len(genres):
+        print(format_error("Выберите номер из списка."))
+        input(format_wait_prompt())
+        return None
+    return genres[int(genre_input) - 1]
+
+
+def show_paginated_results(
+    fetch_page, not_found_message, title=None, page_size=PAGE_SIZE, on_empty=None
+):
+    """
+    Display search results page by page using cursor-based pagination.
+    The first page carries the total number of results, later pages reuse it.
+    The next page is prefetched in the background while the current one is shown.
+    Args:
+        fetch_page (callable): Function taking (cursor, total), both None for the
+            first page, and returning a SearchPage.
+        not_found_message (str): Message shown when nothing is found.
+        title (str, optional): Title printed above each page.
+        page_size (int): Number of results per page.
+        on_empty (callable, optional): Called instead of the wait prompt when
+            nothing is found (e.g. to offer a fuzzy search).
+    Returns:
+        int: Total number of results; 0 means nothing was found and the user
+            has already confirmed with Enter (callers skip their own wait prompt).
+    """
+    from prefetch import PagePrefetcher
+
+    page = fetch_page(None, None)
+    total = page.total
+    if total == 0:
+        print(format_error(not_found_message))
+        if on_empty is not None:
+            on_empty()
+        else:
+            input(format_wait_prompt())
+        return 0
+    prefetcher = PagePrefetcher(fetch_page)
+    page_number = 1
+    try:
+        while True:
+            if not page.rows:
+                print(format_info("Больше результатов нет."))
+                input(format_wait_prompt())
+                break
+            if page.next_cursor is not None:
+                # Fetch the next page while the user reads this one
+                prefetcher.prefetch(page.next_cursor, total)
+            if title:
+                print(title)
+            render_table(page.rows, page.headers)
+            print(format_pagination_info(page_number, total, page_size))
+            if page.next_cursor is None:
+                print(format_info("Это все результаты."))
+                input(format_wait_prompt())
+                break
+            if input(format_pagination_prompt()).strip().lower() not in YES_ANSWERS:
+                break
+            page = prefetcher.get(page.next_cursor, total)
+            page_number += 1
+    finally:
+        prefetcher.cancel()
+    return total
+
+
+def offer_fuzzy_search(index_name, keyword, fetch_page):
+    """
+    Show "did you mean" suggestions after an empty search and offer to show
+    the results of the fuzzy search.
+    Args:
+        index_name (str): Fuzzy index with the suggestions: 'title' or 'actor'.
+        keyword (str): Keyword of the empty search.
+        fetch_page (callable): Page function of the fuzzy search (see show_paginated_results).
+    """
+    from mysql_controler import fuzzy_index
+
+    suggestions = fuzzy_index.suggest(index_name, keyword)
+    if not suggestions:
+        input(format_wait_prompt())
+        return
+    print(format_info("Возможно, вы имели в виду:"))
+    for suggestion in suggestions:
+        print(f"  - {suggestion}")
+    answer = input(format_prompt("Показать результаты похожих запросов? (y/n):"))
+    if answer.strip().lower() in YES_ANSWERS:
+        show_paginated_results(fetch_page, "Фильмы не найдены.")
 
 
 def search_film_by_title():
@@ -101,42 +251,35 @@ def search_film_by_title():
     Search for films by title keyword and display paginated results.
     Prompts the user for a keyword and handles pagination and logging.
     """
+    from mongo_controler import log_search_query
+    from mysql_controler import find_films_by_keyword
+
     print("Вы выбрали поиск по названию.")
 
-    keyword = input(
-        format_prompt("Введите ключевое слово для поиска в названии фильма:")
-    ).strip()
+    with autocomplete_input("title"):
+        keyword = input(
+            format_prompt("Введите ключевое слово для поиска в названии фильма (Tab — подсказки):")
+        ).strip()
     if not keyword:
         print(format_error("Ключевое слово не может быть пустым!"))
         return
-    offset = 0
-    total = count_films_by_keyword(keyword)
-    if total == 0:
-        print(format_error("Фильмы не найдены."))
-        input(format_wait_prompt())
-        return
-    while True:
-        row, head = find_films_by_keyword(keyword, limit=10, skip=offset)
-        if not row:
-            print(format_info("Больше результатов нет."))
-            input(format_wait_prompt())
-            break
-        print(format_table(row, head))
-        print(format_pagination_info(offset // 10 + 1, total, 10))
-        if offset + 10 >= total:
-            print(format_info("Это все результаты."))
-            input(format_wait_prompt())
-            break
-        if input(format_pagination_prompt()).strip().lower() not in [
-            "y",
-            "yes",
-            "да",
-            "д",
-        ]:
-            break
-        offset += 10
+    total = show_paginated_results(
+        lambda cursor, total: find_films_by_keyword(
+            keyword, limit=PAGE_SIZE, cursor=cursor, total=total
+        ),
+        "Фильмы не найдены.",
+        on_empty=lambda: offer_fuzzy_search(
+            "title",
+            keyword,
+            lambda cursor, total: find_films_by_keyword(
+                keyword, limit=PAGE_SIZE, cursor=cursor, mode="fuzzy", total=total
+            ),
+        ),
+    )
+    # Searches without results are logged too (zero-result rate of the rollups)
     log_search_query(keyword, "title", total)
-    input(format_wait_prompt())
+    if total:
+        input(format_wait_prompt())
 
 
 def search_film_by_genre_and_year():
@@ -144,60 +287,28 @@ def search_film_by_genre_and_year():
     Search for films by genre and year range, display paginated results.
     Prompts the user to select a genre and year range, handles pagination and logging.
     """
+    from mongo_controler import log_search_query
+    from mysql_controler import find_films_by_criteria
+
     print("Вы выбрали поиск по жанру и диапазону годов.")
 
-    genres = get_all_genres()
-    if not genres:
-        print(format_error("Не удалось получить список жанров."))
-        input(format_wait_prompt())
-        return
-    print(format_info("Доступные жанры:"))
-    for i, genre in enumerate(genres, 1):
-        print(f"  {i}. {genre}")
-    genre_input = input(format_prompt("Введите номер выбранного жанра:")).strip()
-    if not genre_input.isdigit:
-        print(format_error("Введите номер, а не строку."))
-        input(format_wait_prompt())
-        return
-    if int(genre_input) > len(genres):
-        print(format_error("Выберите номер из списка."))
-        input(format_wait_prompt())
+    genre = get_genre_choice()
+    if genre is None:
         return
-    genre = genres[int(genre_input) - 1]
     print(format_prompt(f"Выбраный жанр: {genre} "))
     choice_years = get_year_range_choice()
-    offset = 0
     choice_years["genre"] = genre
-    total = count_films_by_genre(choice_years)
-    if total == 0:
-        print(format_error("Фильмы не найдены."))
-        input(format_wait_prompt())
-        return
-    while True:
-        films, headers = find_films_by_criteria(choice_years, limit=10, skip=offset)
-        if not films:
-            print(format_info("Больше результатов нет."))
-            input(format_wait_prompt())
-            break
-        formatted_lines = format_table(films, headers)
-        print(format_title(f"ПОКАЗАНЫ ФИЛЬМЫ ЖАНРА {genre} С {choice_years["year_from"]} ПО {choice_years["year_to"]}", 60))
-        print(formatted_lines)
-        print(format_pagination_info(offset // 10 + 1, total, 10))
-        if offset + 10 >= total:
-            print(format_info("Это все результаты."))
-            input(format_wait_prompt())
-            break
-        if input(format_pagination_prompt()).strip().lower() not in [
-            "y",
-            "yes",
-            "да",
-            "д",
-        ]:
-            break
-        offset += 10
-    log_search_query(
-        f"{genre} {choice_years["year_from"]}-{choice_years["year_to"]}", "genre_year", total
+    year_from, year_to = choice_years["year_from"], choice_years["year_to"]
+    total = show_paginated_results(
+        lambda cursor, total: find_films_by_criteria(
+            choice_years, limit=PAGE_SIZE, cursor=cursor, total=total
+        ),
+        "Фильмы не найдены.",
+        title=format_title(
+            f"ПОКАЗАНЫ ФИЛЬМЫ ЖАНРА {genre} С {year_from} ПО {year_to}", 60
+        ),
     )
+    log_search_query(f"{genre} {year_from}-{year_to}", "genre_year", total)
 
 
 def search_film_by_actor():
@@ -205,39 +316,32 @@ def search_film_by_actor():
     Search for films by actor name or surname, display paginated results.
     Prompts the user for part of an actor's name, handles pagination and logging.
     """
+    from mongo_controler import log_search_query
+    from mysql_controler import find_films_by_actor_with_genre
+
     print("Вы выбрали поиск по актеру.")
     
-    keyword = input(format_prompt("Введите часть имени или фамилии актёра:")).strip()
+    with autocomplete_input("actor"):
+        keyword = input(
+            format_prompt("Введите часть имени или фамилии актёра (Tab — подсказки):")
+        ).strip()
     if not keyword:
         print(format_error("Поле не может быть пустым!"))
         input(format_wait_prompt())
         return
-    offset = 0
-    total = count_films_by_actor(keyword)
-    if total == 0:
-        print(format_error(f'Фильмы с актером, содержащим "{keyword}" не найдены.'))
-        input(format_wait_prompt())
-        return
-    while True:
-        films, headers = find_films_by_actor_with_genre(keyword, limit=10, skip=offset)
-        if not films:
-            print(format_info("Больше результатов нет."))
-            break
-        films_table = format_table(films, headers)
-        print(films_table)
-        print(format_pagination_info(offset // 10 + 1, total, 10))
-        if offset + 10 >= total:
-            print(format_info("Это все результаты."))
-            input(format_wait_prompt())
-            break
-        if input(format_pagination_prompt()).strip().lower() not in [
-            "y",
-            "yes",
-            "да",
-            "д",
-        ]:
-            break
-        offset += 10
+    total = show_paginated_results(
+        lambda cursor, total: find_films_by_actor_with_genre(
+            keyword, limit=PAGE_SIZE, cursor=cursor, total=total
+        ),
+        f'Фильмы с актером, содержащим "{keyword}" не найдены.',
+        on_empty=lambda: offer_fuzzy_search(
+            "actor",
+            keyword,
+            lambda cursor, total: find_films_by_actor_with_genre(
+                keyword, limit=PAGE_SIZE, cursor=cursor, total=total, mode="fuzzy"
+            ),
+        ),
+    )
     log_search_query(keyword, "actor", total)
 
 
@@ -247,9 +351,11 @@ def display_popular_queries(limit=5):
     Args:
         limit (int): Number of popular queries to display.
     """
+    from mongo_controler import get_popular_queries
+
     print(format_title(f"СТАТИСТИКА ПОПУЛЯРНЫХ {limit} ПОИСКОВЫХ ЗАПРОСОВ", 60))
     popular = get_popular_queries(limit=5)
-    print(format_table(popular, ["_id", "count", "search_type", "last_searched"]))
+    render_table(popular, ["_id", "count", "search_type", "last_searched"])
     input(format_wait_prompt())
 
 
@@ -259,11 +365,106 @@ def show_recent_queries(limit=5):
     Args:
         limit (int): Number of recent queries to display.
     """
+    from mongo_controler import get_last_queries
+
     print("Последние уникальные запросы:")
     
     recent = get_last_queries(limit)
     print(format_title(f"СТАТИСТИКА ПОСЛЕДНИХ {limit} УНИКАЛЬНЫХ ЗАПРОСОВ", 60))
-    print(format_table(recent, ["_id", "count", "search_type", "last_searched"]))
+    render_table(recent, ["_id", "count", "search_type", "last_searched"])
+    input(format_wait_prompt())
+
+
+WINDOWS = {
+    "1": ("hour", "последний час"),
+    "2": ("day", "последние сутки"),
+    "3": ("week", "последнюю неделю"),
+}
+
+
+def show_window_queries(limit=5):
+    """
+    Display the popular queries, zero-result rate and mean number of results
+    of a time window (last hour, day or week).
+    Args:
+        limit (int): Number of popular queries to display.
+    """
+    from mongo_controler import get_window_popular_queries, get_window_query_summary
+
+    print(format_section_header("Выберите период"))
+    for key, (_, label) in WINDOWS.items():
+        print(format_menu_option(key, f"За {label}"))
+    choice = input(format_prompt("Ваш выбор:")).strip()
+    if choice not in WINDOWS:
+        print(format_error("Неверный ввод."))
+        input(format_wait_prompt())
+        return
+    window, label = WINDOWS[choice]
+
+    summary = get_window_query_summary(window)
+    print(format_title(f"ЗАПРОСЫ ЗА {label.upper()}", 60))
+    print(format_info(f"Всего поисков: {summary['count']}"))
+    print(format_info(f"Без результатов: {summary['zero_result_rate']:.1%}"))
+    print(format_info(f"Среднее число результатов: {summary['mean_results']}"))
+    columns = ["count", "zero_result_rate", "mean_results"]
+    if summary["by_type"]:
+        # render_table takes the values in row order, so rows are built in header order
+        render_table(
+            [
+                dict({"search_type": name}, **{column: stats[column] for column in columns})
+                for name, stats in summary["by_type"].items()
+            ],
+            ["search_type"] + columns,
+        )
+    popular = get_window_popular_queries(window, limit)
+    print(format_title(f"ТОП-{limit} ЗАПРОСОВ", 60))
+    headers = ["query", "search_type"] + columns
+    render_table([{column: row[column] for column in headers} for row in popular], headers)
+    input(format_wait_prompt())
+
+
+def export_search_results():
+    """
+    Export the complete result of a search to a CSV or JSONL file (optionally .gz).
+    Prompts the user for the search type, its parameters and the output file.
+    """
+    from exporter import export_search
+
+    print(format_section_header("Экспорт результатов поиска"))
+    print(format_menu_option(1, "По названию"))
+    print(format_menu_option(2, "По жанру и диапазону годов"))
+    print(format_menu_option(3, "По актеру"))
+    choice = input(format_prompt("Выберите тип поиска:")).strip()
+    if choice == "1":
+        keyword = input(format_prompt("Введите ключевое слово:")).strip()
+        search_type, params = "title", {"keyword": keyword}
+    elif choice == "2":
+        genre = get_genre_choice()
+        if genre is None:
+            return
+        params = get_year_range_choice()
+        params["genre"] = genre
+        search_type = "genre_year"
+    elif choice == "3":
+        keyword = input(format_prompt("Введите часть имени или фамилии актёра:")).strip()
+        search_type, params = "actor", {"actor": keyword}
+    else:
+        print(format_error("Неверный ввод."))
+        input(format_wait_prompt())
+        return
+    if search_type != "genre_year" and not keyword:
+        print(format_error("Поле не может быть пустым!"))
+        input(format_wait_prompt())
+        return
+    path = input(
+        format_prompt("Имя файла (.csv, .jsonl, можно с .gz) [export.csv]:")
+    ).strip() or "export.csv"
+    try:
+        count = export_search(search_type, params, path)
+        print(format_info(f"Экспортировано строк: {count} -> {path}"))
+    except Exception as e:
+        logger.error(f"Error exporting search results: {e}")
+        print(format_error(f"Не удалось выполнить экспорт: {e}"))
     input(format_wait_prompt())
 
 
@@ -273,4 +474,12 @@ def show_exit_message():
     """
     print(format_info("Закрытие соединения с базой данных..."))
     print(format_warning("До свидания!"))
+    # Nothing to flush or close if no search was run
+    if "mysql_controler" not in sys.modules:
+        return
+    from mysql_controler import close_mysql_connection
+    from search_log_writer import search_log_writer
+
+    # Flush pending search log entries before the MongoDB client is closed
+    search_log_writer.stop()
     close_mysql_connection()